@@ -0,0 +1,76 @@
+import os
+import threading
+from contextlib import contextmanager
+
+try:
+    import fcntl
+except ImportError:  # Windows: sin flock, solo se protege dentro del proceso
+    fcntl = None
+
+_locks_locales = {}
+_locks_lock = threading.Lock()
+
+
+def anexar(ruta, texto, sincronizar=False):
+    """Añade ``texto`` al final del archivo con una única llamada a write().
+
+    El archivo se abre con O_APPEND, así que el kernel coloca cada
+    escritura al final de forma atómica respecto a otros procesos: dos
+    workers pueden anexar a la vez sin intercalar ni pisar registros y sin
+    necesidad de bloqueos.
+    """
+    datos = texto.encode('utf-8')
+    fd = os.open(ruta, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+    try:
+        escritos = os.write(fd, datos)
+        # Una escritura corta en un archivo regular solo ocurre con el disco
+        # lleno o una señal; se completa para no dejar el registro truncado
+        while escritos < len(datos):
+            escritos += os.write(fd, datos[escritos:])
+        if sincronizar:
+            os.fsync(fd)
+    finally:
+        os.close(fd)
+
+
+def crear_con_cabecera(ruta, cabecera):
+    """Crea el archivo con su cabecera si aún no existe, sin carreras.
+
+    La cabecera se escribe en un temporal que se publica con ``os.link``:
+    si otro proceso lo creó antes, el enlace falla y no se duplica la
+    cabecera ni se cuela una fila delante de ella.
+    """
+    if os.path.exists(ruta):
+        return False
+    temporal = f"{ruta}.{os.getpid()}.{threading.get_ident()}.tmp"
+    with open(temporal, 'w', encoding='utf-8', newline='') as f:
+        f.write(cabecera)
+    try:
+        os.link(temporal, ruta)
+        return True
+    except FileExistsError:
+        return False
+    finally:
+        os.unlink(temporal)
+
+
+@contextmanager
+def bloqueo_archivo(ruta):
+    """Bloqueo exclusivo entre procesos (flock sobre ``<ruta>.lock``).
+
+    Solo es necesario para operaciones que reescriben el archivo entero,
+    como el formato JSON antiguo; los anexos no lo usan.
+    """
+    with _locks_lock:
+        lock_local = _locks_locales.setdefault(ruta, threading.Lock())
+    with lock_local:
+        if fcntl is None:
+            yield
+            return
+        fd = os.open(f"{ruta}.lock", os.O_RDWR | os.O_CREAT, 0o644)
+        try:
+            fcntl.flock(fd, fcntl.LOCK_EX)
+            yield
+        finally:
+            fcntl.flock(fd, fcntl.LOCK_UN)
+            os.close(fd)
@@ -0,0 +1,196 @@
+import os
+import queue
+import threading
+import time
+
+POLITICAS_FSYNC = ('lote', 'intervalo', 'ninguna')
+_FIN = object()
+
+
+class ColaLlenaError(Exception):
+    """La cola de escritura sigue llena tras esperar el tiempo máximo"""
+
+
+class EscritorDiferido:
+    """Cola acotada de escrituras con un hilo que las confirma por lotes.
+
+    ``escribir_lote(lote, sincronizar)`` recibe la lista de elementos
+    acumulados y debe escribirlos; si ``sincronizar`` es verdadero también
+    debe hacer fsync. La política de durabilidad decide cuándo:
+
+    - ``lote``: fsync tras cada lote escrito.
+    - ``intervalo``: como mucho un fsync cada ``intervalo`` segundos.
+    - ``ninguna``: se deja el volcado al sistema operativo.
+
+    Si ``escribir_lote`` falla se reintenta ``reintentos`` veces con una
+    espera que se duplica en cada intento; si sigue fallando, el lote se
+    entrega a ``respaldo(lote)`` (si se indicó) para no perderlo.
+
+    El hilo se arranca en el primer uso de cada proceso, así que un
+    ``fork`` de gunicorn obtiene su propio escritor.
+    """
+
+    def __init__(self, escribir_lote, capacidad=1000, max_lote=500,
+                 politica='intervalo', intervalo=1.0, espera_max=2.0,
+                 reintentos=3, espera_reintento=0.1, respaldo=None):
+        if politica not in POLITICAS_FSYNC:
+            raise ValueError(f"Política de fsync desconocida: {politica}")
+        self._escribir_lote = escribir_lote
+        self.capacidad = capacidad
+        self.max_lote = max_lote
+        self.politica = politica
+        self.intervalo = intervalo
+        self.espera_max = espera_max
+        self.reintentos = reintentos
+        self.espera_reintento = espera_reintento
+        self._respaldo = respaldo
+        self._lock = threading.Lock()
+        self._pid = None
+        self._hilo = None
+        self._cola = None
+        # 'errores' cuenta registros que no se pudieron escribir; de ellos,
+        # 'respaldados' acabaron en el respaldo y 'perdidos' en ningún sitio
+        self.stats = {'encolados': 0, 'rechazados': 0, 'lotes': 0, 'escritos': 0, 'fsyncs': 0,
+                      'reintentos': 0, 'errores': 0, 'respaldados': 0, 'perdidos': 0,
+                      'fsyncs_fallidos': 0}
+
+    def _arrancar(self):
+        """Cola e hilo de este proceso, creándolos si aún no existen.
+
+        El pid se publica el último: quien lo ve igual al suyo ya encuentra
+        la cola de este proceso y no la heredada del padre.
+        """
+        with self._lock:
+            if self._pid == os.getpid() and self._hilo is not None:
+                return self._cola
+            cola = queue.Queue(maxsize=self.capacidad)
+            hilo = threading.Thread(target=self._bucle, args=(cola,), name='escritor-diferido', daemon=True)
+            hilo.start()
+            self._cola = cola
+            self._hilo = hilo
+            self._pid = os.getpid()
+            return cola
+
+    def _cola_propia(self):
+        # Se lee el pid antes que la cola (ver _arrancar)
+        if self._pid == os.getpid():
+            return self._cola
+        return self._arrancar()
+
+    def encolar(self, elemento):
+        """Encola un elemento; si la cola está llena espera hasta ``espera_max``.
+
+        Lanza ColaLlenaError si no hubo hueco a tiempo (contrapresión).
+        """
+        cola = self._cola_propia()
+        try:
+            cola.put(elemento, timeout=self.espera_max)
+        except queue.Full:
+            self._sumar(rechazados=1)
+            raise ColaLlenaError(f"Cola de escritura llena ({self.capacidad} pendientes)")
+        self._sumar(encolados=1)
+
+    def _sumar(self, **incrementos):
+        # Los contadores se actualizan desde las peticiones y desde el hilo
+        with self._lock:
+            for clave, valor in incrementos.items():
+                self.stats[clave] += valor
+
+    def _bucle(self, cola):
+        ultimo_fsync = time.monotonic()
+        pendiente_fsync = False
+        while True:
+            try:
+                primero = cola.get(timeout=self.intervalo)
+            except queue.Empty:
+                if pendiente_fsync:
+                    self._escribir([], True)
+                    pendiente_fsync = False
+                    ultimo_fsync = time.monotonic()
+                continue
+
+            lote = []
+            terminar = primero is _FIN
+            if not terminar:
+                lote.append(primero)
+            while len(lote) < self.max_lote and not terminar:
+                try:
+                    elemento = cola.get_nowait()
+                except queue.Empty:
+                    break
+                if elemento is _FIN:
+                    terminar = True
+                else:
+                    lote.append(elemento)
+
+            if self.politica == 'lote':
+                sincronizar = True
+            elif self.politica == 'intervalo':
+                sincronizar = terminar or time.monotonic() - ultimo_fsync >= self.intervalo
+            else:
+                sincronizar = False
+
+            if lote or (sincronizar and pendiente_fsync):
+                self._escribir(lote, sincronizar)
+                if sincronizar:
+                    ultimo_fsync = time.monotonic()
+                pendiente_fsync = self.politica == 'intervalo' and not sincronizar
+
+            for _ in range(len(lote) + (1 if terminar else 0)):
+                cola.task_done()
+            if terminar:
+                return
+
+    def _escribir(self, lote, sincronizar):
+        """Escribe un lote con reintentos; si no lo consigue, lo respalda.
+
+        Un intento fallido puede haber escrito parte del lote, así que un
+        reintento puede duplicar registros: se prefiere a perderlos.
+        """
+        espera = self.espera_reintento
+        for intento in range(self.reintentos + 1):
+            try:
+                self._escribir_lote(lote, sincronizar)
+            except Exception as e:
+                error = e
+                if intento < self.reintentos:
+                    self._sumar(reintentos=1)
+                    time.sleep(espera)
+                    espera *= 2
+                continue
+            self._sumar(lotes=1 if lote else 0, escritos=len(lote), fsyncs=1 if sincronizar else 0)
+            return
+
+        print(f"Error en escritura diferida ({len(lote)} registros): {error}")
+        if not lote:
+            self._sumar(fsyncs_fallidos=1)
+            return
+        if self._respaldo is not None:
+            try:
+                self._respaldo(lote)
+                self._sumar(errores=len(lote), respaldados=len(lote))
+                return
+            except Exception as e:
+                print(f"Error guardando el respaldo de la escritura diferida: {e}")
+        self._sumar(errores=len(lote), perdidos=len(lote))
+
+    def vaciar(self):
+        """Bloquea hasta que todo lo encolado se haya escrito"""
+        if self._pid == os.getpid() and self._cola is not None:
+            self._cola.join()
+
+    def cerrar(self):
+        """Escribe lo pendiente y detiene el hilo (llamar al apagar)"""
+        if self._pid != os.getpid() or self._hilo is None:
+            return
+        self._cola.put(_FIN)
+        self._hilo.join()
+        self._hilo = None
+        self._pid = None
+
+    def estadisticas(self):
+        with self._lock:
+            stats = dict(self.stats)
+        stats['pendientes'] = self._cola.qsize() if self._cola is not None and self._pid == os.getpid() else 0
+        stats['politica'] = self.politica
+        return stats
@@ -0,0 +1,49 @@
+import json
+import os
+
+
+def migrar_desde_array(ruta_json, ruta_jsonl):
+    """Convierte una sola vez el antiguo array JSON en un archivo JSON Lines.
+
+    El archivo nuevo se escribe aparte y se publica con ``os.link``, que
+    falla si otro proceso ya lo creó, así que varios workers pueden
+    intentarlo a la vez sin pisarse. El array original se conserva
+    renombrado como ``<archivo>.migrado``. Si el array no se puede leer
+    (JSON corrupto, otra codificación) se deja donde está para revisarlo a
+    mano y no se migra nada. Devuelve el número de registros migrados (0
+    si no había nada que hacer).
+    """
+    if os.path.exists(ruta_jsonl) or not os.path.exists(ruta_json):
+        return 0
+
+    try:
+        with open(ruta_json, 'r', encoding='utf-8') as f:
+            datos = json.load(f)
+    except (ValueError, RecursionError, OSError) as e:
+        # UnicodeDecodeError y JSONDecodeError son ValueError
+        print(f"Error leyendo {ruta_json}, no se migra: {e}")
+        return 0
+    if not isinstance(datos, list):
+        datos = [datos]
+    # El archivo JSONL se mantiene en orden cronológico; los registros sin
+    # fecha (o que no son objetos) quedan al principio
+    datos.sort(key=lambda x: str(x.get('fecha_registro') or '') if isinstance(x, dict) else '')
+
+    temporal = f"{ruta_jsonl}.{os.getpid()}.tmp"
+    with open(temporal, 'w', encoding='utf-8') as f:
+        for registro in datos:
+            f.write(json.dumps(registro, ensure_ascii=False) + '\n')
+        f.flush()
+        os.fsync(f.fileno())
+    try:
+        os.link(temporal, ruta_jsonl)
+    except FileExistsError:
+        return 0
+    finally:
+        os.unlink(temporal)
+
+    try:
+        os.replace(ruta_json, f"{ruta_json}.migrado")
+    except FileNotFoundError:
+        pass
+    return len(datos)
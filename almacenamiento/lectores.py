@@ -0,0 +1,123 @@
+import csv
+import io
+import json
+import os
+import threading
+from collections import deque
+from itertools import islice
+
+
+class LectorIncremental:
+    """Lector con caché de un archivo al que solo se le añaden datos.
+
+    Recuerda hasta qué byte ha leído y la firma del archivo (inodo, tamaño
+    y mtime). Si la firma no cambia devuelve lo ya parseado; si el archivo
+    creció solo procesa la cola nueva; si encogió o fue reemplazado vuelve
+    a leerlo entero. El archivo se recorre por bloques y solo se guardan
+    los ``max_registros`` más recientes (más un contador para total()),
+    así que la memoria no crece con el archivo.
+    """
+
+    BLOQUE = 1 << 20
+
+    def __init__(self, ruta, max_registros=None):
+        self.ruta = ruta
+        self.max_registros = max_registros
+        self._lock = threading.Lock()
+        self._reiniciar()
+
+    def _reiniciar(self):
+        self._firma = None
+        self._offset = 0
+        self._registros = deque(maxlen=self.max_registros)
+        self._total = 0
+
+    def _parsear(self, texto):
+        """Convierte un bloque de registros completos en registros"""
+        raise NotImplementedError
+
+    def _fin_registros(self, datos):
+        """Posición tras el último registro completo de ``datos`` (0 si no hay ninguno)"""
+        return datos.rfind(b'\n') + 1
+
+    def _actualizar(self):
+        try:
+            st = os.stat(self.ruta)
+        except FileNotFoundError:
+            self._reiniciar()
+            return
+        firma = (st.st_ino, st.st_size, st.st_mtime_ns)
+        if firma == self._firma:
+            return
+        if (self._firma is None or st.st_ino != self._firma[0]
+                or st.st_size < self._offset
+                or (st.st_size == self._firma[1] and st.st_mtime_ns != self._firma[2])):
+            # Archivo nuevo, truncado o reescrito: lectura completa
+            self._reiniciar()
+
+        # Solo hasta el tamaño de la firma, y solo registros completos: lo
+        # que se esté escribiendo ahora se recogerá en la próxima lectura
+        restante = st.st_size - self._offset
+        pendiente = b''
+        with open(self.ruta, 'rb') as f:
+            f.seek(self._offset)
+            while restante > 0:
+                bloque = f.read(min(self.BLOQUE, restante))
+                if not bloque:
+                    break
+                restante -= len(bloque)
+                datos = pendiente + bloque
+                fin = self._fin_registros(datos)
+                if fin:
+                    registros = self._parsear(datos[:fin].decode('utf-8'))
+                    self._registros.extend(registros)
+                    self._total += len(registros)
+                    self._offset += fin
+                pendiente = datos[fin:]
+        self._firma = firma
+
+    def leer(self, limite=None):
+        """Registros del más reciente al más antiguo (como mucho ``max_registros``)"""
+        with self._lock:
+            self._actualizar()
+            return list(islice(reversed(self._registros), limite))
+
+    def total(self):
+        with self._lock:
+            self._actualizar()
+            return self._total
+
+
+class LectorJSONL(LectorIncremental):
+    def _parsear(self, texto):
+        registros = []
+        for linea in texto.splitlines():
+            if not linea.strip():
+                continue
+            try:
+                registros.append(json.loads(linea))
+            except json.JSONDecodeError:
+                continue
+        return registros
+
+
+class LectorCSV(LectorIncremental):
+    def _reiniciar(self):
+        super()._reiniciar()
+        self._cabecera = None
+
+    def _parsear(self, texto):
+        filas = csv.reader(io.StringIO(texto, newline=''))
+        if self._cabecera is None:
+            self._cabecera = next(filas, None)
+        cabecera = self._cabecera
+        return [dict(zip(cabecera, fila)) for fila in filas if fila]
+
+    def _fin_registros(self, datos):
+        # Un campo entre comillas puede contener saltos de línea: solo es fin
+        # de fila el salto precedido de un número par de comillas en el bloque
+        fin = datos.rfind(b'\n')
+        while fin != -1 and datos.count(b'"', 0, fin) % 2:
+            fin = datos.rfind(b'\n', 0, fin)
+        return fin + 1
+
@@ -0,0 +1,46 @@
+import os
+
+# Cada registro de datos.txt empieza con una línea de 50 signos '='
+SEPARADOR = b"\n" + b"=" * 50 + b"\n"
+TAMANO_BLOQUE = 64 * 1024
+
+
+def leer_ultimos_registros(ruta, limite, antes_de=None, bloque=TAMANO_BLOQUE):
+    """Lee hacia atrás desde el final del archivo los últimos ``limite`` registros.
+
+    Solo se cargan en memoria los bloques necesarios para esos registros.
+    ``antes_de`` es un offset en bytes devuelto por una llamada anterior y
+    permite pedir la página siguiente (más antigua). Devuelve
+    ``(registros, cursor)`` con los registros del más reciente al más
+    antiguo y el offset donde empieza el más antiguo, o ``None`` si ya no
+    quedan registros anteriores.
+    """
+    registros = []
+    if not os.path.exists(ruta):
+        return registros, None
+
+    with open(ruta, 'rb') as f:
+        tamano = f.seek(0, os.SEEK_END)
+        pos = tamano if antes_de is None else max(0, min(int(antes_de), tamano))
+        buffer = b''
+        inicio = pos
+        while len(registros) < limite:
+            idx = buffer.rfind(SEPARADOR)
+            if idx != -1:
+                inicio = pos + idx
+                registros.append(buffer[idx + len(SEPARADOR):])
+                buffer = buffer[:idx]
+                continue
+            if pos == 0:
+                # Texto anterior al primer separador (si lo hay)
+                if buffer.strip():
+                    registros.append(buffer)
+                inicio = 0
+                break
+            nuevo_pos = max(0, pos - bloque)
+            f.seek(nuevo_pos)
+            buffer = f.read(pos - nuevo_pos) + buffer
+            pos = nuevo_pos
+
+    registros = [r.decode('utf-8', errors='replace').strip() for r in registros]
+    return registros, (inicio if inicio > 0 else None)
@@ -1,13 +1,31 @@
 # Importaciones necesarias
 import os
 import csv
+import io
+import atexit
 import json
+import base64
+import time
+import contextvars
+import click
 from datetime import datetime
-from flask import Flask, render_template, request, redirect, url_for, flash, jsonify
+from decimal import Decimal, InvalidOperation
+from flask import Flask, render_template, request, redirect, url_for, flash, jsonify, Response, stream_with_context
 from flask_login import LoginManager, UserMixin, login_user, login_required, logout_user, current_user
 import mysql.connector
 from mysql.connector import Error
-from werkzeug.security import generate_password_hash, check_password_hash
+from conexion.pool import DBManager, PoolAgotadoError
+from conexion.migraciones import aplicar_migraciones, problemas_de_plan
+from conexion.salud import SondaSalud
+from cache import CacheTTL, CacheVersionada
+from metricas import RegistroMetricas, CUBETAS_CONSULTAS
+from almacenamiento import jsonl
+from almacenamiento.lectores import LectorCSV, LectorJSONL
+from almacenamiento.txt import leer_ultimos_registros
+from almacenamiento.escritura import EscritorDiferido, ColaLlenaError
+from almacenamiento.anexar import anexar, crear_con_cabecera, bloqueo_archivo
+from contrasenas import ServicioHash, HashSaturadoError
+from trabajos import TrabajosEnSegundoPlano, TrabajosLlenosError
 from dotenv import load_dotenv
 
 # Cargar variables de entorno desde .env
@@ -23,38 +41,117 @@ login_manager.login_view = 'login'
 
 # Configuración de directorios
 BASE_DIR = os.path.dirname(os.path.abspath(__file__))
-DATOS_DIR = os.path.join(BASE_DIR, 'datos')
+DATOS_DIR = os.getenv('DATOS_DIR', os.path.join(BASE_DIR, 'datos'))
 os.makedirs(DATOS_DIR, exist_ok=True)
 
 # Rutas de archivos
 TXT_FILE = os.path.join(DATOS_DIR, 'datos.txt')
 JSON_FILE = os.path.join(DATOS_DIR, 'datos.json')
+JSONL_FILE = os.path.join(DATOS_DIR, 'datos.jsonl')
 CSV_FILE = os.path.join(DATOS_DIR, 'datos.csv')
 
-# Clase para gestionar la conexión a MySQL
-class DBManager:
-    def __init__(self):
-        self.conn = None
+# Formato del almacén JSON: 'jsonl' (solo anexar, por defecto) o 'array' (formato antiguo)
+JSON_STORAGE = os.getenv('JSON_STORAGE', 'jsonl')
+if JSON_STORAGE == 'jsonl':
+    migrados = jsonl.migrar_desde_array(JSON_FILE, JSONL_FILE)
+    if migrados:
+        print(f"📦 {migrados} registros migrados de {JSON_FILE} a {JSONL_FILE}")
 
-    def get_connection(self):
-        try:
-            self.conn = mysql.connector.connect(
-                host=os.getenv("MYSQL_HOST"),
-                user=os.getenv("MYSQL_USER"),
-                password=os.getenv("MYSQL_PASSWORD"),
-                database=os.getenv("MYSQL_DB"),
-                port=int(os.getenv("MYSQL_PORT", 3306))
-            )
-            return self.conn
-        except mysql.connector.Error as err:
-            print(f"Error de conexión a MySQL: {err}")
-            return None
+# Caché del catálogo de productos: se invalida al escribir en la tabla producto.
+# El archivo de versión propaga la invalidación al resto de workers del host.
+catalogo_cache = CacheVersionada(
+    maxsize=int(os.getenv('CATALOG_CACHE_SIZE', 256)),
+    archivo_version=os.getenv('CATALOG_VERSION_FILE', os.path.join(DATOS_DIR, 'catalogo.version')) or None
+)
+
+def invalidar_catalogo():
+    """Hook a llamar tras cualquier INSERT/UPDATE/DELETE sobre producto"""
+    catalogo_cache.incrementar()
+
+# Tamaños de página de los listados del dashboard
+TAMANOS_PAGINA = (10, 25, 50, 100)
+TAMANO_PAGINA_DEFECTO = 25
 
-    def close_connection(self):
-        if self.conn and self.conn.is_connected():
-            self.conn.close()
+# Lectores con caché: solo vuelven a parsear lo añadido desde la última lectura
+# y guardan solo los registros que caben en la página más grande
+lector_json = LectorJSONL(JSONL_FILE, max_registros=TAMANOS_PAGINA[-1])
+lector_csv = LectorCSV(CSV_FILE, max_registros=TAMANOS_PAGINA[-1])
 
+# Pool de conexiones MySQL (uno por proceso, creado tras el fork)
 db_manager = DBManager()
+atexit.register(db_manager.close_connection)
+
+# ==========================
+# MÉTRICAS (expuestas en /metrics)
+# ==========================
+
+metricas = RegistroMetricas(activo=os.getenv('METRICS', '1') == '1')
+metricas.histograma('http_peticion_duracion_segundos', 'Duración de las peticiones por endpoint, método y estado')
+metricas.histograma('http_peticion_consultas_sql', 'Consultas SQL por petición', CUBETAS_CONSULTAS)
+metricas.histograma('http_peticion_sql_segundos', 'Tiempo en MySQL por petición (execute y fetch)')
+metricas.histograma('archivo_operacion_duracion_segundos', 'Duración de las lecturas y escrituras de los archivos de datos')
+metricas.contador('mysql_consultas_total', 'Consultas MySQL ejecutadas')
+metricas.contador('mysql_tiempo_segundos_total', 'Tiempo total en MySQL (execute y fetch)')
+
+# [inicio, consultas, segundos en MySQL] de la petición en curso. Una
+# ContextVar y no flask.g: se consulta en cada execute/fetch y leerla
+# cuesta mucho menos que pasar por el proxy de g.
+medida_peticion = contextvars.ContextVar('medida_peticion', default=None)
+
+def registrar_consulta(segundos, consultas):
+    """Observador de DBManager: acumula en la petición en curso o, fuera de ella, en los totales"""
+    medida = medida_peticion.get()
+    if medida is None:
+        metricas.incrementar('mysql_consultas_total', consultas)
+        metricas.incrementar('mysql_tiempo_segundos_total', segundos)
+    else:
+        medida[1] += consultas
+        medida[2] += segundos
+
+if metricas.activo:
+    db_manager.observador_consultas = registrar_consulta
+
+@app.before_request
+def iniciar_medida_peticion():
+    if metricas.activo:
+        medida_peticion.set([time.perf_counter(), 0, 0.0])
+
+@app.after_request
+def registrar_medida_peticion(response):
+    medida = medida_peticion.get()
+    if medida is None:
+        return response
+    # Lo que se consulte después (respuestas en streaming) va solo a los totales
+    medida_peticion.set(None)
+    inicio, consultas, segundos_sql = medida
+    duracion = time.perf_counter() - inicio
+    endpoint = request.endpoint or 'sin_ruta'
+    metricas.observar('http_peticion_duracion_segundos', duracion,
+                      (('endpoint', endpoint), ('metodo', request.method), ('estado', response.status_code)))
+    metricas.observar('http_peticion_consultas_sql', consultas, (('endpoint', endpoint),))
+    metricas.observar('http_peticion_sql_segundos', segundos_sql, (('endpoint', endpoint),))
+    if consultas:
+        metricas.incrementar('mysql_consultas_total', consultas)
+        metricas.incrementar('mysql_tiempo_segundos_total', segundos_sql)
+    response.headers['Server-Timing'] = (
+        f'db;dur={segundos_sql * 1000:.2f};desc="{consultas} consultas", app;dur={duracion * 1000:.2f}'
+    )
+    return response
+
+# Hash de contraseñas en un pool de procesos, fuera de los hilos de petición
+servicio_hash = ServicioHash(
+    metodo=os.getenv('PASSWORD_HASH_METHOD', 'scrypt'),
+    procesos=int(os.getenv('PASSWORD_HASH_WORKERS', 2)),
+    max_concurrentes=int(os.getenv('PASSWORD_HASH_MAX_PENDING', 8)),
+    timeout=float(os.getenv('PASSWORD_HASH_TIMEOUT', 10))
+)
+atexit.register(servicio_hash.cerrar)
+
+# Caché de usuarios para el user_loader (evita una consulta por petición)
+usuarios_cache = CacheTTL(
+    maxsize=int(os.getenv('USER_CACHE_SIZE', 1024)),
+    ttl=float(os.getenv('USER_CACHE_TTL', 300))
+)
 
 # Modelo de Usuario para Flask-Login
 class User(UserMixin):
@@ -66,205 +163,693 @@ class User(UserMixin):
 
     @staticmethod
     def get(user_id):
-        conn = db_manager.get_connection()
-        if conn:
-            try:
+        try:
+            user_id = int(user_id)
+        except (TypeError, ValueError):
+            return None
+
+        user = usuarios_cache.get(user_id)
+        if user is not None:
+            return user
+
+        try:
+            with db_manager.conexion() as conn:
                 cursor = conn.cursor(dictionary=True)
-                cursor.execute("SELECT * FROM usuarios WHERE id_usuario = %s", (user_id,))
+                cursor.execute(
+                    "SELECT id_usuario, nombre, mail, fecha_registro FROM usuarios WHERE id_usuario = %s",
+                    (user_id,)
+                )
                 user_data = cursor.fetchone()
-                if user_data:
-                    return User(
-                        id_usuario=user_data['id_usuario'],
-                        nombre=user_data['nombre'],
-                        mail=user_data['mail'],
-                        fecha_registro=user_data['fecha_registro']
-                    )
-            except Error as e:
-                print(f"Error obteniendo usuario: {e}")
-            finally:
-                db_manager.close_connection()
+                cursor.close()
+            if user_data:
+                user = User(
+                    id_usuario=user_data['id_usuario'],
+                    nombre=user_data['nombre'],
+                    mail=user_data['mail'],
+                    fecha_registro=user_data['fecha_registro']
+                )
+                usuarios_cache.set(user_id, user)
+                return user
+        except Error as e:
+            print(f"Error obteniendo usuario: {e}")
         return None
 
+def invalidar_usuario(user_id):
+    """Hook a llamar tras modificar o eliminar una fila de usuarios"""
+    usuarios_cache.invalidar(int(user_id))
+
 # Cargar usuario para Flask-Login
 @login_manager.user_loader
 def load_user(user_id):
     return User.get(user_id)
 
-# Función para crear tablas si no existen
+# Función para crear tablas si no existen (y aplicar las migraciones pendientes)
 def create_mysql_tables():
     try:
-        conn = db_manager.get_connection()
-        if conn:
-            cursor = conn.cursor()
-            cursor.execute("""
-                CREATE TABLE IF NOT EXISTS usuarios (
-                    id_usuario INT AUTO_INCREMENT PRIMARY KEY,
-                    nombre VARCHAR(255) NOT NULL,
-                    mail VARCHAR(255) NOT NULL UNIQUE,
-                    password VARCHAR(255) NOT NULL,
-                    fecha_registro TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-                )
-            """)
-            cursor.execute("""
-                CREATE TABLE IF NOT EXISTS producto (
-                    id_producto INT AUTO_INCREMENT PRIMARY KEY,
-                    nombre VARCHAR(255) NOT NULL,
-                    costo DECIMAL(10, 2) NOT NULL,
-                    descripcion TEXT,
-                    stock INT NOT NULL DEFAULT 0,
-                    id_usuario_creador INT,
-                    fecha_creacion TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                    FOREIGN KEY (id_usuario_creador) REFERENCES usuarios(id_usuario) ON DELETE SET NULL
-                )
-            """)
-            cursor.execute("""
-                CREATE TABLE IF NOT EXISTS usuario_producto (
-                    id_relacion INT AUTO_INCREMENT PRIMARY KEY,
-                    id_usuario INT NOT NULL,
-                    id_producto INT NOT NULL,
-                    fecha_asociacion TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                    FOREIGN KEY (id_usuario) REFERENCES usuarios(id_usuario) ON DELETE CASCADE,
-                    FOREIGN KEY (id_producto) REFERENCES producto(id_producto) ON DELETE CASCADE,
-                    UNIQUE KEY unique_usuario_producto (id_usuario, id_producto)
-                )
-            """)
-            conn.commit()
-            cursor.close()
-            db_manager.close_connection()
-            print("✅ Tablas verificadas/creadas correctamente.")
-    except Error as e:
+        aplicadas = aplicar_migraciones(db_manager)
+        if aplicadas:
+            print(f"✅ Migraciones aplicadas: {', '.join(map(str, aplicadas))}")
+        else:
+            print("✅ Tablas verificadas: el esquema ya estaba al día.")
+    except (Error, RuntimeError) as e:
         print(f"❌ Error al crear tablas: {e}")
 
 def guardar_mysql_db(datos):
+    # El hash se calcula antes de tomar una conexión del pool
+    password_hash = servicio_hash.generar(datos['password'])
     try:
-        conn = db_manager.get_connection()
-        if conn:
+        with db_manager.conexion() as conn:
             cursor = conn.cursor()
             cursor.execute('''
                 INSERT INTO usuarios (nombre, mail, password)
                 VALUES (%s, %s, %s)
-            ''', (datos['nombre'], datos['mail'], generate_password_hash(datos['password'])))
+            ''', (datos['nombre'], datos['mail'], password_hash))
             conn.commit()
             cursor.close()
-            db_manager.close_connection()
             return True
+    except mysql.connector.IntegrityError:
+        # mail es UNIQUE: el duplicado lo resuelve el propio INSERT
+        raise
     except Error as e:
         print(f"Error guardando en MySQL: {e}")
         return False
 
+ER_DUP_ENTRY = 1062
+TAMANO_LOTE_INSERT = 1000
+# Cada contraseña es un hash costoso: el lote debe caber en el timeout de gunicorn
+MAX_USUARIOS_IMPORT = int(os.getenv('IMPORT_MAX_USUARIOS', 200))
+# Por encima de MAX_USUARIOS_IMPORT la importación se hace en segundo plano
+MAX_USUARIOS_IMPORT_FONDO = int(os.getenv('IMPORT_MAX_USUARIOS_FONDO', 10000))
+REINTENTOS_HASH_FONDO = 5
+
+# Importaciones grandes: un hilo por worker y el estado en datos/trabajos
+trabajos = TrabajosEnSegundoPlano(
+    os.getenv('JOBS_DIR', os.path.join(DATOS_DIR, 'trabajos')),
+    hilos=int(os.getenv('JOBS_WORKERS', 1)),
+    max_pendientes=int(os.getenv('JOBS_MAX_PENDING', 4))
+)
+atexit.register(trabajos.cerrar)
+
+def importar_usuarios(usuarios):
+    """Alta masiva de usuarios: hash en paralelo y executemany en una transacción.
+
+    Devuelve un dict con los creados, los mails ya existentes y las filas
+    inválidas (con su índice en la lista recibida).
+    """
+    invalidos = []
+    validos = {}
+    for indice, usuario in enumerate(usuarios):
+        if not isinstance(usuario, dict):
+            invalidos.append({'indice': indice, 'error': 'No es un objeto'})
+            continue
+        nombre = str(usuario.get('nombre') or '').strip()
+        mail = str(usuario.get('mail') or '').strip()
+        password = usuario.get('password') or ''
+        if not nombre or not mail or '@' not in mail or not password:
+            invalidos.append({'indice': indice, 'error': 'nombre, mail y password son obligatorios'})
+        elif not isinstance(password, str):
+            # Como en /registro: 123, true u objetos no son contraseñas
+            invalidos.append({'indice': indice, 'error': 'password debe ser texto'})
+        elif mail.lower() in validos:
+            invalidos.append({'indice': indice, 'error': 'mail repetido en la petición'})
+        else:
+            validos[mail.lower()] = (nombre, mail, password)
+
+    # Mails ya registrados: no se hashean ni se insertan
+    existentes = set()
+    lista = list(validos.values())
+    with db_manager.conexion() as conn:
+        cursor = conn.cursor()
+        for i in range(0, len(lista), TAMANO_LOTE_INSERT):
+            mails = [mail for _, mail, _ in lista[i:i + TAMANO_LOTE_INSERT]]
+            marcadores = ', '.join(['%s'] * len(mails))
+            cursor.execute(f"SELECT mail FROM usuarios WHERE mail IN ({marcadores})", mails)
+            existentes.update(fila[0].lower() for fila in cursor.fetchall())
+        cursor.close()
+    nuevos = [u for u in lista if u[1].lower() not in existentes]
+
+    # El hash (lo caro) se reparte entre los procesos del pool, sin conexión tomada
+    hashes = servicio_hash.generar_varios([password for _, _, password in nuevos])
+    filas = [(nombre, mail, h) for (nombre, mail, _), h in zip(nuevos, hashes)]
+
+    with db_manager.conexion() as conn:
+        cursor = conn.cursor()
+        try:
+            for i in range(0, len(filas), TAMANO_LOTE_INSERT):
+                # mysql-connector convierte executemany de un INSERT en un INSERT multi-fila
+                cursor.executemany(
+                    "INSERT INTO usuarios (nombre, mail, password) VALUES (%s, %s, %s)",
+                    filas[i:i + TAMANO_LOTE_INSERT]
+                )
+            conn.commit()
+        except Error:
+            conn.rollback()
+            raise
+        finally:
+            cursor.close()
+
+    return {
+        'creados': len(filas),
+        'existentes': sorted(validos[m][1] for m in existentes),
+        'invalidos': invalidos,
+    }
+
+def importar_usuarios_por_bloques(progreso, usuarios):
+    """Trabajo en segundo plano: importar_usuarios en bloques de MAX_USUARIOS_IMPORT.
+
+    Cada bloque es su propia transacción: si uno falla, los anteriores
+    quedan importados y el trabajo termina en error con el resultado
+    parcial (``procesados`` dice hasta dónde llegó). Un mail repetido en
+    bloques distintos aparece en ``existentes``. Si el servicio de hash
+    está saturado el bloque se reintenta tras una pausa, en lugar de
+    rechazarlo como haría una petición.
+    """
+    resultado = {'total': len(usuarios), 'procesados': 0, 'creados': 0, 'existentes': [], 'invalidos': []}
+    for inicio in range(0, len(usuarios), MAX_USUARIOS_IMPORT):
+        bloque = usuarios[inicio:inicio + MAX_USUARIOS_IMPORT]
+        for intento in range(REINTENTOS_HASH_FONDO):
+            try:
+                parcial = importar_usuarios(bloque)
+                break
+            except HashSaturadoError:
+                if intento == REINTENTOS_HASH_FONDO - 1:
+                    raise
+                time.sleep(2 ** intento)
+        resultado['creados'] += parcial['creados']
+        resultado['existentes'] += parcial['existentes']
+        resultado['invalidos'] += [dict(i, indice=i['indice'] + inicio) for i in parcial['invalidos']]
+        resultado['procesados'] = inicio + len(bloque)
+        progreso(resultado)
+    return resultado
+
+def buscar_usuario_por_mail(mail):
+    with db_manager.conexion() as conn:
+        cursor = conn.cursor(dictionary=True)
+        cursor.execute("SELECT * FROM usuarios WHERE mail = %s", (mail,))
+        user_data = cursor.fetchone()
+        cursor.close()
+    return user_data
+
 def verificar_usuario(mail, password):
+    """Devuelve el User si las credenciales son válidas.
+
+    Puede lanzar HashSaturadoError si hay demasiadas verificaciones en curso.
+    """
     try:
-        conn = db_manager.get_connection()
-        if conn:
-            cursor = conn.cursor(dictionary=True)
-            cursor.execute("SELECT * FROM usuarios WHERE mail = %s", (mail,))
-            user_data = cursor.fetchone()
-            cursor.close()
-            db_manager.close_connection()
-            
-            if user_data and check_password_hash(user_data['password'], password):
-                return User(
-                    id_usuario=user_data['id_usuario'],
-                    nombre=user_data['nombre'],
-                    mail=user_data['mail'],
-                    fecha_registro=user_data['fecha_registro']
-                )
+        user_data = buscar_usuario_por_mail(mail)
+        if user_data and servicio_hash.verificar(user_data['password'], password):
+            user = User(
+                id_usuario=user_data['id_usuario'],
+                nombre=user_data['nombre'],
+                mail=user_data['mail'],
+                fecha_registro=user_data['fecha_registro']
+            )
+            # La siguiente petición autenticada ya encuentra al usuario en caché
+            usuarios_cache.set(user.id, user)
+            return user
     except Error as e:
         print(f"Error verificando usuario: {e}")
     return None
 
 # Funciones para persistencia de datos
-def guardar_txt(datos):
+CABECERA_CSV = ['nombre', 'mail', 'edad', 'pais', 'intereses', 'fecha_registro']
+
+def formatear_txt(datos, fecha):
+    lineas = [f"\n{'='*50}\n", f"Registro: {fecha.strftime('%Y-%m-%d %H:%M:%S')}\n"]
+    lineas.extend(f"{key}: {value}\n" for key, value in datos.items())
+    return ''.join(lineas)
+
+def formatear_json(datos, fecha):
+    return json.dumps({**datos, 'fecha_registro': fecha.isoformat()}, ensure_ascii=False) + '\n'
+
+def formatear_csv(datos, fecha):
+    salida = io.StringIO()
+    csv.writer(salida).writerow([
+        datos['nombre'],
+        datos['mail'],
+        datos.get('edad', ''),
+        datos.get('pais', ''),
+        datos.get('intereses', ''),
+        fecha.isoformat()
+    ])
+    return salida.getvalue()
+
+@metricas.cronometrar('archivo_operacion_duracion_segundos', operacion='guardar_txt')
+def guardar_txt(datos, fecha=None):
     try:
-        with open(TXT_FILE, 'a', encoding='utf-8') as f:
-            f.write(f"\n{'='*50}\n")
-            f.write(f"Registro: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}\n")
-            for key, value in datos.items():
-                f.write(f"{key}: {value}\n")
+        anexar(TXT_FILE, formatear_txt(datos, fecha or datetime.now()))
         return True
     except Exception as e:
         print(f"Error guardando TXT: {e}")
         return False
 
-def leer_txt():
+@metricas.cronometrar('archivo_operacion_duracion_segundos', operacion='leer_txt_pagina')
+def leer_txt_pagina(limite=25, antes_de=None):
+    """Últimos registros del TXT leídos desde el final; devuelve (registros, cursor)"""
     try:
-        if os.path.exists(TXT_FILE):
-            with open(TXT_FILE, 'r', encoding='utf-8') as f:
-                return f.read()
-        return "No hay datos almacenados en TXT."
+        return leer_ultimos_registros(TXT_FILE, limite, antes_de)
     except Exception as e:
         print(f"Error leyendo TXT: {e}")
-        return "Error al leer archivo TXT."
+        return [], None
+
+def leer_txt(limite=25, antes_de=None):
+    if not os.path.exists(TXT_FILE):
+        return "No hay datos almacenados en TXT."
+    registros, _ = leer_txt_pagina(limite, antes_de)
+    separador = f"\n{'='*50}\n"
+    return separador.join(registros) if registros else "No hay datos almacenados en TXT."
+
+@metricas.cronometrar('archivo_operacion_duracion_segundos', operacion='guardar_json')
+def guardar_json(datos, fecha=None):
+    fecha = fecha or datetime.now()
+    if JSON_STORAGE == 'jsonl':
+        try:
+            anexar(JSONL_FILE, formatear_json(datos, fecha))
+            return True
+        except Exception as e:
+            print(f"Error guardando JSON: {e}")
+            return False
 
-def guardar_json(datos):
     try:
-        data = []
-        if os.path.exists(JSON_FILE):
-            try:
-                with open(JSON_FILE, 'r', encoding='utf-8') as f:
-                    data = json.load(f)
-            except:
-                data = []
-        
-        data.append({
-            **datos,
-            'fecha_registro': datetime.now().isoformat()
-        })
-        
-        with open(JSON_FILE, 'w', encoding='utf-8') as f:
-            json.dump(data, f, indent=2, ensure_ascii=False)
+        # Formato antiguo: la reescritura completa exige exclusión entre procesos
+        with bloqueo_archivo(JSON_FILE):
+            data = []
+            if os.path.exists(JSON_FILE):
+                try:
+                    with open(JSON_FILE, 'r', encoding='utf-8') as f:
+                        data = json.load(f)
+                except:
+                    data = []
+            
+            data.append({**datos, 'fecha_registro': fecha.isoformat()})
+            
+            temporal = f"{JSON_FILE}.{os.getpid()}.tmp"
+            with open(temporal, 'w', encoding='utf-8') as f:
+                json.dump(data, f, indent=2, ensure_ascii=False)
+            os.replace(temporal, JSON_FILE)
         return True
     except Exception as e:
         print(f"Error guardando JSON: {e}")
         return False
 
-def leer_json():
+@metricas.cronometrar('archivo_operacion_duracion_segundos', operacion='leer_json')
+def leer_json(limite=None):
+    if JSON_STORAGE == 'jsonl':
+        try:
+            # El archivo está en orden de inserción: basta con recorrerlo al revés
+            return lector_json.leer(limite)
+        except Exception as e:
+            print(f"Error leyendo JSON: {e}")
+            return []
+
     try:
         if os.path.exists(JSON_FILE):
             with open(JSON_FILE, 'r', encoding='utf-8') as f:
                 data = json.load(f)
-                return sorted(data, key=lambda x: x.get('fecha_registro', ''), reverse=True)
+                return sorted(data, key=lambda x: x.get('fecha_registro', ''), reverse=True)[:limite]
         return []
     except Exception as e:
         print(f"Error leyendo JSON: {e}")
         return []
 
-def guardar_csv(datos):
+@metricas.cronometrar('archivo_operacion_duracion_segundos', operacion='guardar_csv')
+def guardar_csv(datos, fecha=None):
     try:
-        file_exists = os.path.exists(CSV_FILE)
-        
-        with open(CSV_FILE, 'a', newline='', encoding='utf-8') as f:
-            writer = csv.writer(f)
-            if not file_exists:
-                writer.writerow(['nombre', 'mail', 'edad', 'pais', 'intereses', 'fecha_registro'])
-            
-            writer.writerow([
-                datos['nombre'],
-                datos['mail'],
-                datos.get('edad', ''),
-                datos.get('pais', ''),
-                datos.get('intereses', ''),
-                datetime.now().isoformat()
-            ])
+        crear_con_cabecera(CSV_FILE, formatear_cabecera_csv())
+        anexar(CSV_FILE, formatear_csv(datos, fecha or datetime.now()))
         return True
     except Exception as e:
         print(f"Error guardando CSV: {e}")
         return False
 
-def leer_csv():
+def formatear_cabecera_csv():
+    salida = io.StringIO()
+    csv.writer(salida).writerow(CABECERA_CSV)
+    return salida.getvalue()
+
+@metricas.cronometrar('archivo_operacion_duracion_segundos', operacion='escribir_lote_datos')
+def escribir_lote_datos(lote, sincronizar):
+    """Escribe un lote de (datos, fecha) en los tres formatos: una escritura por archivo"""
+    txt = ''.join(formatear_txt(datos, fecha) for datos, fecha in lote)
+    filas_csv = ''.join(formatear_csv(datos, fecha) for datos, fecha in lote)
+    if filas_csv:
+        crear_con_cabecera(CSV_FILE, formatear_cabecera_csv())
+
+    if txt or sincronizar:
+        anexar(TXT_FILE, txt, sincronizar)
+    if JSON_STORAGE == 'jsonl':
+        lineas = ''.join(formatear_json(datos, fecha) for datos, fecha in lote)
+        if lineas or sincronizar:
+            anexar(JSONL_FILE, lineas, sincronizar)
+    else:
+        for datos, fecha in lote:
+            guardar_json(datos, fecha)
+    if filas_csv or sincronizar:
+        anexar(CSV_FILE, filas_csv, sincronizar)
+
+# Lotes que la escritura diferida no consiguió escribir tras reintentar
+PENDIENTES_FILE = os.path.join(DATOS_DIR, 'datos.pendientes.jsonl')
+
+def respaldar_lote_datos(lote):
+    """Guarda un lote no escrito como JSON Lines para recuperarlo a mano"""
+    anexar(PENDIENTES_FILE, ''.join(formatear_json(datos, fecha) for datos, fecha in lote), True)
+
+# Escritura diferida de los formularios: el hilo de la petición solo encola
+ESCRITURA_DIFERIDA = os.getenv('WRITE_BEHIND', '1') == '1'
+escritor_datos = EscritorDiferido(
+    escribir_lote_datos,
+    capacidad=int(os.getenv('WRITE_BEHIND_QUEUE', 1000)),
+    max_lote=int(os.getenv('WRITE_BEHIND_BATCH', 500)),
+    politica=os.getenv('WRITE_BEHIND_FSYNC', 'intervalo'),
+    intervalo=float(os.getenv('WRITE_BEHIND_INTERVAL', 1.0)),
+    espera_max=float(os.getenv('WRITE_BEHIND_TIMEOUT', 2.0)),
+    reintentos=int(os.getenv('WRITE_BEHIND_RETRIES', 3)),
+    espera_reintento=float(os.getenv('WRITE_BEHIND_RETRY_WAIT', 0.1)),
+    respaldo=respaldar_lote_datos
+)
+atexit.register(escritor_datos.cerrar)
+
+@metricas.cronometrar('archivo_operacion_duracion_segundos', operacion='leer_csv')
+def leer_csv(limite=None):
     try:
-        datos = []
-        if os.path.exists(CSV_FILE):
-            with open(CSV_FILE, 'r', encoding='utf-8') as f:
-                reader = csv.DictReader(f)
-                for row in reader:
-                    datos.append(row)
-            return sorted(datos, key=lambda x: x.get('fecha_registro', ''), reverse=True)
-        return []
+        # Las filas se anexan en orden cronológico: se devuelven invertidas
+        return lector_csv.leer(limite)
     except Exception as e:
         print(f"Error leyendo CSV: {e}")
         return []
 
+# ==========================
+# PAGINACIÓN POR CURSOR (KEYSET)
+# ==========================
+
+def leer_tamano_pagina(valor):
+    """Normaliza el tamaño de página pedido al rango permitido"""
+    try:
+        tamano = int(valor)
+    except (TypeError, ValueError):
+        return TAMANO_PAGINA_DEFECTO
+    return max(1, min(tamano, TAMANOS_PAGINA[-1]))
+
+# Un cursor legítimo lleva un nombre de hasta 255 caracteres y un id: con el
+# escapado de JSON y el base64 no llega a 2 KB
+MAX_LONGITUD_CURSOR = 4096
+
+def codificar_cursor(*valores):
+    """Convierte la clave de la última fila en un token opaco para la URL"""
+    datos = json.dumps([str(v) for v in valores]).encode('utf-8')
+    return base64.urlsafe_b64encode(datos).decode('ascii')
+
+def decodificar_cursor(cursor):
+    """Inverso de codificar_cursor; devuelve None si el token no es válido.
+
+    Solo se acepta una lista [clave, id] con la clave como texto y el id
+    como entero o texto: cualquier otro JSON bien formado (un número, un
+    objeto, listas anidadas) se trata como un token inválido. Los tokens
+    de más de MAX_LONGITUD_CURSOR caracteres se descartan sin decodificar.
+    """
+    if not cursor or len(cursor) > MAX_LONGITUD_CURSOR:
+        return None
+    try:
+        clave = json.loads(base64.urlsafe_b64decode(cursor.encode('ascii')))
+    except (ValueError, TypeError, RecursionError):
+        return None
+    if (not isinstance(clave, list) or len(clave) != 2 or not isinstance(clave[0], str)
+            or isinstance(clave[1], bool) or not isinstance(clave[1], (int, str))):
+        return None
+    return clave
+
+# Condiciones de "después del cursor" escritas en forma expandida en lugar
+# de comparar tuplas: MySQL no siempre convierte (a, b) < (x, y) en un
+# rango sobre el índice compuesto y puede acabar recorriéndolo entero
+DESPUES_DE_CURSOR_USUARIOS = "(fecha_registro < %s OR (fecha_registro = %s AND id_usuario < %s))"
+DESPUES_DE_CURSOR_PRODUCTOS = "(p.nombre > %s OR (p.nombre = %s AND p.id_producto > %s))"
+
+def paginar_usuarios(cursor=None, limite=TAMANO_PAGINA_DEFECTO):
+    """Página de usuarios por fecha_registro DESC; devuelve (filas, siguiente_cursor)"""
+    consulta = "SELECT id_usuario, nombre, mail, fecha_registro FROM usuarios"
+    params = []
+    clave = decodificar_cursor(cursor)
+    if clave:
+        try:
+            fecha = datetime.fromisoformat(clave[0])
+            params = [fecha, fecha, int(clave[1])]
+        except (ValueError, IndexError, TypeError, KeyError):
+            params = []
+        if params:
+            consulta += " WHERE " + DESPUES_DE_CURSOR_USUARIOS
+    consulta += " ORDER BY fecha_registro DESC, id_usuario DESC LIMIT %s"
+    params.append(limite + 1)
+
+    with db_manager.conexion() as conn:
+        cursor_db = conn.cursor(dictionary=True)
+        cursor_db.execute(consulta, params)
+        filas = cursor_db.fetchall()
+        cursor_db.close()
+
+    siguiente = None
+    if len(filas) > limite:
+        filas = filas[:limite]
+        ultima = filas[-1]
+        siguiente = codificar_cursor(ultima['fecha_registro'], ultima['id_usuario'])
+    return filas, siguiente
+
+def paginar_productos(cursor=None, limite=TAMANO_PAGINA_DEFECTO):
+    """Página de productos por nombre; devuelve (filas, siguiente_cursor)"""
+    clave_cache = (cursor, limite)
+    pagina = catalogo_cache.get(clave_cache)
+    if pagina is not None:
+        return pagina
+    version = catalogo_cache.version()
+
+    consulta = """
+        SELECT p.*, u.nombre as nombre_creador 
+        FROM producto p 
+        LEFT JOIN usuarios u ON p.id_usuario_creador = u.id_usuario
+    """
+    params = []
+    clave = decodificar_cursor(cursor)
+    if clave:
+        try:
+            params = [clave[0], clave[0], int(clave[1])]
+        except (ValueError, IndexError, TypeError, KeyError):
+            params = []
+        if params:
+            consulta += " WHERE " + DESPUES_DE_CURSOR_PRODUCTOS
+    consulta += " ORDER BY p.nombre, p.id_producto LIMIT %s"
+    params.append(limite + 1)
+
+    with db_manager.conexion() as conn:
+        cursor_db = conn.cursor(dictionary=True)
+        cursor_db.execute(consulta, params)
+        filas = cursor_db.fetchall()
+        cursor_db.close()
+
+    siguiente = None
+    if len(filas) > limite:
+        filas = filas[:limite]
+        ultima = filas[-1]
+        siguiente = codificar_cursor(ultima['nombre'], ultima['id_producto'])
+    catalogo_cache.set(clave_cache, (filas, siguiente), version)
+    return filas, siguiente
+
+# ==========================
+# IMPORTACIÓN Y EXPORTACIÓN MASIVA DEL CATÁLOGO
+# ==========================
+
+FORMATOS_CATALOGO = {
+    'csv': 'text/csv',
+    'jsonl': 'application/x-ndjson',
+}
+CAMPOS_EXPORTACION = ['id_producto', 'nombre', 'costo', 'descripcion', 'stock',
+                      'id_usuario_creador', 'fecha_creacion']
+COSTO_MAXIMO = Decimal('99999999.99')  # DECIMAL(10, 2)
+STOCK_MAXIMO = 2**31 - 1  # INT
+MAX_ERRORES_IMPORT = 100
+TAMANO_LOTE_EXPORT = 1000
+
+def detectar_formato_catalogo(formato, mimetype):
+    """Formato pedido en la query o deducido del Content-Type de la subida"""
+    if formato in FORMATOS_CATALOGO:
+        return formato
+    if mimetype in ('application/x-ndjson', 'application/jsonl', 'application/json-lines'):
+        return 'jsonl'
+    if mimetype in ('text/csv', 'application/csv'):
+        return 'csv'
+    return None
+
+class ArchivoCatalogoError(Exception):
+    """La subida no se puede seguir leyendo (codificación o CSV roto)"""
+
+    def __init__(self, mensaje, linea):
+        super().__init__(mensaje)
+        self.linea = linea
+
+def leer_filas_catalogo(flujo, formato):
+    """Genera (linea, fila) desde un flujo binario sin cargarlo entero.
+
+    Lanza ArchivoCatalogoError si el archivo deja de ser legible a mitad
+    (no es UTF-8 o el CSV está roto); las filas anteriores ya se generaron.
+    """
+    texto = io.TextIOWrapper(flujo, encoding='utf-8-sig', newline='')
+    linea = 0
+    try:
+        if formato == 'csv':
+            lector = csv.DictReader(texto)
+            try:
+                for fila in lector:
+                    linea = lector.line_num
+                    yield linea, fila
+            except csv.Error as e:
+                # line_num aún no cuenta la fila rota: empieza tras la última leída
+                raise ArchivoCatalogoError(f"CSV mal formado en la línea {linea + 1}: {e}", linea + 1)
+            return
+        for linea, contenido in enumerate(texto, 1):
+            if not contenido.strip():
+                continue
+            try:
+                yield linea, json.loads(contenido)
+            except (ValueError, RecursionError):
+                # RecursionError: JSON anidado sin límite ('[[[[...')
+                yield linea, None
+    except UnicodeDecodeError:
+        raise ArchivoCatalogoError(f"El archivo no está en UTF-8 (tras la línea {linea})", linea + 1)
+
+def validar_producto(fila):
+    """Devuelve la tupla (nombre, costo, descripcion, stock) o lanza ValueError"""
+    if not isinstance(fila, dict):
+        raise ValueError('Fila mal formada')
+    nombre = str(fila.get('nombre') or '').strip()
+    if not nombre or len(nombre) > 255:
+        raise ValueError('nombre es obligatorio (máximo 255 caracteres)')
+    try:
+        costo = Decimal(str(fila.get('costo')).strip()).quantize(Decimal('0.01'))
+    except (InvalidOperation, ValueError):
+        raise ValueError('costo no es un número')
+    if not costo.is_finite() or costo < 0 or costo > COSTO_MAXIMO:
+        raise ValueError('costo fuera de rango')
+    stock = fila.get('stock')
+    try:
+        stock = int(str(stock).strip()) if stock not in (None, '') else 0
+    except ValueError:
+        raise ValueError('stock no es un entero')
+    if stock < 0:
+        raise ValueError('stock no puede ser negativo')
+    if stock > STOCK_MAXIMO:
+        raise ValueError('stock fuera de rango')
+    descripcion = fila.get('descripcion')
+    descripcion = str(descripcion) if descripcion not in (None, '') else None
+    return nombre, costo, descripcion, stock
+
+def insertar_lote_productos(lote):
+    """Inserta un lote en su propia transacción; la conexión solo se toma aquí"""
+    with db_manager.conexion() as conn:
+        cursor = conn.cursor()
+        try:
+            cursor.executemany('''
+                INSERT INTO producto (nombre, costo, descripcion, stock, id_usuario_creador)
+                VALUES (%s, %s, %s, %s, %s)
+            ''', lote)
+            conn.commit()
+        except Error:
+            conn.rollback()
+            raise
+        finally:
+            cursor.close()
+
+def importar_productos(filas, id_usuario):
+    """Valida e inserta productos por lotes a medida que llegan del flujo.
+
+    Cada lote de TAMANO_LOTE_INSERT filas es una transacción: la memoria
+    queda acotada al lote y, si falla uno, los anteriores ya están
+    confirmados (el resultado indica cuántos en 'insertados' y el fallo
+    en 'error'). Si el archivo deja de ser legible se hace lo mismo y
+    'linea' indica dónde. La conexión del pool no se retiene mientras se
+    lee la subida.
+    """
+    resultado = {'insertados': 0, 'invalidos': 0, 'errores': [], 'lotes': 0}
+    lote = []
+
+    def volcar():
+        insertar_lote_productos(lote)
+        resultado['insertados'] += len(lote)
+        resultado['lotes'] += 1
+        lote.clear()
+
+    try:
+        for linea, fila in filas:
+            try:
+                lote.append(validar_producto(fila) + (id_usuario,))
+            except ValueError as e:
+                resultado['invalidos'] += 1
+                if len(resultado['errores']) < MAX_ERRORES_IMPORT:
+                    resultado['errores'].append({'linea': linea, 'error': str(e)})
+                continue
+            if len(lote) >= TAMANO_LOTE_INSERT:
+                volcar()
+        if lote:
+            volcar()
+    except Error as e:
+        print(f"Error importando productos: {e}")
+        resultado['error'] = f"Error al guardar el lote {resultado['lotes'] + 1}; los anteriores ya se guardaron"
+    except ArchivoCatalogoError as e:
+        # El lote en curso no se guarda: como un lote fallido
+        resultado['error'] = str(e)
+        resultado['linea'] = e.linea
+    finally:
+        if resultado['insertados']:
+            invalidar_catalogo()
+    return resultado
+
+def formatear_producto_exportado(fila, formato):
+    if formato == 'csv':
+        buffer = io.StringIO()
+        csv.writer(buffer).writerow(
+            '' if fila[campo] is None else fila[campo] for campo in CAMPOS_EXPORTACION
+        )
+        return buffer.getvalue()
+    datos = dict(fila,
+                 costo=float(fila['costo']),
+                 fecha_creacion=fila['fecha_creacion'].isoformat() if fila['fecha_creacion'] else None)
+    return json.dumps(datos, ensure_ascii=False) + '\n'
+
+def leer_pagina_exportacion(ultimo):
+    """Hasta TAMANO_LOTE_EXPORT productos con id mayor que `ultimo`"""
+    with db_manager.conexion() as conn:
+        cursor = conn.cursor(dictionary=True)
+        cursor.execute(
+            f"SELECT {', '.join(CAMPOS_EXPORTACION)} FROM producto "
+            "WHERE id_producto > %s ORDER BY id_producto LIMIT %s",
+            (ultimo, TAMANO_LOTE_EXPORT)
+        )
+        filas = cursor.fetchall()
+        cursor.close()
+    return filas
+
+def exportar_productos(formato):
+    """Generador con el catálogo completo en CSV o JSON Lines.
+
+    Recorre la tabla por páginas de TAMANO_LOTE_EXPORT (id_producto > último
+    id enviado) y devuelve la conexión al pool después de cada página, así
+    que una descarga lenta no retiene conexiones mientras el cliente lee.
+    La primera página se lee aquí mismo, antes de devolver el generador:
+    si el pool está agotado o la base falla, la ruta todavía puede
+    responder con un error en lugar de cortar una descarga ya empezada.
+    No es una foto única: lo que cambie durante la descarga puede salir o
+    no según la página en la que caiga.
+    """
+    filas = leer_pagina_exportacion(0)
+
+    def generar(filas):
+        if formato == 'csv':
+            yield ','.join(CAMPOS_EXPORTACION) + '\r\n'
+        while filas:
+            yield ''.join(formatear_producto_exportado(fila, formato) for fila in filas)
+            if len(filas) < TAMANO_LOTE_EXPORT:
+                break
+            filas = leer_pagina_exportacion(filas[-1]['id_producto'])
+
+    return generar(filas)
+
 # ==========================
 # RUTAS DE AUTENTICACIÓN
 # ==========================
@@ -278,7 +863,11 @@ def login():
         mail = request.form.get('mail')
         password = request.form.get('password')
         
-        user = verificar_usuario(mail, password)
+        try:
+            user = verificar_usuario(mail, password)
+        except HashSaturadoError:
+            flash('Hay demasiados inicios de sesión en curso. Intenta de nuevo en unos segundos.', 'error')
+            return render_template('auth/login.html'), 503
         if user:
             login_user(user)
             next_page = request.args.get('next')
@@ -303,26 +892,25 @@ def registro():
             flash('Las contraseñas no coinciden.', 'error')
             return render_template('auth/registro.html')
         
-        try:
-            conn = db_manager.get_connection()
-            if conn:
-                cursor = conn.cursor()
-                cursor.execute("SELECT id_usuario FROM usuarios WHERE mail = %s", (mail,))
-                if cursor.fetchone():
-                    flash('El correo electrónico ya está registrado.', 'error')
-                    return render_template('auth/registro.html')
-                cursor.close()
-                db_manager.close_connection()
-        except Error as e:
-            print(f"Error verificando usuario existente: {e}")
-        
         datos = {
             'nombre': nombre,
             'mail': mail,
             'password': password
         }
         
-        if guardar_mysql_db(datos):
+        try:
+            guardado = guardar_mysql_db(datos)
+        except mysql.connector.IntegrityError as e:
+            if e.errno == ER_DUP_ENTRY:
+                flash('El correo electrónico ya está registrado.', 'error')
+            else:
+                print(f"Error guardando en MySQL: {e}")
+                flash('Error en el registro. Por favor, intenta de nuevo.', 'error')
+            return render_template('auth/registro.html')
+        except HashSaturadoError:
+            flash('El servidor está ocupado. Intenta registrarte de nuevo en unos segundos.', 'error')
+            return render_template('auth/registro.html'), 503
+        if guardado:
             flash('Registro exitoso. Ahora puedes iniciar sesión.', 'success')
             return redirect(url_for('login'))
         else:
@@ -345,32 +933,28 @@ def logout():
 @app.route('/dashboard')
 @login_required
 def dashboard():
-    datos_dashboard = {}
+    por_pagina = leer_tamano_pagina(request.args.get('por_pagina'))
+    datos_dashboard = {
+        'por_pagina': por_pagina,
+        'tamanos_pagina': TAMANOS_PAGINA,
+        'usuarios_cursor': request.args.get('usuarios_cursor'),
+        'productos_cursor': request.args.get('productos_cursor'),
+    }
     try:
-        conn = db_manager.get_connection()
-        if conn:
-            cursor = conn.cursor(dictionary=True)
-            
-            # Datos de Usuarios (MySQL)
-            cursor.execute("SELECT id_usuario, nombre, mail, fecha_registro FROM usuarios ORDER BY fecha_registro DESC")
-            datos_dashboard['usuarios'] = cursor.fetchall()
-            
-            # Datos de Productos con información del creador
-            cursor.execute("""
-                SELECT p.*, u.nombre as nombre_creador 
-                FROM producto p 
-                LEFT JOIN usuarios u ON p.id_usuario_creador = u.id_usuario 
-                ORDER BY p.nombre
-            """)
-            datos_dashboard['productos'] = cursor.fetchall()
-            
-            cursor.close()
-            db_manager.close_connection()
+        # Datos de Usuarios (MySQL), una página cada vez
+        datos_dashboard['usuarios'], datos_dashboard['usuarios_siguiente'] = paginar_usuarios(
+            datos_dashboard['usuarios_cursor'], por_pagina
+        )
+        
+        # Datos de Productos con información del creador
+        datos_dashboard['productos'], datos_dashboard['productos_siguiente'] = paginar_productos(
+            datos_dashboard['productos_cursor'], por_pagina
+        )
             
         # Leer datos de los archivos locales
-        datos_dashboard['datos_txt'] = leer_txt()
-        datos_dashboard['datos_json'] = leer_json()
-        datos_dashboard['datos_csv'] = leer_csv()
+        datos_dashboard['datos_txt'] = leer_txt(por_pagina)
+        datos_dashboard['datos_json'] = leer_json(por_pagina)
+        datos_dashboard['datos_csv'] = leer_csv(por_pagina)
             
         return render_template('auth/dashboard.html', **datos_dashboard)
     
@@ -380,6 +964,8 @@ def dashboard():
         return render_template('auth/dashboard.html', 
                              usuarios=[], 
                              productos=[], 
+                             por_pagina=por_pagina,
+                             tamanos_pagina=TAMANOS_PAGINA,
                              datos_txt="Error al cargar.", 
                              datos_json=[], 
                              datos_csv=[])
@@ -419,9 +1005,17 @@ def procesar_formulario():
             'intereses': intereses
         }
         
-        guardar_txt(datos)
-        guardar_json(datos)
-        guardar_csv(datos)
+        fecha = datetime.now()
+        if ESCRITURA_DIFERIDA:
+            try:
+                escritor_datos.encolar((datos, fecha))
+            except ColaLlenaError:
+                flash('El servidor está ocupado. Por favor, intenta de nuevo en unos segundos.', 'error')
+                return redirect(url_for('dashboard'))
+        else:
+            guardar_txt(datos, fecha)
+            guardar_json(datos, fecha)
+            guardar_csv(datos, fecha)
         
         flash('Datos procesados correctamente', 'success')
         return redirect(url_for('dashboard'))
@@ -445,8 +1039,7 @@ def nuevo_producto():
             descripcion = request.form.get('descripcion')
             stock = request.form.get('stock')
             
-            conn = db_manager.get_connection()
-            if conn:
+            with db_manager.conexion() as conn:
                 cursor = conn.cursor()
                 cursor.execute('''
                     INSERT INTO producto (nombre, costo, descripcion, stock, id_usuario_creador)
@@ -454,10 +1047,10 @@ def nuevo_producto():
                 ''', (nombre, costo, descripcion, stock, current_user.id))
                 conn.commit()
                 cursor.close()
-                db_manager.close_connection()
+            invalidar_catalogo()
                 
-                flash('Producto agregado correctamente', 'success')
-                return redirect(url_for('dashboard'))
+            flash('Producto agregado correctamente', 'success')
+            return redirect(url_for('dashboard'))
         except Error as e:
             print(f"Error agregando producto: {e}")
             flash('Error al agregar el producto', 'error')
@@ -468,8 +1061,7 @@ def nuevo_producto():
 @login_required
 def editar_producto(id):
     try:
-        conn = db_manager.get_connection()
-        if conn:
+        with db_manager.conexion() as conn:
             cursor = conn.cursor(dictionary=True)
             
             if request.method == 'POST':
@@ -484,6 +1076,8 @@ def editar_producto(id):
                     WHERE id_producto = %s
                 ''', (nombre, costo, descripcion, stock, id))
                 conn.commit()
+                cursor.close()
+                invalidar_catalogo()
                 
                 flash('Producto actualizado correctamente', 'success')
                 return redirect(url_for('dashboard'))
@@ -491,7 +1085,6 @@ def editar_producto(id):
                 cursor.execute("SELECT * FROM producto WHERE id_producto = %s", (id,))
                 producto = cursor.fetchone()
                 cursor.close()
-                db_manager.close_connection()
                 
                 if producto:
                     return render_template('productos/form.html', titulo="Editar Producto", producto=producto)
@@ -507,15 +1100,14 @@ def editar_producto(id):
 @login_required
 def eliminar_producto(id):
     try:
-        conn = db_manager.get_connection()
-        if conn:
+        with db_manager.conexion() as conn:
             cursor = conn.cursor()
             cursor.execute("DELETE FROM producto WHERE id_producto = %s", (id,))
             conn.commit()
             cursor.close()
-            db_manager.close_connection()
+        invalidar_catalogo()
             
-            flash('Producto eliminado correctamente', 'success')
+        flash('Producto eliminado correctamente', 'success')
     except Error as e:
         print(f"Error eliminando producto: {e}")
         flash('Error al eliminar el producto', 'error')
@@ -526,15 +1118,14 @@ def eliminar_producto(id):
 @login_required
 def eliminar_producto_dashboard(id):
     try:
-        conn = db_manager.get_connection()
-        if conn:
+        with db_manager.conexion() as conn:
             cursor = conn.cursor()
             cursor.execute("DELETE FROM producto WHERE id_producto = %s", (id,))
             conn.commit()
             cursor.close()
-            db_manager.close_connection()
+        invalidar_catalogo()
             
-            flash('Producto eliminado correctamente', 'success')
+        flash('Producto eliminado correctamente', 'success')
     except Error as e:
         print(f"Error eliminando producto: {e}")
         flash('Error al eliminar el producto', 'error')
@@ -545,63 +1136,266 @@ def eliminar_producto_dashboard(id):
 # RUTAS PARA RELACIONES USUARIO-PRODUCTO
 # ==========================
 
+MAX_PRODUCTOS_ASOCIAR = int(os.getenv('ASOCIAR_MAX_PRODUCTOS', 1000))
+
+def asociar_uno_a_uno(cursor, id_usuario, ids):
+    """Inserta los pares de uno en uno; devuelve {id: 0 si lo asoció esta
+    petición, 1 si ya estaba asociado, None si el producto ya no existe}.
+
+    Va en una transacción nueva, así que la comprobación final lee los
+    datos confirmados después de los INSERT y no la foto del SELECT inicial.
+    """
+    estado = {}
+    for id in ids:
+        cursor.execute("""
+            INSERT IGNORE INTO usuario_producto (id_usuario, id_producto)
+            SELECT %s, id_producto FROM producto WHERE id_producto = %s
+        """, (id_usuario, id))
+        estado[id] = 0 if cursor.rowcount == 1 else None
+    sin_insertar = [id for id, valor in estado.items() if valor is None]
+    if sin_insertar:
+        cursor.execute(f"""
+            SELECT id_producto FROM producto
+            WHERE id_producto IN ({', '.join(['%s'] * len(sin_insertar))})
+        """, sin_insertar)
+        for (id,) in cursor.fetchall():
+            estado[id] = 1
+    return estado
+
+def asociar_productos(id_usuario, ids):
+    """Asocia varios productos al usuario con una consulta y un único INSERT.
+
+    Devuelve {'nuevos', 'ya_asociados', 'inexistentes'} con los ids de
+    cada caso. INSERT IGNORE ... SELECT solo inserta productos que existen
+    y descarta los pares repetidos sin lanzar IntegrityError. Si inserta
+    menos filas de las previstas (otra petición asoció o borró alguno entre
+    el SELECT y el INSERT), se deshace y se repite producto a producto
+    para que la respuesta diga qué asoció realmente esta petición.
+    """
+    ids = list(dict.fromkeys(ids))
+    resultado = {'nuevos': [], 'ya_asociados': [], 'inexistentes': []}
+    if not ids:
+        return resultado
+    marcadores = ', '.join(['%s'] * len(ids))
+    with db_manager.conexion() as conn:
+        cursor = conn.cursor()
+        try:
+            cursor.execute(f"""
+                SELECT p.id_producto, up.id_producto IS NOT NULL
+                FROM producto p
+                LEFT JOIN usuario_producto up
+                       ON up.id_producto = p.id_producto AND up.id_usuario = %s
+                WHERE p.id_producto IN ({marcadores})
+            """, [id_usuario, *ids])
+            asociado = dict(cursor.fetchall())
+            nuevos = [id for id in ids if asociado.get(id) == 0]
+            if nuevos:
+                cursor.execute(f"""
+                    INSERT IGNORE INTO usuario_producto (id_usuario, id_producto)
+                    SELECT %s, id_producto FROM producto
+                    WHERE id_producto IN ({', '.join(['%s'] * len(nuevos))})
+                """, [id_usuario, *nuevos])
+                if cursor.rowcount != len(nuevos):
+                    conn.rollback()
+                    asociado.update(asociar_uno_a_uno(cursor, id_usuario, nuevos))
+            conn.commit()
+        except Error:
+            conn.rollback()
+            raise
+        finally:
+            cursor.close()
+    for id in ids:
+        estado = asociado.get(id)
+        clave = 'inexistentes' if estado is None else 'ya_asociados' if estado else 'nuevos'
+        resultado[clave].append(id)
+    return resultado
+
 @app.route('/asociar_producto/<int:id_producto>', methods=['POST'])
 @login_required
 def asociar_producto(id_producto):
     try:
-        conn = db_manager.get_connection()
-        if conn:
-            cursor = conn.cursor()
-            # Verificar si el producto existe
-            cursor.execute("SELECT id_producto FROM producto WHERE id_producto = %s", (id_producto,))
-            if not cursor.fetchone():
-                flash('El producto no existe.', 'error')
-                return redirect(url_for('dashboard'))
-            
-            # Insertar la relación
-            cursor.execute('''
-                INSERT INTO usuario_producto (id_usuario, id_producto)
-                VALUES (%s, %s)
-            ''', (current_user.id, id_producto))
-            conn.commit()
-            cursor.close()
-            db_manager.close_connection()
-            
-            flash('Producto asociado a tu cuenta correctamente.', 'success')
-    except mysql.connector.IntegrityError:
-        flash('Este producto ya está asociado a tu cuenta.', 'info')
+        resultado = asociar_productos(current_user.id, [id_producto])
     except Error as e:
         print(f"Error asociando producto: {e}")
         flash('Error al asociar el producto.', 'error')
-    
+        return redirect(url_for('dashboard'))
+
+    if resultado['inexistentes']:
+        flash('El producto no existe.', 'error')
+    elif resultado['ya_asociados']:
+        flash('Este producto ya está asociado a tu cuenta.', 'info')
+    else:
+        flash('Producto asociado a tu cuenta correctamente.', 'success')
     return redirect(url_for('dashboard'))
 
+@app.route('/api/mis_productos', methods=['POST'])
+@login_required
+def api_asociar_productos():
+    payload = request.get_json(silent=True)
+    ids = payload.get('ids') if isinstance(payload, dict) else payload
+    if not isinstance(ids, list):
+        return jsonify({'error': 'Se esperaba una lista de ids de producto'}), 400
+    if len(ids) > MAX_PRODUCTOS_ASOCIAR:
+        return jsonify({'error': f'Máximo {MAX_PRODUCTOS_ASOCIAR} productos por petición'}), 413
+    if not all(isinstance(id, int) and not isinstance(id, bool) and id > 0 for id in ids):
+        return jsonify({'error': 'Los ids de producto deben ser enteros positivos'}), 400
+    try:
+        resultado = asociar_productos(current_user.id, ids)
+    except Error as e:
+        print(f"Error asociando productos: {e}")
+        return jsonify({'error': 'Error al asociar los productos; no se asoció ninguno'}), 500
+    return jsonify(resultado), 201 if resultado['nuevos'] else 200
+
+CONSULTA_MIS_PRODUCTOS = """
+    SELECT p.*, up.fecha_asociacion 
+    FROM producto p
+    INNER JOIN usuario_producto up ON p.id_producto = up.id_producto
+    WHERE up.id_usuario = %s
+    ORDER BY up.fecha_asociacion DESC
+"""
+
 @app.route('/mis_productos')
 @login_required
 def mis_productos():
     try:
-        conn = db_manager.get_connection()
-        if conn:
+        with db_manager.conexion() as conn:
             cursor = conn.cursor(dictionary=True)
-            cursor.execute("""
-                SELECT p.*, up.fecha_asociacion 
-                FROM producto p
-                INNER JOIN usuario_producto up ON p.id_producto = up.id_producto
-                WHERE up.id_usuario = %s
-                ORDER BY up.fecha_asociacion DESC
-            """, (current_user.id,))
+            cursor.execute(CONSULTA_MIS_PRODUCTOS, (current_user.id,))
             productos_asociados = cursor.fetchall()
             cursor.close()
-            db_manager.close_connection()
             
-            return render_template('auth/mis_productos.html', 
-                                 productos=productos_asociados,
-                                 usuario=current_user)
+        return render_template('auth/mis_productos.html', 
+                             productos=productos_asociados,
+                             usuario=current_user)
     except Error as e:
         print(f"Error obteniendo productos del usuario: {e}")
         flash('Error al cargar tus productos.', 'error')
         return redirect(url_for('dashboard'))
 
+# ==========================
+# API JSON DE LISTADOS
+# ==========================
+
+@app.route('/api/usuarios')
+@login_required
+def api_usuarios():
+    limite = leer_tamano_pagina(request.args.get('limite'))
+    try:
+        filas, siguiente = paginar_usuarios(request.args.get('cursor'), limite)
+    except Error as e:
+        print(f"Error listando usuarios: {e}")
+        return jsonify({'error': 'Error al consultar usuarios'}), 500
+    for fila in filas:
+        fila['fecha_registro'] = fila['fecha_registro'].isoformat() if fila['fecha_registro'] else None
+    return jsonify({'datos': filas, 'siguiente': siguiente, 'limite': limite})
+
+@app.route('/api/usuarios/import', methods=['POST'])
+@login_required
+def api_importar_usuarios():
+    payload = request.get_json(silent=True)
+    usuarios = payload.get('usuarios') if isinstance(payload, dict) else payload
+    if not isinstance(usuarios, list):
+        return jsonify({'error': 'Se esperaba una lista de usuarios'}), 400
+    if len(usuarios) > MAX_USUARIOS_IMPORT_FONDO:
+        return jsonify({'error': f'Máximo {MAX_USUARIOS_IMPORT_FONDO} usuarios por petición'}), 413
+    if len(usuarios) > MAX_USUARIOS_IMPORT:
+        # Demasiados hashes para el timeout de una petición: 202 y URL de estado
+        try:
+            id_trabajo = trabajos.lanzar(importar_usuarios_por_bloques, usuarios)
+        except TrabajosLlenosError:
+            return jsonify({'error': 'Hay demasiadas importaciones en curso, reintenta más tarde'}), 503
+        except OSError as e:
+            print(f"Error lanzando la importación de usuarios: {e}")
+            return jsonify({'error': 'No se pudo lanzar la importación'}), 500
+        url = url_for('api_estado_importacion_usuarios', id_trabajo=id_trabajo)
+        return jsonify({'trabajo': id_trabajo, 'estado': 'pendiente', 'url': url}), 202, {'Location': url}
+    try:
+        resultado = importar_usuarios(usuarios)
+    except HashSaturadoError:
+        return jsonify({'error': 'El servidor está ocupado, reintenta más tarde'}), 503
+    except mysql.connector.IntegrityError as e:
+        # Otro proceso dio de alta alguno de los mails entre la comprobación y el INSERT
+        print(f"Error importando usuarios: {e}")
+        return jsonify({'error': 'Conflicto con usuarios dados de alta a la vez; no se importó nada'}), 409
+    except Error as e:
+        print(f"Error importando usuarios: {e}")
+        return jsonify({'error': 'Error al importar usuarios; no se importó nada'}), 500
+    return jsonify(resultado), 201
+
+@app.route('/api/usuarios/import/<id_trabajo>')
+@login_required
+def api_estado_importacion_usuarios(id_trabajo):
+    estado = trabajos.estado(id_trabajo)
+    if estado is None:
+        return jsonify({'error': 'Importación no encontrada'}), 404
+    return jsonify(estado)
+
+@app.route('/api/productos')
+@login_required
+def api_productos():
+    limite = leer_tamano_pagina(request.args.get('limite'))
+    try:
+        filas, siguiente = paginar_productos(request.args.get('cursor'), limite)
+    except Error as e:
+        print(f"Error listando productos: {e}")
+        return jsonify({'error': 'Error al consultar productos'}), 500
+    # Las filas pueden venir de la caché compartida: no se modifican en sitio
+    datos = [
+        dict(fila,
+             costo=float(fila['costo']),
+             fecha_creacion=fila['fecha_creacion'].isoformat() if fila['fecha_creacion'] else None)
+        for fila in filas
+    ]
+    return jsonify({'datos': datos, 'siguiente': siguiente, 'limite': limite})
+
+@app.route('/api/productos/import', methods=['POST'])
+@login_required
+def api_importar_productos():
+    # Subida como archivo de formulario (werkzeug lo vuelca a disco) o como cuerpo crudo
+    archivo = request.files.get('archivo')
+    if archivo:
+        flujo, mimetype = archivo.stream, archivo.mimetype
+        if not request.args.get('formato') and archivo.filename:
+            mimetype = {'.csv': 'text/csv', '.jsonl': 'application/jsonl'}.get(
+                os.path.splitext(archivo.filename)[1].lower(), mimetype)
+    else:
+        flujo, mimetype = io.BufferedReader(request.stream), request.mimetype
+    formato = detectar_formato_catalogo(request.args.get('formato'), mimetype)
+    if formato is None:
+        return jsonify({'error': 'Formato no soportado: usa CSV o JSON Lines'}), 415
+    resultado = importar_productos(leer_filas_catalogo(flujo, formato), current_user.id)
+    if 'error' not in resultado:
+        return jsonify(resultado), 201
+    # Con 'linea' el fallo está en el archivo subido; sin ella, en la base de datos
+    return jsonify(resultado), 400 if 'linea' in resultado else 500
+
+@app.route('/api/productos/export')
+@login_required
+def api_exportar_productos():
+    formato = request.args.get('formato', 'csv')
+    if formato not in FORMATOS_CATALOGO:
+        return jsonify({'error': 'Formato no soportado: usa csv o jsonl'}), 400
+    try:
+        cuerpo = exportar_productos(formato)
+    except PoolAgotadoError:
+        return jsonify({'error': 'El servidor está ocupado, reintenta más tarde'}), 503
+    except Error as e:
+        print(f"Error exportando productos: {e}")
+        return jsonify({'error': 'Error al exportar productos'}), 500
+    return Response(
+        stream_with_context(cuerpo),
+        mimetype=FORMATOS_CATALOGO[formato],
+        headers={'Content-Disposition': f'attachment; filename=productos.{formato}'}
+    )
+
+@app.route('/api/datos/txt')
+@login_required
+def api_datos_txt():
+    limite = leer_tamano_pagina(request.args.get('limite'))
+    antes_de = request.args.get('cursor', type=int)
+    registros, siguiente = leer_txt_pagina(limite, antes_de)
+    return jsonify({'datos': registros, 'siguiente': siguiente, 'limite': limite})
+
 # ==========================
 # RUTAS ADICIONALES
 # ==========================
@@ -615,28 +1409,193 @@ def perfil():
 def about():
     return render_template('about.html')
 
+# Conexión propia de la sonda en cada proceso (pid -> conexión), fuera del
+# pool: un pool agotado por peticiones lentas no la hace esperar ni la
+# confunde con MySQL caído, y la sonda no quita conexiones a las peticiones
+_conexiones_sonda = {}
+
+def probar_conexion_mysql():
+    """Hace ping a MySQL (lanza Error si no responde).
+
+    Devuelve un aviso si MySQL responde pero el pool está agotado con
+    peticiones esperando conexión: la sonda lo marca como 'degradado'.
+    """
+    conn = _conexiones_sonda.get(os.getpid())
+    try:
+        if conn is None:
+            conn = _conexiones_sonda[os.getpid()] = db_manager.conexion_dedicada()
+        conn.ping(reconnect=False)
+    except Exception:
+        # Se descarta: la siguiente comprobación abre otra
+        conn = _conexiones_sonda.pop(os.getpid(), None)
+        if conn is not None:
+            try:
+                conn.close()
+            except Exception:
+                pass
+        raise
+    pool = db_manager.estadisticas()
+    if pool['esperando'] and pool['en_uso'] >= pool['tamano_max']:
+        return f"Pool agotado: {pool['esperando']} peticiones esperando conexión"
+
+# Las rutas de salud leen el último resultado de la sonda: un balanceador
+# que consulta cada segundo ya no abre conexiones ni espera a MySQL
+sonda_mysql = SondaSalud(
+    probar_conexion_mysql,
+    intervalo=float(os.getenv('HEALTH_PROBE_INTERVAL', 5)),
+    umbral_lento=float(os.getenv('HEALTH_PROBE_SLOW_MS', 250)) / 1000
+)
+atexit.register(sonda_mysql.cerrar)
+
+ESTADO_MYSQL_TEXTO = {
+    'ok': "✅ Conectado",
+    'degradado': "⚠️ Conectado (degradado)",
+    'caido': "❌ No conectado",
+    'iniciando': "⏳ Comprobando",
+}
+
 @app.route('/health')
 def health_check():
-    conn = db_manager.get_connection()
-    mysql_status = "✅ Conectado" if conn else "❌ No conectado"
-    if conn: 
-        conn.close()
-    
+    estado_mysql = sonda_mysql.estado()
     info = {
-        "status": "ok",
-        "mysql_status": mysql_status,
+        "status": estado_mysql['estado'],
+        "mysql_status": ESTADO_MYSQL_TEXTO[estado_mysql['estado']],
+        "mysql": estado_mysql,
         "timestamp": datetime.now().isoformat()
     }
-    return jsonify(info)
+    return jsonify(info), 200 if estado_mysql['listo'] else 503
+
+@app.route('/health/vivo')
+def health_vivo():
+    # Liveness: el proceso responde; no depende de MySQL
+    return jsonify({"status": "vivo"})
+
+@app.route('/health/listo')
+def health_listo():
+    # Readiness: puede atender peticiones que usan la base de datos
+    estado_mysql = sonda_mysql.estado()
+    return jsonify({"status": estado_mysql['estado'], "listo": estado_mysql['listo']}), 200 if estado_mysql['listo'] else 503
+
+@app.route('/metrics')
+def metrics():
+    return Response(metricas.exportar(), content_type='text/plain; version=0.0.4; charset=utf-8')
+
+# Los contadores del proceso (solo crecen) se publican como counter
+CONTADORES_CACHE = ('aciertos', 'fallos', 'invalidaciones')
+metricas.recolector('mysql_pool', 'Estado del pool de conexiones MySQL', db_manager.estadisticas,
+                    contadores=('prestamos', 'esperas', 'tiempo_espera_total', 'timeouts', 'reconexiones'),
+                    excluir=('pid',))
+metricas.recolector('mysql_sonda', 'Última comprobación de MySQL en segundo plano', sonda_mysql.estado,
+                    contadores=('comprobaciones', 'fallos', 'lentas'))
+metricas.recolector('escritura_diferida', 'Cola de escritura diferida de formularios', escritor_datos.estadisticas,
+                    contadores=('encolados', 'rechazados', 'lotes', 'escritos', 'fsyncs', 'reintentos',
+                                'errores', 'respaldados', 'perdidos', 'fsyncs_fallidos'))
+metricas.recolector('hash_contrasenas', 'Servicio de hash de contraseñas', servicio_hash.estadisticas,
+                    contadores=('calculados', 'rechazados'))
+metricas.recolector('trabajos', 'Importaciones en segundo plano', trabajos.estadisticas,
+                    contadores=('lanzados', 'terminados', 'fallidos', 'rechazados'))
+metricas.recolector('cache_usuarios', 'Caché de usuarios del user_loader', usuarios_cache.estadisticas,
+                    contadores=CONTADORES_CACHE)
+metricas.recolector('cache_catalogo', 'Caché del catálogo de productos', catalogo_cache.estadisticas,
+                    contadores=CONTADORES_CACHE)
+
+@app.route('/health/pool')
+def pool_stats():
+    return jsonify(db_manager.estadisticas())
+
+@app.route('/health/escritura')
+def escritura_stats():
+    return jsonify(escritor_datos.estadisticas())
+
+@app.route('/health/hash')
+def hash_stats():
+    return jsonify(servicio_hash.estadisticas())
+
+@app.route('/health/cache')
+def cache_stats():
+    return jsonify({
+        'usuarios': usuarios_cache.estadisticas(),
+        'catalogo': catalogo_cache.estadisticas()
+    })
 
 @app.route('/test_db')
 def test_db():
-    conn = db_manager.get_connection()
-    if conn:
-        conn.close()
-        return "✅ ¡Conexión a la base de datos MySQL exitosa!"
+    estado_mysql = sonda_mysql.estado()
+    if estado_mysql['estado'] == 'iniciando':
+        return "⏳ Comprobando la conexión a la base de datos MySQL..."
+    detalle = f" (comprobado hace {estado_mysql['edad_s']:.1f} s, {estado_mysql['latencia_ms']:.1f} ms)"
+    if estado_mysql['estado'] == 'ok':
+        return "✅ ¡Conexión a la base de datos MySQL exitosa!" + detalle
+    elif estado_mysql['estado'] == 'degradado':
+        return f"⚠️ Conexión a la base de datos MySQL degradada: {estado_mysql['error'] or 'respuesta lenta'}" + detalle
+    else:
+        return f"❌ Error al conectar a la base de datos MySQL: {estado_mysql['error']}" + detalle
+
+# ==========================
+# COMANDOS DE ESQUEMA (flask --app app ...)
+# ==========================
+
+# Consultas de las rutas más usadas, con parámetros de ejemplo, para
+# revisar su plan con EXPLAIN tras cada migración
+CONSULTAS_CRITICAS = {
+    'usuarios_por_fecha': (
+        "SELECT id_usuario, nombre, mail, fecha_registro FROM usuarios"
+        " ORDER BY fecha_registro DESC, id_usuario DESC LIMIT %s",
+        (TAMANO_PAGINA_DEFECTO + 1,)
+    ),
+    'usuarios_por_fecha_cursor': (
+        "SELECT id_usuario, nombre, mail, fecha_registro FROM usuarios"
+        " WHERE " + DESPUES_DE_CURSOR_USUARIOS +
+        " ORDER BY fecha_registro DESC, id_usuario DESC LIMIT %s",
+        (datetime(2030, 1, 1), datetime(2030, 1, 1), 1, TAMANO_PAGINA_DEFECTO + 1)
+    ),
+    'catalogo_por_nombre': (
+        "SELECT p.*, u.nombre as nombre_creador FROM producto p"
+        " LEFT JOIN usuarios u ON p.id_usuario_creador = u.id_usuario"
+        " ORDER BY p.nombre, p.id_producto LIMIT %s",
+        (TAMANO_PAGINA_DEFECTO + 1,)
+    ),
+    'catalogo_por_nombre_cursor': (
+        "SELECT p.*, u.nombre as nombre_creador FROM producto p"
+        " LEFT JOIN usuarios u ON p.id_usuario_creador = u.id_usuario"
+        " WHERE " + DESPUES_DE_CURSOR_PRODUCTOS +
+        " ORDER BY p.nombre, p.id_producto LIMIT %s",
+        ('m', 'm', 1, TAMANO_PAGINA_DEFECTO + 1)
+    ),
+    'mis_productos': (CONSULTA_MIS_PRODUCTOS, (1,)),
+}
+
+@app.cli.command('migrar')
+@click.option('--hasta', type=int, default=None, help='Aplicar solo hasta esta versión')
+def comando_migrar(hasta):
+    """Aplica las migraciones pendientes del esquema MySQL"""
+    try:
+        aplicadas = aplicar_migraciones(db_manager, hasta)
+    except (Error, RuntimeError) as e:
+        raise click.ClickException(f"Error aplicando migraciones: {e}")
+    if aplicadas:
+        click.echo(f"✅ Migraciones aplicadas: {', '.join(map(str, aplicadas))}")
     else:
-        return "❌ Error al conectar a la base de datos MySQL."
+        click.echo("✅ El esquema ya estaba al día.")
+
+@app.cli.command('comprobar-planes')
+def comando_comprobar_planes():
+    """EXPLAIN de las consultas críticas; falla si alguna hace filesort o recorre la tabla"""
+    fallos = 0
+    try:
+        with db_manager.conexion() as conn:
+            cursor = conn.cursor()
+            for nombre, (consulta, params) in CONSULTAS_CRITICAS.items():
+                problemas = problemas_de_plan(cursor, consulta, params)
+                fallos += bool(problemas)
+                click.echo(f"{'❌' if problemas else '✅'} {nombre}")
+                for problema in problemas:
+                    click.echo(f"    {problema}")
+            cursor.close()
+    except Error as e:
+        raise click.ClickException(f"Error comprobando planes: {e}")
+    if fallos:
+        raise click.ClickException(f"{fallos} consultas sin índice adecuado")
 
 # ==========================
 # INICIALIZACIÓN DE LA APLICACIÓN
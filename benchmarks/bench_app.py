@@ -0,0 +1,364 @@
+"""Carga mixta sobre la app completa: latencia y throughput por ruta.
+
+Siembra una base local (benchmarks/mysql_local: SQLite en lugar de MySQL,
+con el pool y las consultas reales de app.py) con N usuarios, M productos
+y sus asociaciones, y los archivos de datos con R formularios. Arranca la
+app en un proceso aparte (servidor werkzeug con hilos, como un worker
+gthread) y cada hilo cliente, con su propia sesión, inicia sesión y
+mezcla dashboard, /procesar, alta/edición/baja de productos, asociación y
+mis_productos. El resultado es un JSON con throughput, p50/p95/p99 y las
+consultas SQL medias (de la cabecera Server-Timing) por ruta, pensado
+para guardarlo y compararlo entre commits con --comparar.
+
+Uso (desde la raíz del proyecto):
+    python -m benchmarks.bench_app --duracion 30 --concurrencia 8 --salida antes.json
+    python -m benchmarks.bench_app --duracion 30 --concurrencia 8 --comparar antes.json
+"""
+import argparse
+import http.client
+import json
+import multiprocessing
+import os
+import random
+import re
+import subprocess
+import tempfile
+import threading
+import time
+import urllib.parse
+from collections import defaultdict
+from datetime import datetime, timedelta
+
+from werkzeug.security import generate_password_hash
+
+from benchmarks.bench_busqueda import generar_nombres
+from benchmarks.bench_login import percentil, puerto_libre
+from benchmarks.mysql_local import crear_base
+
+PASSWORD = 'secreto-de-prueba'
+PAISES = ('Chile', 'Argentina', 'Perú', 'Uruguay', 'México', 'España')
+# Peso de cada flujo en la mezcla; se cambia con --mezcla flujo=peso,...
+MEZCLA = {
+    'login': 5,
+    'dashboard': 35,
+    'procesar': 20,
+    'producto_nuevo': 6,
+    'producto_editar': 10,
+    'producto_eliminar': 4,
+    'asociar': 8,
+    'mis_productos': 12,
+}
+SERVER_TIMING_DB = re.compile(r'db;dur=([\d.]+);desc="(\d+) consultas"')
+
+
+def mail_usuario(i):
+    return f'usuario{i}@bench.local'
+
+
+def sembrar_base(ruta, usuarios, productos, eliminables, asociaciones, rng):
+    """Crea la base local con datos deterministas para la semilla dada"""
+    conn = crear_base(ruta)
+    # Todos comparten contraseña: un solo hash en vez de uno por usuario
+    password_hash = generate_password_hash(PASSWORD)
+    ahora = datetime.now().replace(microsecond=0)
+    conn.executemany(
+        "INSERT INTO usuarios (id_usuario, nombre, mail, password, fecha_registro) VALUES (?, ?, ?, ?, ?)",
+        ((i, f'Usuario {i}', mail_usuario(i), password_hash,
+          ahora - timedelta(seconds=rng.randrange(365 * 86400)))
+         for i in range(1, usuarios + 1))
+    )
+    nombres = generar_nombres(productos + eliminables, rng)
+    conn.executemany(
+        "INSERT INTO producto (id_producto, nombre, costo, descripcion, stock, id_usuario_creador) "
+        "VALUES (?, ?, ?, ?, ?, ?)",
+        ((i, nombre, round(rng.uniform(0.5, 2000), 2), f'Descripción de {nombre}',
+          rng.randrange(200), rng.randint(1, usuarios))
+         for i, nombre in enumerate(nombres, 1))
+    )
+    conn.executemany(
+        "INSERT OR IGNORE INTO usuario_producto (id_usuario, id_producto, fecha_asociacion) VALUES (?, ?, ?)",
+        ((u, rng.randint(1, productos), ahora - timedelta(seconds=rng.randrange(30 * 86400)))
+         for u in range(1, usuarios + 1) for _ in range(asociaciones))
+    )
+    conn.commit()
+    conn.close()
+    return nombres[:productos]
+
+
+def formulario(rng, n):
+    return {
+        'nombre': f'Persona {n}',
+        'mail': f'persona{n}@ejemplo.com',
+        'edad': str(rng.randint(18, 90)),
+        'pais': rng.choice(PAISES),
+        'intereses': 'Intereses, con comas y "comillas" ' + 'x' * rng.randrange(200),
+    }
+
+
+def servidor(puerto, ruta_db, directorio, registros, semilla, listo, parar):
+    os.environ['DATOS_DIR'] = directorio
+    from benchmarks import mysql_local
+    mysql_local.instalar(ruta_db)
+    from werkzeug.serving import WSGIRequestHandler, make_server
+    import app as aplicacion
+
+    class ManejadorSilencioso(WSGIRequestHandler):
+        def log_request(self, *args, **kwargs):
+            pass
+
+    # Formularios ya guardados, escritos con el mismo código que /procesar
+    rng = random.Random(semilla)
+    fecha = datetime.now()
+    for inicio in range(0, registros, 1000):
+        lote = [(formulario(rng, n), fecha) for n in range(inicio, min(inicio + 1000, registros))]
+        aplicacion.escribir_lote_datos(lote, False)
+
+    aplicacion.app.config['TESTING'] = True
+    http_server = make_server('127.0.0.1', puerto, aplicacion.app, threaded=True,
+                              request_handler=ManejadorSilencioso)
+    hilo = threading.Thread(target=http_server.serve_forever)
+    hilo.start()
+    listo.set()
+    parar.wait()
+    http_server.shutdown()
+    hilo.join()
+    aplicacion.escritor_datos.cerrar()
+    aplicacion.servicio_hash.cerrar()
+
+
+class Sesion:
+    """Cliente HTTP con sus propias cookies (una sesión de Flask-Login)"""
+
+    def __init__(self, puerto):
+        self.puerto = puerto
+        self.cookies = {}
+
+    def peticion(self, metodo, ruta, datos=None):
+        """(estado, Location, segundos, cabecera Server-Timing)"""
+        cabeceras = {}
+        body = None
+        if datos is not None:
+            body = urllib.parse.urlencode(datos)
+            cabeceras['Content-Type'] = 'application/x-www-form-urlencoded'
+        if self.cookies:
+            cabeceras['Cookie'] = '; '.join(f'{k}={v}' for k, v in self.cookies.items())
+        conn = http.client.HTTPConnection('127.0.0.1', self.puerto, timeout=60)
+        inicio = time.perf_counter()
+        try:
+            conn.request(metodo, ruta, body=body, headers=cabeceras)
+            respuesta = conn.getresponse()
+            respuesta.read()
+        finally:
+            conn.close()
+        duracion = time.perf_counter() - inicio
+        for cookie in respuesta.msg.get_all('Set-Cookie') or ():
+            nombre, _, valor = cookie.split(';', 1)[0].partition('=')
+            if valor and 'expires=thu, 01 jan 1970' not in cookie.lower():
+                self.cookies[nombre.strip()] = valor
+            else:
+                self.cookies.pop(nombre.strip(), None)
+        return respuesta.status, respuesta.getheader('Location') or '', duracion, respuesta.getheader('Server-Timing')
+
+
+def ejecutar(puerto, args, nombres):
+    """Lanza los hilos cliente y devuelve las muestras por ruta tras el calentamiento"""
+    inicio_medida = time.monotonic() + args.calentamiento
+    fin = inicio_medida + args.duracion
+    muestras = defaultdict(list)  # ruta -> [(segundos, ok, consultas, sql_ms)]
+    lock = threading.Lock()
+    eliminables = iter(range(args.productos + 1, args.productos + args.eliminables + 1))
+    flujos = [f for f, peso in args.mezcla.items() if peso > 0]
+    pesos = [args.mezcla[f] for f in flujos]
+
+    def registrar(ruta, resultado, esperado):
+        estado, location, duracion, server_timing = resultado
+        # Una redirección a /login en una ruta protegida es una sesión perdida
+        ok = estado == esperado and not (ruta != 'POST /login' and '/login' in location)
+        consultas = sql_ms = None
+        if server_timing:
+            coincidencia = SERVER_TIMING_DB.search(server_timing)
+            if coincidencia:
+                sql_ms, consultas = float(coincidencia.group(1)), int(coincidencia.group(2))
+        if time.monotonic() >= inicio_medida:
+            with lock:
+                muestras[ruta].append((duracion, ok, consultas, sql_ms))
+
+    def cliente(indice):
+        rng = random.Random(args.semilla * 1000 + indice)
+        usuario = indice % args.usuarios + 1
+        sesion = Sesion(puerto)
+        registrar('POST /login', sesion.peticion(
+            'POST', '/login', {'mail': mail_usuario(usuario), 'password': PASSWORD}), 302)
+        n = 0
+        while time.monotonic() < fin:
+            n += 1
+            flujo = rng.choices(flujos, pesos)[0]
+            try:
+                if flujo == 'login':
+                    # Sin cookies: mide verificar_usuario sin tocar la sesión del hilo
+                    otro = rng.randint(1, args.usuarios)
+                    registrar('POST /login', Sesion(puerto).peticion(
+                        'POST', '/login', {'mail': mail_usuario(otro), 'password': PASSWORD}), 302)
+                elif flujo == 'dashboard':
+                    registrar('GET /dashboard', sesion.peticion('GET', '/dashboard'), 200)
+                elif flujo == 'procesar':
+                    registrar('POST /procesar', sesion.peticion(
+                        'POST', '/procesar', formulario(rng, f'{indice}-{n}')), 302)
+                elif flujo == 'producto_nuevo':
+                    registrar('POST /productos/nuevo', sesion.peticion('POST', '/productos/nuevo', {
+                        'nombre': generar_nombres(1, rng)[0], 'costo': f'{rng.uniform(0.5, 2000):.2f}',
+                        'descripcion': 'Alta desde el benchmark', 'stock': str(rng.randrange(200)),
+                    }), 302)
+                elif flujo == 'producto_editar':
+                    id = rng.randint(1, args.productos)
+                    registrar('GET /productos/editar/<id>', sesion.peticion('GET', f'/productos/editar/{id}'), 200)
+                    registrar('POST /productos/editar/<id>', sesion.peticion('POST', f'/productos/editar/{id}', {
+                        'nombre': nombres[id - 1], 'costo': f'{rng.uniform(0.5, 2000):.2f}',
+                        'descripcion': f'Editado por el cliente {indice}', 'stock': str(rng.randrange(200)),
+                    }), 302)
+                elif flujo == 'producto_eliminar':
+                    with lock:
+                        id = next(eliminables, None)
+                    # Solo se borran productos de reserva, nunca los que editan o asocian otros hilos
+                    if id is not None:
+                        registrar('POST /productos/eliminar/<id>',
+                                  sesion.peticion('POST', f'/productos/eliminar/{id}'), 302)
+                elif flujo == 'asociar':
+                    id = rng.randint(1, args.productos)
+                    registrar('POST /asociar_producto/<id>', sesion.peticion('POST', f'/asociar_producto/{id}'), 302)
+                elif flujo == 'mis_productos':
+                    registrar('GET /mis_productos', sesion.peticion('GET', '/mis_productos'), 200)
+            except (OSError, http.client.HTTPException) as e:
+                print(f"Error en el cliente {indice} ({flujo}): {e}")
+                with lock:
+                    muestras[f'error_conexion {flujo}'].append((0.0, False, None, None))
+
+    hilos = [threading.Thread(target=cliente, args=(i,)) for i in range(args.concurrencia)]
+    for h in hilos:
+        h.start()
+    for h in hilos:
+        h.join()
+    return muestras
+
+
+def resumir(muestras, duracion):
+    rutas = {}
+    for ruta, valores in sorted(muestras.items()):
+        latencias = [v[0] for v in valores]
+        consultas = [v[2] for v in valores if v[2] is not None]
+        sql_ms = [v[3] for v in valores if v[3] is not None]
+        rutas[ruta] = {
+            'peticiones': len(valores),
+            'errores': sum(1 for v in valores if not v[1]),
+            'por_segundo': len(valores) / duracion,
+            'p50_ms': percentil(latencias, 50),
+            'p95_ms': percentil(latencias, 95),
+            'p99_ms': percentil(latencias, 99),
+            'max_ms': max(latencias) * 1000 if latencias else None,
+            'consultas_sql_media': sum(consultas) / len(consultas) if consultas else None,
+            'sql_ms_media': sum(sql_ms) / len(sql_ms) if sql_ms else None,
+        }
+    total = sum(r['peticiones'] for r in rutas.values())
+    return {
+        'total': {
+            'peticiones': total,
+            'errores': sum(r['errores'] for r in rutas.values()),
+            'por_segundo': total / duracion,
+        },
+        'rutas': rutas,
+    }
+
+
+def comparar(anterior, actual):
+    """Variación porcentual de throughput y p50/p95/p99 por ruta (negativo = menos)"""
+    comparacion = {}
+    for ruta, medidas in actual['rutas'].items():
+        previas = anterior.get('rutas', {}).get(ruta)
+        if not previas:
+            continue
+        comparacion[ruta] = {
+            clave: round((medidas[clave] - previas[clave]) / previas[clave] * 100, 1)
+            for clave in ('por_segundo', 'p50_ms', 'p95_ms', 'p99_ms')
+            if medidas.get(clave) is not None and previas.get(clave)
+        }
+    return comparacion
+
+
+def commit_actual():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def leer_mezcla(texto):
+    mezcla = dict(MEZCLA)
+    for par in filter(None, texto.split(',')):
+        flujo, _, peso = par.partition('=')
+        if flujo.strip() not in MEZCLA:
+            raise argparse.ArgumentTypeError(f"Flujo desconocido: {flujo} (válidos: {', '.join(MEZCLA)})")
+        mezcla[flujo.strip()] = float(peso)
+    return mezcla
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--usuarios', type=int, default=1000, help='usuarios sembrados')
+    parser.add_argument('--productos', type=int, default=10000, help='productos sembrados')
+    parser.add_argument('--eliminables', type=int, default=2000,
+                        help='productos extra que solo usa el flujo de baja')
+    parser.add_argument('--asociaciones', type=int, default=10, help='productos asociados por usuario')
+    parser.add_argument('--registros', type=int, default=5000, help='formularios ya guardados en los archivos')
+    parser.add_argument('--concurrencia', type=int, default=8, help='hilos cliente, cada uno con su sesión')
+    parser.add_argument('--duracion', type=float, default=20.0, help='segundos medidos')
+    parser.add_argument('--calentamiento', type=float, default=2.0, help='segundos iniciales descartados')
+    parser.add_argument('--mezcla', type=leer_mezcla, default=dict(MEZCLA),
+                        help='pesos de los flujos, p. ej. dashboard=50,login=0')
+    parser.add_argument('--semilla', type=int, default=1)
+    parser.add_argument('--salida', help='archivo donde guardar el JSON (además de imprimirlo)')
+    parser.add_argument('--comparar', help='JSON de una ejecución anterior para calcular la variación')
+    args = parser.parse_args()
+
+    rng = random.Random(args.semilla)
+    contexto = multiprocessing.get_context('spawn')
+    with tempfile.TemporaryDirectory() as directorio:
+        ruta_db = os.path.join(directorio, 'app.db')
+        nombres = sembrar_base(ruta_db, args.usuarios, args.productos, args.eliminables,
+                               args.asociaciones, rng)
+        directorio_datos = os.path.join(directorio, 'datos')
+        os.makedirs(directorio_datos)
+
+        puerto = puerto_libre()
+        listo, parar = contexto.Event(), contexto.Event()
+        # No daemon: el servidor necesita crear su propio pool de procesos de hash
+        proceso = contexto.Process(target=servidor, args=(
+            puerto, ruta_db, directorio_datos, args.registros, args.semilla, listo, parar))
+        proceso.start()
+        if not listo.wait(300):
+            proceso.terminate()
+            raise SystemExit("El servidor no arrancó")
+        try:
+            muestras = ejecutar(puerto, args, nombres)
+        finally:
+            parar.set()
+            proceso.join()
+
+    resultado = {
+        'commit': commit_actual(),
+        'fecha': datetime.now().isoformat(timespec='seconds'),
+        'parametros': {clave: valor for clave, valor in vars(args).items() if clave not in ('salida', 'comparar')},
+        **resumir(muestras, args.duracion),
+    }
+    if args.comparar:
+        with open(args.comparar, encoding='utf-8') as f:
+            resultado['comparacion'] = comparar(json.load(f), resultado)
+    texto = json.dumps(resultado, indent=2, ensure_ascii=False)
+    if args.salida:
+        with open(args.salida, 'w', encoding='utf-8') as f:
+            f.write(texto + '\n')
+    print(texto)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,96 @@
+"""Arranque del Inventario: carga completa, instantánea y modo perezoso.
+
+Crea una base temporal con N productos y, en un proceso nuevo por modo
+(para que la memoria medida sea solo la suya), mide el tiempo hasta tener
+el Inventario listo, la memoria residente que añade, lo que tarda la
+primera página de mostrar_todos y una consulta por id. La carga completa
+escribe al terminar la instantánea que usa después el modo 'instantanea'.
+
+Uso (desde la raíz del proyecto):
+    python -m benchmarks.bench_arranque --productos 1000000
+"""
+import argparse
+import json
+import multiprocessing
+import os
+import random
+import sqlite3
+import tempfile
+import time
+
+import inventario.db
+from benchmarks.bench_busqueda import generar_nombres, memoria_mb
+
+
+def medir_modo(ruta, modo, productos, consultas, semilla):
+    """Se ejecuta en un proceso hijo: devuelve las medidas de un modo"""
+    inventario.db.DB_PATH = ruta
+    from inventario.models import Inventario
+
+    instantanea = ruta + '.instantanea'
+    memoria_antes = memoria_mb()
+    inicio = time.perf_counter()
+    inv = Inventario(perezoso=modo == 'perezoso', instantanea=instantanea if modo == 'instantanea' else '')
+    arranque = time.perf_counter() - inicio
+    memoria_despues = memoria_mb()
+
+    inicio = time.perf_counter()
+    primera = next(inv.paginas())
+    primera_pagina = time.perf_counter() - inicio
+
+    rng = random.Random(semilla)
+    ids = [rng.randint(1, productos) for _ in range(consultas)]
+    inicio = time.perf_counter()
+    for id in ids:
+        inv.obtener_producto(id)
+    obtener = (time.perf_counter() - inicio) / consultas
+    resultado = {
+        'arranque_s': arranque,
+        'memoria_mb': memoria_despues - memoria_antes if memoria_antes is not None else None,
+        'primera_pagina_ms': primera_pagina * 1000,
+        'productos_primera_pagina': len(primera),
+        'obtener_producto_us': obtener * 1e6,
+    }
+    if modo == 'completo':
+        inv.instantanea = instantanea
+        inicio = time.perf_counter()
+        assert inv.guardar_instantanea()
+        resultado['guardar_instantanea_s'] = time.perf_counter() - inicio
+        resultado['instantanea_mb'] = os.path.getsize(instantanea) / 2**20
+    return resultado
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--productos', type=int, default=1_000_000)
+    parser.add_argument('--consultas', type=int, default=1000, help='consultas por id tras arrancar')
+    parser.add_argument('--semilla', type=int, default=1)
+    args = parser.parse_args()
+
+    rng = random.Random(args.semilla)
+    contexto = multiprocessing.get_context('spawn')
+    with tempfile.TemporaryDirectory() as directorio:
+        ruta = os.path.join(directorio, 'inventario.db')
+        inventario.db.DB_PATH = ruta
+        inventario.db.crear_tabla()
+        inventario.db.cerrar_conexion()
+        conn = sqlite3.connect(ruta)
+        conn.executemany(
+            "INSERT INTO productos (nombre, cantidad, precio) VALUES (?, ?, ?)",
+            ((nombre, rng.randrange(200), round(rng.uniform(0.5, 2000), 2))
+             for nombre in generar_nombres(args.productos, rng))
+        )
+        conn.commit()
+        conn.close()
+
+        resultados = {'productos': args.productos}
+        for modo in ('completo', 'instantanea', 'perezoso'):
+            with contexto.Pool(1) as pool:
+                resultados[modo] = pool.apply(
+                    medir_modo, (ruta, modo, args.productos, args.consultas, args.semilla)
+                )
+    print(json.dumps(resultados, indent=2))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,101 @@
+"""Búsqueda por nombre: recorrido lineal frente al índice de trigramas.
+
+Genera N nombres de producto combinando palabras de un vocabulario,
+construye el IndiceNombres y compara, para varias consultas, la latencia
+del recorrido anterior (lower() sobre cada nombre en cada búsqueda) con
+la del índice en sus tres modos. Informa también del tiempo de
+construcción y de la memoria que ocupa el índice.
+
+Uso (desde la raíz del proyecto):
+    python -m benchmarks.bench_busqueda --productos 1000000
+"""
+import argparse
+import json
+import random
+import time
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+from inventario.busqueda import IndiceNombres
+
+SUSTANTIVOS = ['Tornillo', 'Tuerca', 'Arandela', 'Cable', 'Conector', 'Martillo', 'Llave',
+               'Destornillador', 'Taladro', 'Broca', 'Lija', 'Pintura', 'Brocha', 'Cinta',
+               'Bisagra', 'Cerradura', 'Manguera', 'Enchufe', 'Interruptor', 'Bombilla']
+ADJETIVOS = ['inoxidable', 'galvanizado', 'reforzado', 'industrial', 'compacto', 'eléctrico',
+             'hexagonal', 'plano', 'largo', 'corto', 'negro', 'blanco', 'rojo', 'azul']
+MEDIDAS = ['M3', 'M4', 'M5', 'M6', 'M8', '1/4', '3/8', '1/2', '2m', '5m', '10m', 'USB-C', 'HDMI']
+
+
+def generar_nombres(n, rng):
+    return [
+        f"{rng.choice(SUSTANTIVOS)} {rng.choice(ADJETIVOS)} {rng.choice(MEDIDAS)} ref{rng.randrange(10**6):06d}"
+        for _ in range(n)
+    ]
+
+
+def memoria_mb():
+    """Pico de memoria residente del proceso (Linux informa en KB)"""
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024 if resource else None
+
+
+def medir(funcion, repeticiones):
+    """(milisegundos por llamada, resultados de la última)"""
+    inicio = time.perf_counter()
+    for _ in range(repeticiones):
+        resultado = funcion()
+    return (time.perf_counter() - inicio) / repeticiones * 1000, len(resultado)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--productos', type=int, default=1_000_000)
+    parser.add_argument('--repeticiones', type=int, default=20)
+    parser.add_argument('--limite', type=int, default=20, help='resultados pedidos en modo ranking')
+    parser.add_argument('--semilla', type=int, default=1)
+    args = parser.parse_args()
+
+    rng = random.Random(args.semilla)
+    nombres = generar_nombres(args.productos, rng)
+    # Consultas selectivas (una referencia concreta) y amplias (una palabra común)
+    consultas = [nombres[rng.randrange(len(nombres))].split()[-1], 'ref12345', 'hdmi ref9',
+                 'destornillador negro', 'inoxi', 'ta']
+
+    memoria_antes = memoria_mb()
+    inicio = time.perf_counter()
+    indice = IndiceNombres(enumerate(nombres, 1))
+    construccion = time.perf_counter() - inicio
+    memoria_despues = memoria_mb()
+
+    resultados = {
+        'productos': args.productos,
+        'construccion_s': construccion,
+        'memoria_indice_mb': memoria_despues - memoria_antes if resource else None,
+        'trigramas': len(indice._trigramas),
+        'consultas': {},
+    }
+    for consulta in consultas:
+        q = consulta.lower()
+        lineal_ms, n_lineal = medir(
+            lambda: [i for i, nombre in enumerate(nombres, 1) if q in nombre.lower()],
+            max(1, args.repeticiones // 10)
+        )
+        contiene_ms, n_contiene = medir(lambda: indice.buscar(consulta), args.repeticiones)
+        prefijo_ms, n_prefijo = medir(lambda: indice.buscar(consulta, 'prefijo'), args.repeticiones)
+        ranking_ms, _ = medir(lambda: indice.buscar(consulta, 'ranking', args.limite), args.repeticiones)
+        assert n_lineal == n_contiene
+        resultados['consultas'][consulta] = {
+            'coincidencias': n_contiene,
+            'coincidencias_prefijo': n_prefijo,
+            'lineal_ms': lineal_ms,
+            'contiene_ms': contiene_ms,
+            'prefijo_ms': prefijo_ms,
+            f'ranking_top{args.limite}_ms': ranking_ms,
+        }
+    print(json.dumps(resultados, indent=2, ensure_ascii=False))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,152 @@
+"""Micro-benchmark del índice por id de inventario.models.Inventario.
+
+Mide el coste de mantener la caché al agregar, actualizar y eliminar con
+N productos cargados, comparando la lista anterior (búsqueda lineal y
+reconstrucción al borrar) con el diccionario por id. También mide la
+memoria por objeto de Producto con y sin __slots__, y unas operaciones
+completas (con SQLite) contra una base temporal.
+
+Uso (desde la raíz del proyecto):
+    python -m benchmarks.bench_inventario --productos 1000000
+"""
+import argparse
+import json
+import os
+import random
+import sqlite3
+import tempfile
+import time
+import tracemalloc
+
+import inventario.db
+from inventario.models import Inventario, Producto
+
+
+class ProductoSinSlots:
+    def __init__(self, id, nombre, cantidad, precio):
+        self.id = id
+        self.nombre = nombre
+        self.cantidad = cantidad
+        self.precio = precio
+
+
+def por_operacion(funcion, repeticiones):
+    """Microsegundos por llamada"""
+    inicio = time.perf_counter()
+    for i in range(repeticiones):
+        funcion(i)
+    return (time.perf_counter() - inicio) / repeticiones * 1e6
+
+
+def bench_lista(productos, ops, rng):
+    cache = [Producto(i, f'producto {i}', i % 100, 1.0) for i in range(1, productos + 1)]
+    ids = [rng.randint(1, productos) for _ in range(ops)]
+
+    def actualizar(i):
+        for p in cache:
+            if p.id == ids[i]:
+                p.cantidad += 1
+                break
+
+    def eliminar(i):
+        nonlocal cache
+        cache = [p for p in cache if p.id != ids[i]]
+
+    def agregar(i):
+        cache.append(Producto(productos + i + 1, 'nuevo', 1, 1.0))
+
+    return {
+        'agregar_us': por_operacion(agregar, ops),
+        'actualizar_us': por_operacion(actualizar, ops),
+        'eliminar_us': por_operacion(eliminar, ops),
+    }
+
+
+def bench_indice(productos, ops, rng):
+    cache = {i: Producto(i, f'producto {i}', i % 100, 1.0) for i in range(1, productos + 1)}
+    ids = rng.sample(range(1, productos + 1), ops)
+
+    def actualizar(i):
+        p = cache.get(ids[i])
+        if p is not None:
+            p.cantidad += 1
+
+    def eliminar(i):
+        cache.pop(ids[i], None)
+
+    def agregar(i):
+        cache[productos + i + 1] = Producto(productos + i + 1, 'nuevo', 1, 1.0)
+
+    return {
+        'agregar_us': por_operacion(agregar, ops),
+        'actualizar_us': por_operacion(actualizar, ops),
+        'eliminar_us': por_operacion(eliminar, ops),
+    }
+
+
+def bytes_por_objeto(clase, n=100_000):
+    tracemalloc.start()
+    antes = tracemalloc.get_traced_memory()[0]
+    objetos = [clase(i, 'x', i, 1.0) for i in range(n)]
+    despues = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    del objetos
+    # Incluye el puntero de la lista y los enteros; lo relevante es la diferencia
+    return (despues - antes) / n
+
+
+def bench_completo(productos, ops, rng):
+    """Carga la caché desde SQLite y ejecuta operaciones reales del Inventario"""
+    ruta_original = inventario.db.DB_PATH
+    with tempfile.TemporaryDirectory() as directorio:
+        ruta = os.path.join(directorio, 'inventario.db')
+        inventario.db.DB_PATH = ruta
+        inventario.db.crear_tabla()
+        conn = sqlite3.connect(ruta)
+        conn.executemany(
+            "INSERT INTO productos (nombre, cantidad, precio) VALUES (?, ?, ?)",
+            ((f'producto {i}', i % 100, 1.0) for i in range(productos))
+        )
+        conn.commit()
+        conn.close()
+
+        inicio = time.perf_counter()
+        inv = Inventario()
+        carga = time.perf_counter() - inicio
+        ids = rng.sample(range(1, productos + 1), ops)
+        try:
+            return {
+                'carga_s': carga,
+                'agregar_us': por_operacion(lambda i: inv.agregar_producto(Producto(None, 'nuevo', 1, 1.0)), ops),
+                'actualizar_us': por_operacion(lambda i: inv.actualizar_producto(ids[i], cantidad=5), ops),
+                'eliminar_us': por_operacion(lambda i: inv.eliminar_producto(ids[i]), ops),
+            }
+        finally:
+            inventario.db.DB_PATH = ruta_original
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--productos', type=int, default=1_000_000)
+    parser.add_argument('--ops', type=int, default=10_000, help='operaciones con el índice')
+    parser.add_argument('--ops-lista', type=int, default=20, help='operaciones con la lista (lentas)')
+    parser.add_argument('--ops-db', type=int, default=200, help='operaciones completas con SQLite')
+    parser.add_argument('--semilla', type=int, default=1)
+    args = parser.parse_args()
+
+    rng = random.Random(args.semilla)
+    resultados = {
+        'productos': args.productos,
+        'lista': bench_lista(args.productos, args.ops_lista, rng),
+        'indice': bench_indice(args.productos, args.ops, rng),
+        'bytes_por_producto': {
+            'sin_slots': bytes_por_objeto(ProductoSinSlots),
+            'con_slots': bytes_por_objeto(Producto),
+        },
+        'inventario_sqlite': bench_completo(args.productos, args.ops_db, rng),
+    }
+    print(json.dumps(resultados, indent=2))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,97 @@
+"""Latencia de lectura de los archivos del dashboard: lectura completa vs lectores con caché.
+
+Uso (desde la raíz del proyecto):
+    python -m benchmarks.bench_lectores --registros 1000000
+"""
+import argparse
+import csv
+import json
+import os
+import tempfile
+import time
+
+from almacenamiento.lectores import LectorCSV, LectorJSONL
+from almacenamiento.txt import leer_ultimos_registros
+
+CAMPOS = ['nombre', 'mail', 'edad', 'pais', 'intereses', 'fecha_registro']
+
+
+def generar_archivos(directorio, n):
+    txt = os.path.join(directorio, 'datos.txt')
+    jsonl = os.path.join(directorio, 'datos.jsonl')
+    ruta_csv = os.path.join(directorio, 'datos.csv')
+    with open(txt, 'w', encoding='utf-8') as ft, \
+            open(jsonl, 'w', encoding='utf-8') as fj, \
+            open(ruta_csv, 'w', newline='', encoding='utf-8') as fc:
+        writer = csv.writer(fc)
+        writer.writerow(CAMPOS)
+        for i in range(n):
+            fecha = f"2024-01-01T00:00:{i:09d}"
+            registro = {'nombre': f'Usuario {i}', 'mail': f'u{i}@ejemplo.com', 'edad': 20 + i % 60,
+                        'pais': 'Chile', 'intereses': 'Música', 'fecha_registro': fecha}
+            ft.write(f"\n{'='*50}\nRegistro: {fecha}\n")
+            ft.writelines(f"{k}: {v}\n" for k, v in registro.items())
+            fj.write(json.dumps(registro, ensure_ascii=False) + '\n')
+            writer.writerow([registro[c] for c in CAMPOS])
+    return txt, jsonl, ruta_csv
+
+
+def lectura_completa(txt, jsonl, ruta_csv):
+    """Equivalente a los leer_* originales: leer, parsear y ordenar todo"""
+    with open(txt, 'r', encoding='utf-8') as f:
+        f.read()
+    with open(jsonl, 'r', encoding='utf-8') as f:
+        datos = [json.loads(linea) for linea in f]
+    sorted(datos, key=lambda x: x.get('fecha_registro', ''), reverse=True)
+    with open(ruta_csv, 'r', encoding='utf-8') as f:
+        filas = list(csv.DictReader(f))
+    sorted(filas, key=lambda x: x.get('fecha_registro', ''), reverse=True)
+
+
+def cronometrar(funcion, repeticiones=1):
+    inicio = time.perf_counter()
+    for _ in range(repeticiones):
+        funcion()
+    return (time.perf_counter() - inicio) / repeticiones * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--registros', type=int, default=1_000_000)
+    parser.add_argument('--limite', type=int, default=25, help='registros que muestra el dashboard')
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directorio:
+        print(f"Generando {args.registros} registros por archivo...")
+        txt, jsonl, ruta_csv = generar_archivos(directorio, args.registros)
+        lectores = (LectorJSONL(jsonl, max_registros=100), LectorCSV(ruta_csv, max_registros=100))
+
+        def dashboard_cacheado():
+            leer_ultimos_registros(txt, args.limite)
+            lectores[0].leer(args.limite)
+            lectores[1].leer(args.limite)
+
+        def anexar():
+            with open(jsonl, 'a', encoding='utf-8') as f:
+                f.write(json.dumps({'nombre': 'nuevo'}) + '\n')
+            with open(ruta_csv, 'a', newline='', encoding='utf-8') as f:
+                csv.writer(f).writerow(['nuevo', 'n@e.com', 30, 'Chile', '', '2099-01-01'])
+            with open(txt, 'a', encoding='utf-8') as f:
+                f.write(f"\n{'='*50}\nnombre: nuevo\n")
+
+        resultados = {
+            'lectura_completa_ms': cronometrar(lambda: lectura_completa(txt, jsonl, ruta_csv)),
+            'cache_primera_lectura_ms': cronometrar(dashboard_cacheado),
+            'cache_sin_cambios_ms': cronometrar(dashboard_cacheado, 100),
+        }
+        tiempos = []
+        for _ in range(20):
+            anexar()
+            tiempos.append(cronometrar(dashboard_cacheado))
+        resultados['cache_tras_anexo_ms'] = sum(tiempos) / len(tiempos)
+        resultados['registros'] = args.registros
+        print(json.dumps(resultados, indent=2))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,148 @@
+"""Avalancha de logins: throughput de /login y latencia del resto de rutas.
+
+Arranca la app en un proceso aparte (servidor werkzeug con hilos, como un
+worker gthread) con la búsqueda del usuario en memoria, y desde varios
+hilos lanza logins continuos mientras otros hilos miden la latencia de
+una ruta que no hace hash (/about). Se ejecuta dos veces: con el hash en
+el hilo de la petición (PASSWORD_HASH_WORKERS=0) y con el pool de procesos.
+
+Uso (desde la raíz del proyecto):
+    python -m benchmarks.bench_login --duracion 10 --logins 16 --lectores 4
+"""
+import argparse
+import http.client
+import json
+import multiprocessing
+import os
+import socket
+import threading
+import time
+import urllib.parse
+
+MAIL = 'bench@ejemplo.com'
+PASSWORD = 'secreto-de-prueba'
+
+
+def servidor(puerto, procesos, listo, parar):
+    os.environ['PASSWORD_HASH_WORKERS'] = str(procesos)
+    from werkzeug.serving import WSGIRequestHandler, make_server
+    import app as aplicacion
+
+    class ManejadorSilencioso(WSGIRequestHandler):
+        def log_request(self, *args, **kwargs):
+            pass
+
+    password_hash = aplicacion.servicio_hash.generar(PASSWORD)
+    usuario = {'id_usuario': 1, 'nombre': 'Bench', 'mail': MAIL,
+               'password': password_hash, 'fecha_registro': None}
+    aplicacion.buscar_usuario_por_mail = lambda mail: usuario if mail == MAIL else None
+    aplicacion.app.config['TESTING'] = True
+    http_server = make_server('127.0.0.1', puerto, aplicacion.app, threaded=True,
+                              request_handler=ManejadorSilencioso)
+    hilo = threading.Thread(target=http_server.serve_forever)
+    hilo.start()
+    listo.set()
+    parar.wait()
+    http_server.shutdown()
+    hilo.join()
+    aplicacion.servicio_hash.cerrar()
+
+
+def percentil(valores, p):
+    if not valores:
+        return None
+    ordenados = sorted(valores)
+    return ordenados[min(len(ordenados) - 1, int(len(ordenados) * p / 100))] * 1000
+
+
+def ejecutar(puerto, duracion, n_logins, n_lectores):
+    fin = time.monotonic() + duracion
+    resultados = {'login_ok': 0, 'login_rechazado': 0, 'login_error': 0}
+    latencias_login = []
+    latencias_lectura = []
+    lock = threading.Lock()
+    cuerpo = urllib.parse.urlencode({'mail': MAIL, 'password': PASSWORD})
+
+    def peticion(metodo, ruta, body=None):
+        conn = http.client.HTTPConnection('127.0.0.1', puerto, timeout=30)
+        cabeceras = {'Content-Type': 'application/x-www-form-urlencoded'} if body else {}
+        inicio = time.perf_counter()
+        conn.request(metodo, ruta, body=body, headers=cabeceras)
+        respuesta = conn.getresponse()
+        respuesta.read()
+        conn.close()
+        return respuesta.status, time.perf_counter() - inicio
+
+    def hilo_login():
+        while time.monotonic() < fin:
+            estado, latencia = peticion('POST', '/login', cuerpo)
+            with lock:
+                latencias_login.append(latencia)
+                if estado == 302:
+                    resultados['login_ok'] += 1
+                elif estado == 503:
+                    resultados['login_rechazado'] += 1
+                else:
+                    resultados['login_error'] += 1
+
+    def hilo_lector():
+        while time.monotonic() < fin:
+            _, latencia = peticion('GET', '/about')
+            with lock:
+                latencias_lectura.append(latencia)
+
+    hilos = [threading.Thread(target=hilo_login) for _ in range(n_logins)]
+    hilos += [threading.Thread(target=hilo_lector) for _ in range(n_lectores)]
+    for h in hilos:
+        h.start()
+    for h in hilos:
+        h.join()
+
+    resultados.update({
+        'logins_por_segundo': resultados['login_ok'] / duracion,
+        'login_p50_ms': percentil(latencias_login, 50),
+        'login_p99_ms': percentil(latencias_login, 99),
+        'about_peticiones': len(latencias_lectura),
+        'about_p50_ms': percentil(latencias_lectura, 50),
+        'about_p95_ms': percentil(latencias_lectura, 95),
+        'about_p99_ms': percentil(latencias_lectura, 99),
+    })
+    return resultados
+
+
+def puerto_libre():
+    with socket.socket() as s:
+        s.bind(('127.0.0.1', 0))
+        return s.getsockname()[1]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--duracion', type=float, default=10.0)
+    parser.add_argument('--logins', type=int, default=16, help='hilos lanzando logins')
+    parser.add_argument('--lectores', type=int, default=4, help='hilos pidiendo /about')
+    parser.add_argument('--procesos', type=int, default=os.cpu_count() or 2,
+                        help='procesos del pool de hash en el modo con pool')
+    args = parser.parse_args()
+
+    contexto = multiprocessing.get_context('spawn')
+    salida = {}
+    for modo, procesos in (('en_hilo', 0), ('pool_procesos', args.procesos)):
+        puerto = puerto_libre()
+        listo, parar = contexto.Event(), contexto.Event()
+        # No daemon: el servidor necesita crear su propio pool de procesos
+        proceso = contexto.Process(target=servidor, args=(puerto, procesos, listo, parar))
+        proceso.start()
+        if not listo.wait(120):
+            proceso.terminate()
+            raise SystemExit(f"El servidor del modo {modo} no arrancó")
+        try:
+            salida[modo] = ejecutar(puerto, args.duracion, args.logins, args.lectores)
+        finally:
+            parar.set()
+            proceso.join()
+    print(json.dumps(salida, indent=2))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,181 @@
+"""Sustituto local de MySQL sobre SQLite para los benchmarks de la app.
+
+ConexionLocal implementa lo que app.py usa de una conexión de
+mysql-connector (cursor con dictionary/buffered, commit, rollback, ping,
+is_connected, in_transaction, close) sobre un archivo SQLite en modo WAL,
+y traduce las pocas diferencias de sintaxis de sus consultas. Se conecta
+sustituyendo ConnectionPool._nueva_conexion, así que el pool, la medición
+de consultas y todo el código de las rutas son los reales.
+
+Sirve para comparar la app consigo misma entre commits sin servidor
+MySQL; los tiempos de base de datos no son los de producción.
+"""
+import re
+import sqlite3
+from decimal import Decimal
+
+import mysql.connector
+
+from conexion.pool import ConnectionPool
+
+ESQUEMA = """
+CREATE TABLE IF NOT EXISTS usuarios (
+    id_usuario INTEGER PRIMARY KEY AUTOINCREMENT,
+    nombre VARCHAR(255) NOT NULL,
+    mail VARCHAR(255) NOT NULL UNIQUE,
+    password VARCHAR(255) NOT NULL,
+    fecha_registro TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
+CREATE TABLE IF NOT EXISTS producto (
+    id_producto INTEGER PRIMARY KEY AUTOINCREMENT,
+    nombre VARCHAR(255) NOT NULL,
+    costo DECIMAL(10, 2) NOT NULL,
+    descripcion TEXT,
+    stock INT NOT NULL DEFAULT 0,
+    id_usuario_creador INT REFERENCES usuarios(id_usuario) ON DELETE SET NULL,
+    fecha_creacion TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
+CREATE TABLE IF NOT EXISTS usuario_producto (
+    id_relacion INTEGER PRIMARY KEY AUTOINCREMENT,
+    id_usuario INT NOT NULL REFERENCES usuarios(id_usuario) ON DELETE CASCADE,
+    id_producto INT NOT NULL REFERENCES producto(id_producto) ON DELETE CASCADE,
+    fecha_asociacion TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    UNIQUE (id_usuario, id_producto)
+);
+-- Los mismos índices que la migración 2 de conexion/migraciones.py
+CREATE INDEX IF NOT EXISTS idx_usuarios_fecha_registro ON usuarios (fecha_registro, id_usuario);
+CREATE INDEX IF NOT EXISTS idx_producto_nombre ON producto (nombre, id_producto);
+CREATE INDEX IF NOT EXISTS idx_usuario_producto_fecha
+    ON usuario_producto (id_usuario, fecha_asociacion, id_producto);
+"""
+
+# Diferencias de sintaxis que aparecen en las consultas de app.py
+TRADUCCIONES = [
+    (re.compile(r'%s'), '?'),
+    (re.compile(r'\bINSERT\s+IGNORE\b', re.IGNORECASE), 'INSERT OR IGNORE'),
+]
+ER_DUP_ENTRY = 1062
+ER_NO_REFERENCED_ROW = 1452
+
+_traducidas = {}
+
+# mysql-connector acepta Decimal como parámetro (los costos validados lo son)
+sqlite3.register_adapter(Decimal, str)
+
+
+def traducir(consulta):
+    sql = _traducidas.get(consulta)
+    if sql is None:
+        sql = consulta
+        for patron, reemplazo in TRADUCCIONES:
+            sql = patron.sub(reemplazo, sql)
+        _traducidas[consulta] = sql
+    return sql
+
+
+def _error_mysql(e):
+    """Traduce un error de sqlite3 a la excepción que lanzaría mysql-connector"""
+    if isinstance(e, sqlite3.IntegrityError):
+        errno = ER_DUP_ENTRY if 'UNIQUE' in str(e) else ER_NO_REFERENCED_ROW
+        return mysql.connector.IntegrityError(msg=str(e), errno=errno)
+    return mysql.connector.DatabaseError(msg=str(e))
+
+
+class CursorLocal:
+    def __init__(self, conn, dictionary=False):
+        self._cursor = conn.cursor()
+        self._diccionario = dictionary
+
+    @property
+    def rowcount(self):
+        return self._cursor.rowcount
+
+    @property
+    def lastrowid(self):
+        return self._cursor.lastrowid
+
+    @property
+    def description(self):
+        return self._cursor.description
+
+    def execute(self, consulta, params=()):
+        try:
+            self._cursor.execute(traducir(consulta), tuple(params or ()))
+        except sqlite3.Error as e:
+            raise _error_mysql(e) from e
+
+    def executemany(self, consulta, filas):
+        try:
+            self._cursor.executemany(traducir(consulta), [tuple(f) for f in filas])
+        except sqlite3.Error as e:
+            raise _error_mysql(e) from e
+
+    def _convertir(self, filas):
+        if not self._diccionario or not filas:
+            return filas
+        columnas = [d[0] for d in self._cursor.description]
+        return [dict(zip(columnas, fila)) for fila in filas]
+
+    def fetchone(self):
+        fila = self._cursor.fetchone()
+        return self._convertir([fila])[0] if fila is not None else None
+
+    def fetchmany(self, size=1):
+        return self._convertir(self._cursor.fetchmany(size))
+
+    def fetchall(self):
+        return self._convertir(self._cursor.fetchall())
+
+    def __iter__(self):
+        return iter(self.fetchone, None)
+
+    def close(self):
+        self._cursor.close()
+
+
+class ConexionLocal:
+    def __init__(self, ruta):
+        # El pool presta la conexión a distintos hilos, nunca a dos a la vez
+        self._conn = sqlite3.connect(ruta, timeout=30, check_same_thread=False,
+                                     detect_types=sqlite3.PARSE_DECLTYPES)
+        self._conn.execute("PRAGMA foreign_keys = ON")
+        self._conn.execute("PRAGMA synchronous = NORMAL")
+
+    @property
+    def in_transaction(self):
+        return self._conn.in_transaction
+
+    def cursor(self, dictionary=False, buffered=None):
+        return CursorLocal(self._conn, dictionary)
+
+    def commit(self):
+        try:
+            self._conn.commit()
+        except sqlite3.Error as e:
+            raise _error_mysql(e) from e
+
+    def rollback(self):
+        self._conn.rollback()
+
+    def ping(self, reconnect=False):
+        self._conn.execute("SELECT 1").fetchone()
+
+    def is_connected(self):
+        return True
+
+    def close(self):
+        self._conn.close()
+
+
+def crear_base(ruta):
+    """Crea (o abre) la base local con el esquema de la app en modo WAL"""
+    conn = sqlite3.connect(ruta)
+    conn.execute("PRAGMA journal_mode = WAL")
+    conn.executescript(ESQUEMA)
+    conn.commit()
+    return conn
+
+
+def instalar(ruta):
+    """Hace que los pools de conexiones de este proceso usen la base local"""
+    ConnectionPool._nueva_conexion = lambda self: ConexionLocal(ruta)
@@ -0,0 +1,111 @@
+"""Prueba de estrés de /procesar desde varios procesos sobre los mismos archivos.
+
+Lanza N procesos (como N workers de gunicorn), cada uno con su propia
+instancia de la app, que envían M formularios con un identificador único.
+Al terminar comprueba que datos.txt, datos.jsonl y datos.csv contienen
+exactamente N*M registros completos, sin pérdidas, duplicados ni
+registros cortados o intercalados.
+
+Uso (desde la raíz del proyecto):
+    python -m benchmarks.stress_procesar --procesos 8 --registros 500
+"""
+import argparse
+import csv
+import json
+import multiprocessing
+import os
+import sys
+import tempfile
+import time
+
+
+def worker(directorio, indice, registros, escritura_diferida):
+    os.environ['DATOS_DIR'] = directorio
+    os.environ['WRITE_BEHIND'] = '1' if escritura_diferida else '0'
+    import app as aplicacion
+
+    aplicacion.app.config.update(TESTING=True, LOGIN_DISABLED=True)
+    cliente = aplicacion.app.test_client()
+    for i in range(registros):
+        respuesta = cliente.post('/procesar', data={
+            'nombre': f'p{indice}-r{i}',
+            'mail': f'p{indice}.r{i}@ejemplo.com',
+            'edad': str(18 + i % 80),
+            'pais': 'Chile',
+            'intereses': 'Intereses con, comas y "comillas" ' + 'x' * (i % 300),
+        })
+        if respuesta.status_code != 302:
+            sys.exit(f"Respuesta inesperada {respuesta.status_code}")
+    aplicacion.escritor_datos.cerrar()
+
+
+def verificar(directorio, esperados):
+    errores = []
+
+    with open(os.path.join(directorio, 'datos.jsonl'), encoding='utf-8') as f:
+        nombres_json = []
+        for n, linea in enumerate(f, 1):
+            try:
+                nombres_json.append(json.loads(linea)['nombre'])
+            except (json.JSONDecodeError, KeyError):
+                errores.append(f"datos.jsonl: línea {n} corrupta")
+    with open(os.path.join(directorio, 'datos.csv'), encoding='utf-8', newline='') as f:
+        filas = list(csv.reader(f))
+    if filas[0][0] != 'nombre' or any(fila[0] == 'nombre' for fila in filas[1:]):
+        errores.append("datos.csv: cabecera ausente o duplicada")
+    nombres_csv = [fila[0] for fila in filas[1:] if len(fila) == 6]
+    if len(nombres_csv) != len(filas) - 1:
+        errores.append("datos.csv: filas con número de columnas incorrecto")
+    with open(os.path.join(directorio, 'datos.txt'), encoding='utf-8') as f:
+        bloques = f.read().split(f"\n{'='*50}\n")[1:]
+    nombres_txt = []
+    for bloque in bloques:
+        lineas = bloque.strip().split('\n')
+        if len(lineas) != 6 or not lineas[1].startswith('nombre: '):
+            errores.append(f"datos.txt: registro cortado o intercalado: {lineas[:2]}")
+            continue
+        nombres_txt.append(lineas[1][len('nombre: '):])
+
+    for formato, nombres in (('jsonl', nombres_json), ('csv', nombres_csv), ('txt', nombres_txt)):
+        if len(nombres) != len(esperados) or set(nombres) != esperados:
+            errores.append(f"{formato}: {len(nombres)} registros ({len(set(nombres))} únicos), "
+                           f"se esperaban {len(esperados)}")
+    return errores
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--procesos', type=int, default=8)
+    parser.add_argument('--registros', type=int, default=500, help='formularios por proceso')
+    parser.add_argument('--sincrono', action='store_true', help='desactivar la escritura diferida')
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directorio:
+        contexto = multiprocessing.get_context('spawn')
+        procesos = [
+            contexto.Process(target=worker, args=(directorio, i, args.registros, not args.sincrono))
+            for i in range(args.procesos)
+        ]
+        inicio = time.perf_counter()
+        for p in procesos:
+            p.start()
+        for p in procesos:
+            p.join()
+        duracion = time.perf_counter() - inicio
+        if any(p.exitcode for p in procesos):
+            sys.exit("❌ Algún proceso terminó con error")
+
+        esperados = {f'p{i}-r{j}' for i in range(args.procesos) for j in range(args.registros)}
+        errores = verificar(directorio, esperados)
+        total = len(esperados)
+        print(f"{total} formularios desde {args.procesos} procesos en {duracion:.2f}s "
+              f"({total / duracion:.0f}/s)")
+        if errores:
+            for error in errores:
+                print(f"❌ {error}")
+            sys.exit(1)
+        print("✅ Sin registros perdidos, duplicados ni cortados")
+
+
+if __name__ == '__main__':
+    main()
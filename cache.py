@@ -0,0 +1,155 @@
+import os
+import threading
+import time
+from collections import OrderedDict
+
+
+class CacheTTL:
+    """Caché LRU acotada con caducidad por entrada, segura entre hilos.
+
+    Guarda como máximo ``maxsize`` elementos; al superarlo se descarta el
+    menos usado recientemente. Cada entrada caduca ``ttl`` segundos después
+    de guardarse.
+    """
+
+    def __init__(self, maxsize=1024, ttl=60.0):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._datos = OrderedDict()  # clave -> (valor, instante de caducidad)
+        self._lock = threading.Lock()
+        self.aciertos = 0
+        self.fallos = 0
+        self.invalidaciones = 0
+
+    def get(self, clave):
+        """Devuelve el valor guardado o None si no está o ha caducado"""
+        ahora = time.monotonic()
+        with self._lock:
+            entrada = self._datos.get(clave)
+            if entrada is not None:
+                valor, caduca = entrada
+                if caduca > ahora:
+                    self._datos.move_to_end(clave)
+                    self.aciertos += 1
+                    return valor
+                del self._datos[clave]
+            self.fallos += 1
+            return None
+
+    def set(self, clave, valor):
+        with self._lock:
+            self._datos[clave] = (valor, time.monotonic() + self.ttl)
+            self._datos.move_to_end(clave)
+            while len(self._datos) > self.maxsize:
+                self._datos.popitem(last=False)
+
+    def invalidar(self, clave):
+        """Elimina una entrada (p. ej. cuando cambia la fila de origen)"""
+        with self._lock:
+            if self._datos.pop(clave, None) is not None:
+                self.invalidaciones += 1
+
+    def limpiar(self):
+        with self._lock:
+            self.invalidaciones += len(self._datos)
+            self._datos.clear()
+
+    def estadisticas(self):
+        with self._lock:
+            total = self.aciertos + self.fallos
+            return {
+                'tamano': len(self._datos),
+                'maxsize': self.maxsize,
+                'ttl': self.ttl,
+                'aciertos': self.aciertos,
+                'fallos': self.fallos,
+                'invalidaciones': self.invalidaciones,
+                'tasa_aciertos': self.aciertos / total if total else 0.0,
+            }
+
+
+class CacheVersionada:
+    """Caché que se vacía entera cuando cambia la versión de sus datos.
+
+    Las rutas que modifican los datos llaman a ``incrementar()``. Si se
+    indica ``archivo_version``, la versión también se publica en el mtime
+    de ese archivo, de modo que los demás workers del mismo host detectan
+    el cambio con un simple ``stat`` antes de cada lectura.
+    """
+
+    def __init__(self, maxsize=256, archivo_version=None):
+        self.maxsize = maxsize
+        self.archivo_version = archivo_version
+        self._datos = OrderedDict()
+        self._lock = threading.Lock()
+        self._version_local = 0
+        self._version_vista = None
+        self.aciertos = 0
+        self.fallos = 0
+        self.invalidaciones = 0
+
+    def _version_compartida(self):
+        if not self.archivo_version:
+            return None
+        try:
+            return os.stat(self.archivo_version).st_mtime_ns
+        except FileNotFoundError:
+            return 0
+
+    def version(self):
+        return (self._version_local, self._version_compartida())
+
+    def _comprobar_version(self):
+        version = self.version()
+        if version != self._version_vista:
+            if self._datos:
+                self.invalidaciones += 1
+            self._datos.clear()
+            self._version_vista = version
+
+    def get(self, clave):
+        with self._lock:
+            self._comprobar_version()
+            if clave in self._datos:
+                self._datos.move_to_end(clave)
+                self.aciertos += 1
+                return self._datos[clave]
+            self.fallos += 1
+            return None
+
+    def set(self, clave, valor, version=None):
+        """Guarda un valor; si se pasa la versión leída antes de la consulta
+        y ya no es la actual, el valor se descarta por estar desfasado"""
+        with self._lock:
+            self._comprobar_version()
+            if version is not None and version != self._version_vista:
+                return
+            self._datos[clave] = valor
+            self._datos.move_to_end(clave)
+            while len(self._datos) > self.maxsize:
+                self._datos.popitem(last=False)
+
+    def incrementar(self):
+        """Invalida la caché en este worker y, si procede, en los demás"""
+        with self._lock:
+            self._version_local += 1
+            if self.archivo_version:
+                actual = self._version_compartida() or 0
+                nueva = max(time.time_ns(), actual + 1)
+                with open(self.archivo_version, 'a'):
+                    pass
+                os.utime(self.archivo_version, ns=(nueva, nueva))
+            self._comprobar_version()
+
+    def estadisticas(self):
+        with self._lock:
+            total = self.aciertos + self.fallos
+            return {
+                'tamano': len(self._datos),
+                'maxsize': self.maxsize,
+                'version': list(self._version_vista or ()),
+                'aciertos': self.aciertos,
+                'fallos': self.fallos,
+                'invalidaciones': self.invalidaciones,
+                'tasa_aciertos': self.aciertos / total if total else 0.0,
+            }
@@ -1,28 +1,32 @@
+from conexion.pool import DBManager
+from mysql.connector import Error
+
 def crear_tablas():
-    # 1. Crear una instancia de la clase DBManager
-    db_manager = DBManager()
-    
-    # 2. Usar la instancia para llamar al método get_connection()
-    conn = db_manager.get_connection()
+    # 1. Crear una instancia de la clase DBManager (respaldada por el pool)
+    db_manager = DBManager(tamano=1)
     
-    if conn:
-        cursor = conn.cursor()
+    # 2. Pedir prestada una conexión del pool durante el bloque with
+    try:
+        with db_manager.conexion() as conn:
+            cursor = conn.cursor()
 
-        # Tabla usuarios
-        cursor.execute("""
-        CREATE TABLE IF NOT EXISTS usuarios (
-            id_usuario INT AUTO_INCREMENT PRIMARY KEY,
-            nombre VARCHAR(100) NOT NULL,
-            mail VARCHAR(150) NOT NULL UNIQUE
-        )
-        """)
+            # Tabla usuarios
+            cursor.execute("""
+            CREATE TABLE IF NOT EXISTS usuarios (
+                id_usuario INT AUTO_INCREMENT PRIMARY KEY,
+                nombre VARCHAR(100) NOT NULL,
+                mail VARCHAR(150) NOT NULL UNIQUE
+            )
+            """)
 
-        conn.commit()
-        cursor.close()
-        db_manager.close_connection()
+            conn.commit()
+            cursor.close()
         print("✅ Tablas creadas correctamente")
-    else:
-        print("❌ No se pudo establecer la conexión a la base de datos.")
+    except Error as e:
+        print(f"❌ No se pudo establecer la conexión a la base de datos: {e}")
+    finally:
+        db_manager.close_connection()
 
 if __name__ == "__main__":
-    crear_tablas()
\ No newline at end of file
+    # Ejecutar desde la raíz del proyecto: python -m conexion.conexion
+    crear_tablas()
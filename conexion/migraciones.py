@@ -0,0 +1,156 @@
+"""Migraciones versionadas del esquema MySQL.
+
+Cada migración es (versión, descripción, pasos) y se registra en la tabla
+esquema_version al terminar, así que volver a ejecutar el comando solo
+aplica las pendientes. Los pasos son sentencias SQL o funciones que
+reciben el cursor; los de índices comprueban antes si ya existen, porque
+en MySQL el DDL confirma por su cuenta y una migración interrumpida puede
+quedar a medias.
+
+Uso (desde la raíz del proyecto):
+    flask --app app migrar
+    flask --app app comprobar-planes
+"""
+
+TABLA_VERSION = "esquema_version"
+# GET_LOCK evita que dos workers o despliegues migren a la vez
+NOMBRE_BLOQUEO = "mi_proyecto_flask_migraciones"
+ESPERA_BLOQUEO = 60
+
+
+def crear_indice(tabla, nombre, columnas):
+    """Paso idempotente: crea el índice solo si la tabla aún no lo tiene"""
+    def paso(cursor):
+        cursor.execute("""
+            SELECT 1 FROM information_schema.statistics
+            WHERE table_schema = DATABASE() AND table_name = %s AND index_name = %s
+            LIMIT 1
+        """, (tabla, nombre))
+        if cursor.fetchone() is None:
+            cursor.execute(f"CREATE INDEX {nombre} ON {tabla} ({', '.join(columnas)})")
+    return paso
+
+
+MIGRACIONES = [
+    (1, "Tablas iniciales", [
+        """
+        CREATE TABLE IF NOT EXISTS usuarios (
+            id_usuario INT AUTO_INCREMENT PRIMARY KEY,
+            nombre VARCHAR(255) NOT NULL,
+            mail VARCHAR(255) NOT NULL UNIQUE,
+            password VARCHAR(255) NOT NULL,
+            fecha_registro TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+        """,
+        """
+        CREATE TABLE IF NOT EXISTS producto (
+            id_producto INT AUTO_INCREMENT PRIMARY KEY,
+            nombre VARCHAR(255) NOT NULL,
+            costo DECIMAL(10, 2) NOT NULL,
+            descripcion TEXT,
+            stock INT NOT NULL DEFAULT 0,
+            id_usuario_creador INT,
+            fecha_creacion TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            FOREIGN KEY (id_usuario_creador) REFERENCES usuarios(id_usuario) ON DELETE SET NULL
+        )
+        """,
+        """
+        CREATE TABLE IF NOT EXISTS usuario_producto (
+            id_relacion INT AUTO_INCREMENT PRIMARY KEY,
+            id_usuario INT NOT NULL,
+            id_producto INT NOT NULL,
+            fecha_asociacion TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            FOREIGN KEY (id_usuario) REFERENCES usuarios(id_usuario) ON DELETE CASCADE,
+            FOREIGN KEY (id_producto) REFERENCES producto(id_producto) ON DELETE CASCADE,
+            UNIQUE KEY unique_usuario_producto (id_usuario, id_producto)
+        )
+        """,
+    ]),
+    (2, "Índices para los listados por fecha, por nombre y de mis productos", [
+        # ORDER BY fecha_registro DESC, id_usuario DESC (se recorre hacia atrás)
+        crear_indice("usuarios", "idx_usuarios_fecha_registro", ["fecha_registro", "id_usuario"]),
+        # ORDER BY p.nombre, p.id_producto y el cursor nombre > ? OR (nombre = ? AND id_producto > ?)
+        crear_indice("producto", "idx_producto_nombre", ["nombre", "id_producto"]),
+        # WHERE id_usuario = ? ORDER BY fecha_asociacion DESC; con id_producto
+        # el índice cubre toda la parte de usuario_producto del JOIN
+        crear_indice("usuario_producto", "idx_usuario_producto_fecha",
+                     ["id_usuario", "fecha_asociacion", "id_producto"]),
+    ]),
+]
+
+
+def _crear_tabla_version(cursor):
+    cursor.execute(f"""
+        CREATE TABLE IF NOT EXISTS {TABLA_VERSION} (
+            version INT PRIMARY KEY,
+            descripcion VARCHAR(255) NOT NULL,
+            aplicada_en TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+    """)
+
+
+def versiones_aplicadas(cursor):
+    _crear_tabla_version(cursor)
+    cursor.execute(f"SELECT version FROM {TABLA_VERSION}")
+    return {fila[0] for fila in cursor.fetchall()}
+
+
+def aplicar_migraciones(db_manager, hasta=None):
+    """Aplica en orden las migraciones pendientes (hasta la versión indicada).
+
+    Devuelve la lista de versiones aplicadas en esta llamada; vacía si el
+    esquema ya estaba al día.
+    """
+    aplicadas = []
+    with db_manager.conexion() as conn:
+        cursor = conn.cursor()
+        cursor.execute("SELECT GET_LOCK(%s, %s)", (NOMBRE_BLOQUEO, ESPERA_BLOQUEO))
+        if cursor.fetchone()[0] != 1:
+            cursor.close()
+            raise RuntimeError("Otro proceso está aplicando las migraciones")
+        try:
+            hechas = versiones_aplicadas(cursor)
+            for version, descripcion, pasos in MIGRACIONES:
+                if version in hechas or (hasta is not None and version > hasta):
+                    continue
+                for paso in pasos:
+                    if callable(paso):
+                        paso(cursor)
+                    else:
+                        cursor.execute(paso)
+                cursor.execute(
+                    f"INSERT INTO {TABLA_VERSION} (version, descripcion) VALUES (%s, %s)",
+                    (version, descripcion)
+                )
+                conn.commit()
+                aplicadas.append(version)
+        finally:
+            cursor.execute("DO RELEASE_LOCK(%s)", (NOMBRE_BLOQUEO,))
+            cursor.close()
+    return aplicadas
+
+
+def problemas_de_plan(cursor, consulta, params=(), filas_max=1000):
+    """Ejecuta EXPLAIN y describe los recorridos completos y los filesort.
+
+    Un recorrido del índice entero (type 'index') también cuenta cuando el
+    optimizador estima leer más de ``filas_max`` filas: es lo que ocurre
+    cuando el índice da el orden pero no acota el rango.
+
+    El optimizador prefiere ordenar en memoria cuando la tabla es pequeña,
+    así que la comprobación solo es significativa con volumen realista.
+    """
+    cursor.execute("EXPLAIN " + consulta, params)
+    columnas = [d[0] for d in cursor.description]
+    problemas = []
+    for fila in cursor.fetchall():
+        fila = dict(zip(columnas, fila))
+        extra = fila.get("Extra") or ""
+        filas = int(fila.get("rows") or 0)
+        if fila.get("type") == "ALL":
+            problemas.append(f"{fila['table']}: recorre la tabla completa")
+        elif fila.get("type") == "index" and filas > filas_max:
+            problemas.append(f"{fila['table']}: recorre el índice completo (~{filas} filas)")
+        if "Using filesort" in extra:
+            problemas.append(f"{fila['table']}: ordena con filesort")
+    return problemas
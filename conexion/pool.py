@@ -0,0 +1,316 @@
+import os
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+
+import mysql.connector
+from dotenv import load_dotenv
+
+load_dotenv()
+
+
+def _config_mysql():
+    """Parámetros de conexión tomados de las variables de entorno"""
+    return {
+        'host': os.getenv("MYSQL_HOST"),
+        'user': os.getenv("MYSQL_USER"),
+        'password': os.getenv("MYSQL_PASSWORD"),
+        'database': os.getenv("MYSQL_DB"),
+        'port': int(os.getenv("MYSQL_PORT", 3306)),
+    }
+
+
+class PoolAgotadoError(mysql.connector.Error):
+    """No se obtuvo una conexión libre dentro del tiempo de espera"""
+
+
+# ==========================
+# POOL DE CONEXIONES MYSQL
+# ==========================
+
+class ConnectionPool:
+    """Pool acotado de conexiones MySQL, seguro entre hilos.
+
+    Las conexiones se crean bajo demanda hasta ``tamano`` y se reutilizan
+    en orden LIFO. Al detectar un cambio de PID (fork de un worker de
+    gunicorn) el pool se descarta y se vuelve a crear en el proceso hijo,
+    de modo que nunca se comparten sockets entre procesos.
+    """
+
+    def __init__(self, tamano=5, timeout=10.0, ping_tras=30.0, config=None):
+        self.tamano = tamano
+        self.timeout = timeout
+        self.ping_tras = ping_tras
+        self._config = config
+        self._cond = threading.Condition()
+        self._reiniciar()
+
+    def _reiniciar(self):
+        self._pid = os.getpid()
+        self._libres = deque()  # (conexion, instante de devolución)
+        self._creadas = 0
+        self._en_uso = 0
+        self._esperando = 0
+        self._stats = {
+            'prestamos': 0,
+            'esperas': 0,
+            'tiempo_espera_total': 0.0,
+            'tiempo_espera_max': 0.0,
+            'timeouts': 0,
+            'reconexiones': 0,
+        }
+
+    def _comprobar_fork(self):
+        if self._pid != os.getpid():
+            # Proceso hijo: las conexiones heredadas pertenecen al padre
+            self._cond = threading.Condition()
+            self._reiniciar()
+
+    def _nueva_conexion(self):
+        return mysql.connector.connect(**(self._config or _config_mysql()))
+
+    def _esta_viva(self, conn, devuelta_en):
+        if time.monotonic() - devuelta_en < self.ping_tras:
+            return True
+        try:
+            conn.ping(reconnect=False)
+            return True
+        except mysql.connector.Error:
+            return False
+
+    def obtener(self):
+        """Toma una conexión del pool, esperando si está lleno"""
+        self._comprobar_fork()
+        inicio = time.monotonic()
+        esperado = False
+        with self._cond:
+            while not self._libres and self._creadas >= self.tamano:
+                restante = self.timeout - (time.monotonic() - inicio)
+                if restante <= 0:
+                    self._stats['timeouts'] += 1
+                    raise PoolAgotadoError(
+                        msg=f"Pool agotado tras {self.timeout}s ({self.tamano} conexiones en uso)"
+                    )
+                esperado = True
+                self._esperando += 1
+                try:
+                    self._cond.wait(restante)
+                finally:
+                    self._esperando -= 1
+
+            espera = time.monotonic() - inicio
+            self._stats['prestamos'] += 1
+            if esperado:
+                self._stats['esperas'] += 1
+                self._stats['tiempo_espera_total'] += espera
+                self._stats['tiempo_espera_max'] = max(self._stats['tiempo_espera_max'], espera)
+
+            if self._libres:
+                conn, devuelta_en = self._libres.pop()
+            else:
+                conn, devuelta_en = None, None
+            # Se reserva el hueco antes de salir del lock
+            if conn is None:
+                self._creadas += 1
+            self._en_uso += 1
+
+        # La E/S de red (ping o conexión) se hace fuera del lock
+        try:
+            if conn is not None and not self._esta_viva(conn, devuelta_en):
+                self._cerrar(conn)
+                conn = None
+                with self._cond:
+                    self._stats['reconexiones'] += 1
+            if conn is None:
+                conn = self._nueva_conexion()
+        except Exception:
+            with self._cond:
+                self._creadas -= 1
+                self._en_uso -= 1
+                self._cond.notify()
+            raise
+        return conn
+
+    def devolver(self, conn, descartar=False):
+        """Devuelve una conexión al pool (o la cierra si quedó inservible)"""
+        if self._pid != os.getpid():
+            return
+        if not descartar:
+            try:
+                # No dejar transacciones ni snapshots abiertos para el siguiente
+                if conn.in_transaction:
+                    conn.rollback()
+            except mysql.connector.Error:
+                descartar = True
+        if descartar:
+            self._cerrar(conn)
+        with self._cond:
+            self._en_uso -= 1
+            if descartar:
+                self._creadas -= 1
+            else:
+                self._libres.append((conn, time.monotonic()))
+            self._cond.notify()
+
+    @contextmanager
+    def conexion(self):
+        """Presta una conexión durante el bloque ``with`` y la devuelve al salir"""
+        conn = self.obtener()
+        descartar = False
+        try:
+            yield conn
+        except mysql.connector.Error:
+            descartar = not conn.is_connected()
+            raise
+        finally:
+            self.devolver(conn, descartar=descartar)
+
+    @staticmethod
+    def _cerrar(conn):
+        try:
+            conn.close()
+        except Exception:
+            pass
+
+    def cerrar_todas(self):
+        """Cierra las conexiones libres (p. ej. al apagar el worker)"""
+        with self._cond:
+            libres, self._libres = self._libres, deque()
+            self._creadas -= len(libres)
+        for conn, _ in libres:
+            self._cerrar(conn)
+
+    def estadisticas(self):
+        """Métricas del pool para dimensionarlo bajo carga"""
+        self._comprobar_fork()
+        with self._cond:
+            stats = dict(self._stats)
+            stats.update({
+                'pid': self._pid,
+                'tamano_max': self.tamano,
+                'creadas': self._creadas,
+                'libres': len(self._libres),
+                'en_uso': self._en_uso,
+                'esperando': self._esperando,
+            })
+        esperas = stats['esperas']
+        stats['tiempo_espera_medio'] = stats['tiempo_espera_total'] / esperas if esperas else 0.0
+        return stats
+
+
+# ==========================
+# MEDICIÓN DE CONSULTAS
+# ==========================
+
+class CursorObservado:
+    """Envuelve un cursor y avisa a ``observar(segundos, consultas)``.
+
+    execute/executemany cuentan como una consulta; el tiempo de los
+    fetch* se suma sin contar consulta (con cursores sin buffer, leer las
+    filas es parte del coste de la consulta).
+    """
+
+    __slots__ = ('_cursor', '_observar')
+
+    def __init__(self, cursor, observar):
+        self._cursor = cursor
+        self._observar = observar
+
+    def _medir(self, metodo, consultas, args, kwargs):
+        inicio = time.perf_counter()
+        try:
+            return metodo(*args, **kwargs)
+        finally:
+            self._observar(time.perf_counter() - inicio, consultas)
+
+    def execute(self, *args, **kwargs):
+        return self._medir(self._cursor.execute, 1, args, kwargs)
+
+    def executemany(self, *args, **kwargs):
+        return self._medir(self._cursor.executemany, 1, args, kwargs)
+
+    def fetchone(self, *args, **kwargs):
+        return self._medir(self._cursor.fetchone, 0, args, kwargs)
+
+    def fetchmany(self, *args, **kwargs):
+        return self._medir(self._cursor.fetchmany, 0, args, kwargs)
+
+    def fetchall(self, *args, **kwargs):
+        return self._medir(self._cursor.fetchall, 0, args, kwargs)
+
+    def __iter__(self):
+        return iter(self._cursor)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return self._cursor.__exit__(*exc)
+
+    def __getattr__(self, nombre):
+        return getattr(self._cursor, nombre)
+
+
+class ConexionObservada:
+    """Conexión prestada cuyos cursores se miden con CursorObservado"""
+
+    __slots__ = ('_conn', '_observar')
+
+    def __init__(self, conn, observar):
+        self._conn = conn
+        self._observar = observar
+
+    def cursor(self, *args, **kwargs):
+        return CursorObservado(self._conn.cursor(*args, **kwargs), self._observar)
+
+    def __getattr__(self, nombre):
+        return getattr(self._conn, nombre)
+
+
+# ==========================
+# GESTOR DE CONEXIONES
+# ==========================
+
+class DBManager:
+    """Punto de acceso a MySQL respaldado por un ConnectionPool.
+
+    El pool se crea perezosamente en el primer uso, por lo que cada worker
+    de gunicorn construye el suyo después del fork. Si se asigna
+    ``observador_consultas`` (una función (segundos, consultas)), las
+    conexiones de ``conexion()`` miden sus consultas.
+    """
+
+    def __init__(self, tamano=None, timeout=None):
+        self._tamano = tamano or int(os.getenv("MYSQL_POOL_SIZE", 5))
+        self._timeout = timeout or float(os.getenv("MYSQL_POOL_TIMEOUT", 10))
+        self._ping_tras = float(os.getenv("MYSQL_POOL_PING_AFTER", 30))
+        self._pool = None
+        self._lock = threading.Lock()
+        self.observador_consultas = None
+
+    @property
+    def pool(self):
+        if self._pool is None:
+            with self._lock:
+                if self._pool is None:
+                    self._pool = ConnectionPool(self._tamano, self._timeout, self._ping_tras)
+        return self._pool
+
+    @contextmanager
+    def conexion(self):
+        """Context manager que presta una conexión del pool"""
+        observar = self.observador_consultas
+        with self.pool.conexion() as conn:
+            yield conn if observar is None else ConexionObservada(conn, observar)
+
+    def conexion_dedicada(self):
+        """Conexión nueva fuera del pool; quien la pide la cierra"""
+        return self.pool._nueva_conexion()
+
+    def estadisticas(self):
+        return self.pool.estadisticas()
+
+    def close_connection(self):
+        if self._pool is not None:
+            self._pool.cerrar_todas()
@@ -0,0 +1,126 @@
+import os
+import threading
+import time
+from datetime import datetime
+
+
+class SondaSalud:
+    """Comprueba la base de datos en segundo plano y guarda el resultado.
+
+    ``probar()`` debe lanzar una excepción si la base de datos no responde;
+    si responde pero con algún problema puede devolver un texto (aviso),
+    que deja el estado en 'degradado'. Un hilo lo ejecuta cada
+    ``intervalo`` segundos y las rutas de salud solo leen el último
+    resultado, sin abrir conexiones por petición.
+
+    Estados:
+      - 'iniciando': aún no hay ninguna comprobación terminada.
+      - 'ok': la última comprobación fue bien y en menos de ``umbral_lento``.
+      - 'degradado': fue bien pero tardó más que ``umbral_lento`` o devolvió
+        un aviso.
+      - 'caido': falló, o el resultado tiene más de ``max_edad`` segundos
+        (la sonda lleva demasiado tiempo bloqueada).
+
+    Como EscritorDiferido, el hilo arranca en el primer uso de cada proceso
+    y empieza por una comprobación. Hasta que termine, ``estado()`` espera
+    como mucho ``espera_inicial`` segundos (sin retener ningún lock) para
+    que la primera petición de salud tras arrancar no responda 'iniciando'
+    (503) solo porque la sonda aún no ha tenido tiempo.
+    """
+
+    def __init__(self, probar, intervalo=5.0, umbral_lento=0.25, max_edad=None, espera_inicial=1.0):
+        self._probar = probar
+        self.intervalo = intervalo
+        self.umbral_lento = umbral_lento
+        self.max_edad = max_edad if max_edad is not None else 3 * intervalo
+        self.espera_inicial = espera_inicial
+        self._lock = threading.Lock()
+        self._pid = None
+        self._hilo = None
+        self._parar = threading.Event()
+        self._primera = threading.Event()
+        self._resultado = None  # (ok, latencia_s, error, instante monotonic, fecha, aviso)
+        self.stats = {'comprobaciones': 0, 'fallos': 0, 'lentas': 0}
+
+    def _arrancar(self):
+        with self._lock:
+            if self._pid == os.getpid() and self._hilo is not None:
+                return
+            self._resultado = None
+            self._parar = parar = threading.Event()
+            self._primera = primera = threading.Event()
+            hilo = threading.Thread(target=self._bucle, args=(parar, primera), name='sonda-salud', daemon=True)
+            hilo.start()
+            # El pid se publica el último, como en EscritorDiferido
+            self._hilo = hilo
+            self._pid = os.getpid()
+
+    def _bucle(self, parar, primera):
+        try:
+            self.comprobar()
+        finally:
+            primera.set()
+        while not parar.wait(self.intervalo):
+            self.comprobar()
+
+    def comprobar(self):
+        """Ejecuta una comprobación ahora y guarda su resultado"""
+        inicio = time.monotonic()
+        error = aviso = None
+        try:
+            aviso = self._probar()
+        except Exception as e:
+            error = str(e) or e.__class__.__name__
+        fin = time.monotonic()
+        latencia = fin - inicio
+        anterior = self._resultado
+        self.stats['comprobaciones'] += 1
+        if error is not None:
+            self.stats['fallos'] += 1
+        elif latencia > self.umbral_lento:
+            self.stats['lentas'] += 1
+        # Solo se avisa en los cambios, no en cada comprobación fallida
+        if error is not None and (anterior is None or anterior[0]):
+            print(f"Error de conexión a MySQL: {error}")
+        elif error is None and anterior is not None and not anterior[0]:
+            print("✅ Conexión a MySQL recuperada")
+        self._resultado = (error is None, latencia, error, fin, datetime.now(), aviso)
+
+    def estado(self):
+        """Último resultado conocido, leído de memoria"""
+        if self._pid != os.getpid():
+            self._arrancar()
+        resultado = self._resultado
+        if resultado is None:
+            self._primera.wait(self.espera_inicial)
+            resultado = self._resultado
+        if resultado is None:
+            return {'estado': 'iniciando', 'listo': False, 'edad_s': None,
+                    'latencia_ms': None, 'error': None, 'comprobado_en': None, **self.stats}
+        ok, latencia, error, instante, fecha, aviso = resultado
+        edad = time.monotonic() - instante
+        if not ok or edad > self.max_edad:
+            estado = 'caido'
+        elif latencia > self.umbral_lento or aviso:
+            estado = 'degradado'
+        else:
+            estado = 'ok'
+        if ok and edad > self.max_edad:
+            error = f"Sin resultado nuevo desde hace {edad:.0f} s"
+        elif ok and aviso:
+            error = aviso
+        return {
+            'estado': estado,
+            'listo': estado in ('ok', 'degradado'),
+            'edad_s': round(edad, 3),
+            'latencia_ms': round(latencia * 1000, 2),
+            'error': error,
+            'comprobado_en': fecha.isoformat(),
+            **self.stats,
+        }
+
+    def cerrar(self):
+        """Detiene el hilo de este proceso (al apagar el worker)"""
+        if self._hilo is not None and self._pid == os.getpid():
+            self._parar.set()
+            self._hilo.join(timeout=1)
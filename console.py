@@ -10,7 +10,8 @@ def menu():
         print("3. Actualizar producto")
         print("4. Buscar producto")
         print("5. Mostrar todos")
-        print("6. Salir")
+        print("6. Análisis del inventario")
+        print("7. Salir")
 
         opcion = input("Seleccione una opción: ")
 
@@ -41,7 +42,9 @@ def menu():
 
         elif opcion == "4":
             nombre = input("Ingrese el nombre a buscar: ")
-            encontrados = inventario.buscar_por_nombre(nombre)
+            modo = input("Modo (1=contiene, 2=empieza por, 3=por relevancia) [1]: ")
+            modo = {"2": "prefijo", "3": "ranking"}.get(modo, "contiene")
+            encontrados = inventario.buscar_por_nombre(nombre, modo)
             if encontrados:
                 for p in encontrados:
                     print(f"[{p.id}] {p.nombre} - Cantidad: {p.cantidad}, Precio: {p.precio}")
@@ -49,10 +52,35 @@ def menu():
                 print("⚠️ No se encontraron productos.")
 
         elif opcion == "5":
-            inventario.mostrar_todos()
+            inventario.mostrar_todos(pausar=True)
 
         elif opcion == "6":
+            umbral = input("Umbral de stock bajo (enter para 5): ")
+            umbral = int(umbral) if umbral else 5
+            print(f"💰 Valor total del inventario: {inventario.valor_total():.2f}")
+            print(f"📦 Unidades en stock: {inventario.suma_por_filtro('cantidad')}")
+            media = inventario.media_por_filtro('precio')
+            print(f"🏷️ Precio medio: {media:.2f}" if media is not None else "🏷️ Precio medio: -")
+
+            print("\n🏆 Top 10 por valor en stock:")
+            for p, valor in inventario.top_por_valor(10):
+                print(f"[{p.id}] {p.nombre} - Cantidad: {p.cantidad} - Precio: {p.precio} - Valor: {valor:.2f}")
+
+            bajos = inventario.stock_bajo(umbral)
+            print(f"\n⚠️ {len(bajos)} productos con menos de {umbral} unidades:")
+            for p in bajos[:20]:
+                print(f"[{p.id}] {p.nombre} - Cantidad: {p.cantidad}")
+            if len(bajos) > 20:
+                print(f"... y {len(bajos) - 20} más")
+
+            bordes = [0, 10, 50, 100, 500, 1000, float("inf")]
+            print("\n📊 Productos por franja de precio:")
+            for desde, hasta, total in zip(bordes, bordes[1:], inventario.histograma_precios(bordes)):
+                print(f"{desde:>6} - {hasta:<6}: {total}")
+
+        elif opcion == "7":
             print("👋 Saliendo del sistema...")
+            inventario.cerrar()
             break
 
         else:
@@ -0,0 +1,155 @@
+import multiprocessing
+import os
+import threading
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures import TimeoutError as FuturoTimeoutError
+from concurrent.futures.process import BrokenProcessPool
+
+from werkzeug.security import generate_password_hash, check_password_hash
+
+
+def _generar_bloque(passwords, metodo):
+    """Tarea del pool: hashea un bloque de contraseñas en un solo envío"""
+    return [generate_password_hash(p, metodo) for p in passwords]
+
+
+class HashSaturadoError(Exception):
+    """Hay demasiados cálculos de hash en curso; se rechaza sin esperar"""
+
+
+class ServicioHash:
+    """Calcula y verifica hashes de contraseñas fuera de los hilos de petición.
+
+    El hash es deliberadamente costoso en CPU; ejecutarlo en un pool de
+    procesos evita que retenga el GIL mientras el resto de peticiones del
+    worker esperan. ``max_concurrentes`` limita los cálculos en curso (en
+    cola o ejecutándose): al superarlo se lanza HashSaturadoError de
+    inmediato en lugar de acumular una cola sin fin durante una avalancha
+    de logins. Con ``procesos=0`` el hash se calcula en el propio hilo.
+    """
+
+    def __init__(self, metodo='scrypt', procesos=2, max_concurrentes=8, timeout=10.0):
+        self.metodo = metodo
+        self.procesos = procesos
+        self.max_concurrentes = max_concurrentes
+        self.timeout = timeout
+        self._cupo = threading.BoundedSemaphore(max_concurrentes)
+        self._lock = threading.Lock()
+        self._pool = None
+        self._pid = None
+        self.stats = {'calculados': 0, 'rechazados': 0}
+
+    def _ejecutor(self):
+        if self._pid != os.getpid():
+            with self._lock:
+                if self._pid != os.getpid():
+                    # 'spawn' evita heredar hilos y sockets del worker
+                    self._pool = ProcessPoolExecutor(
+                        max_workers=self.procesos,
+                        mp_context=multiprocessing.get_context('spawn')
+                    )
+                    self._pid = os.getpid()
+        return self._pool
+
+    def _tomar_cupo(self):
+        if not self._cupo.acquire(blocking=False):
+            self.stats['rechazados'] += 1
+            raise HashSaturadoError(f"Más de {self.max_concurrentes} hashes en curso")
+
+    def _pool_roto(self):
+        # Un proceso del pool murió: se recrea en la siguiente llamada
+        with self._lock:
+            self._pid = None
+        return HashSaturadoError("El pool de hash se reinició")
+
+    def _enviar(self, funcion, *args):
+        """Envía la tarea al pool con un hueco del cupo; devuelve el futuro.
+
+        El hueco se libera cuando la tarea termina de verdad (o se cancela
+        antes de empezar), no cuando se deja de esperarla: un hash que
+        sigue en el proceso tras un timeout sigue contando como en curso.
+        """
+        self._tomar_cupo()
+        try:
+            futuro = self._ejecutor().submit(funcion, *args)
+        except BrokenProcessPool:
+            self._cupo.release()
+            raise self._pool_roto()
+        except BaseException:
+            self._cupo.release()
+            raise
+        futuro.add_done_callback(lambda _: self._cupo.release())
+        return futuro
+
+    def _esperar(self, futuro):
+        try:
+            return futuro.result(timeout=self.timeout)
+        except FuturoTimeoutError:
+            futuro.cancel()
+            self.stats['rechazados'] += 1
+            raise HashSaturadoError(f"El hash no terminó en {self.timeout}s")
+        except BrokenProcessPool:
+            raise self._pool_roto()
+
+    def _ejecutar(self, funcion, *args):
+        if not self.procesos:
+            self._tomar_cupo()
+            try:
+                self.stats['calculados'] += 1
+                return funcion(*args)
+            finally:
+                self._cupo.release()
+        futuro = self._enviar(funcion, *args)
+        self.stats['calculados'] += 1
+        return self._esperar(futuro)
+
+    def generar(self, password):
+        return self._ejecutar(generate_password_hash, password, self.metodo)
+
+    def generar_varios(self, passwords, tamano_bloque=4):
+        """Hashea una lista de contraseñas en bloques repartidos entre los procesos.
+
+        Cada bloque es una tarea con su propio hueco del cupo y su propio
+        timeout, y nunca hay más de ``procesos`` bloques en vuelo: un login
+        que llega en medio de una importación espera a que termine un
+        bloque, no el lote entero. Si un bloque falla se lanza
+        HashSaturadoError y se cancelan los pendientes.
+        """
+        bloques = [passwords[i:i + tamano_bloque] for i in range(0, len(passwords), tamano_bloque)]
+        hashes = []
+        if not self.procesos:
+            for bloque in bloques:
+                hashes += self._ejecutar(_generar_bloque, bloque, self.metodo)
+            return hashes
+        en_vuelo = deque()
+        try:
+            for bloque in bloques:
+                if len(en_vuelo) >= self.procesos:
+                    hashes += self._esperar(en_vuelo.popleft())
+                en_vuelo.append(self._enviar(_generar_bloque, bloque, self.metodo))
+                self.stats['calculados'] += len(bloque)
+            while en_vuelo:
+                hashes += self._esperar(en_vuelo.popleft())
+        finally:
+            for futuro in en_vuelo:
+                futuro.cancel()
+        return hashes
+
+    def verificar(self, password_hash, password):
+        return self._ejecutar(check_password_hash, password_hash, password)
+
+    def cerrar(self):
+        if self._pool is not None and self._pid == os.getpid():
+            self._pool.shutdown(wait=True, cancel_futures=True)
+            self._pool = None
+            self._pid = None
+
+    def estadisticas(self):
+        stats = dict(self.stats)
+        stats.update({
+            'metodo': self.metodo,
+            'procesos': self.procesos,
+            'max_concurrentes': self.max_concurrentes,
+        })
+        return stats
@@ -0,0 +1,180 @@
+import heapq
+from array import array
+
+MODOS_BUSQUEDA = ('contiene', 'prefijo', 'ranking')
+
+
+def _trigramas(texto):
+    return {texto[i:i + 3] for i in range(len(texto) - 2)}
+
+
+def _validar_modo(modo):
+    if modo not in MODOS_BUSQUEDA:
+        raise ValueError(f"Modo de búsqueda no válido: {modo}")
+
+
+def _ordenar(nombres, ids, consulta, modo, limite):
+    """Ordena los ids coincidentes por id o, en modo 'ranking', por relevancia"""
+    if modo == 'ranking':
+        return _ordenar_por_relevancia(nombres, ids, consulta, limite)
+    if limite is not None:
+        return heapq.nsmallest(limite, ids)
+    ids.sort()
+    return ids
+
+
+def _ordenar_por_relevancia(nombres, ids, consulta, limite):
+    inicio_palabra = ' ' + consulta
+
+    def relevancia(id):
+        texto = nombres[id]
+        posicion = texto.find(consulta, 1) - 1
+        if len(texto) - 1 == len(consulta):
+            clase = 0  # nombre exacto
+        elif posicion == 0:
+            clase = 1  # empieza por la consulta
+        elif inicio_palabra in texto:
+            clase = 2  # alguna palabra empieza por la consulta
+        else:
+            clase = 3
+        return clase, posicion, len(texto), id
+
+    if limite is not None:
+        return heapq.nsmallest(limite, ids, key=relevancia)
+    return sorted(ids, key=relevancia)
+
+
+def filtrar_nombres(productos, texto, modo='contiene', limite=None):
+    """Como IndiceNombres.buscar, pero recorriendo una lista de (id, nombre).
+
+    Pensado para candidatos ya acotados por otro medio (por ejemplo un
+    LIKE en SQLite), donde construir el índice no compensa.
+    """
+    _validar_modo(modo)
+    consulta = texto.lower()
+    nombres = {id: ' ' + nombre.lower() for id, nombre in productos}
+    patron, desde = (' ' + consulta, 0) if modo == 'prefijo' else (consulta, 1)
+    ids = [id for id, texto in nombres.items() if texto.find(patron, desde) >= 0]
+    return _ordenar(nombres, ids, consulta, modo, limite)
+
+
+class IndiceNombres:
+    """Índice en memoria para buscar productos por nombre.
+
+    Guarda cada nombre ya en minúsculas (con un espacio delante, para que
+    el inicio del nombre cuente como inicio de palabra) y un índice
+    invertido trigrama -> ids en arrays compactos. Una búsqueda intersecta
+    las listas más cortas de los trigramas de la consulta y solo compara
+    el texto de los candidatos que quedan. Las consultas de menos de 3
+    caracteres recorren los nombres precalculados, sin llamar a lower()
+    por producto.
+
+    Eliminar o renombrar no reescribe las listas: las entradas viejas se
+    descartan al verificar el texto y, cuando superan a las vivas, se
+    reconstruye el índice.
+
+    Modos de ``buscar``:
+      - 'contiene': el nombre contiene el texto (como antes), por id.
+      - 'prefijo': el nombre o alguna de sus palabras empieza por el texto.
+      - 'ranking': como 'contiene', ordenado por relevancia (coincidencia
+        exacta, inicio del nombre, inicio de palabra, posición, longitud).
+    """
+
+    def __init__(self, productos=()):
+        self._nombres = {}  # id -> ' ' + nombre en minúsculas
+        self._trigramas = {}  # trigrama -> array de ids
+        self._entradas = 0
+        self._obsoletas = 0
+        for id, nombre in productos:
+            self.agregar(id, nombre)
+
+    def __len__(self):
+        return len(self._nombres)
+
+    def _indexar(self, id, trigramas):
+        listas = self._trigramas
+        for trigrama in trigramas:
+            ids = listas.get(trigrama)
+            if ids is None:
+                listas[trigrama] = array('q', (id,))
+            else:
+                ids.append(id)
+        self._entradas += len(trigramas)
+
+    def agregar(self, id, nombre):
+        texto = ' ' + nombre.lower()
+        anterior = self._nombres.get(id)
+        if anterior == texto:
+            return
+        nuevos = _trigramas(texto)
+        if anterior is not None:
+            viejos = _trigramas(anterior)
+            self._obsoletas += len(viejos - nuevos)
+            nuevos -= viejos
+        # Reasignar una clave existente conserva su posición (orden por id)
+        self._nombres[id] = texto
+        self._indexar(id, nuevos)
+        self._compactar_si_hace_falta()
+
+    actualizar = agregar
+
+    def eliminar(self, id):
+        texto = self._nombres.pop(id, None)
+        if texto is not None:
+            self._obsoletas += len(_trigramas(texto))
+            self._compactar_si_hace_falta()
+
+    def _compactar_si_hace_falta(self):
+        if self._obsoletas > 1024 and self._obsoletas * 2 > self._entradas:
+            self.reconstruir()
+
+    def reconstruir(self):
+        """Rehace las listas de trigramas solo con los nombres vigentes"""
+        self._trigramas = {}
+        self._entradas = 0
+        self._obsoletas = 0
+        for id, texto in self._nombres.items():
+            self._indexar(id, _trigramas(texto))
+
+    def _coincidencias(self, patron, desde):
+        nombres = self._nombres
+        if desde and not patron.startswith(' '):
+            # El patrón no puede coincidir con el espacio inicial: basta con 'in'
+            desde = 0
+        trigramas = _trigramas(patron)
+        if not trigramas:
+            if not desde:
+                return [id for id, texto in nombres.items() if patron in texto]
+            return [id for id, texto in nombres.items() if texto.find(patron, desde) >= 0]
+        listas = []
+        for trigrama in trigramas:
+            ids = self._trigramas.get(trigrama)
+            if not ids:
+                return []
+            listas.append(ids)
+        listas.sort(key=len)
+        # set() también quita los ids repetidos que deja un renombrado
+        candidatos = set(listas[0])
+        for ids in listas[1:]:
+            # Intersecar (en C) compensa mientras la lista no sea mucho mayor
+            # que los candidatos que quedan por verificar uno a uno
+            if len(candidatos) < 64 or len(ids) > 8 * len(candidatos):
+                break
+            candidatos = candidatos.intersection(ids)
+        ids = []
+        for id in candidatos:
+            texto = nombres.get(id)
+            if texto is not None and (patron in texto if not desde else texto.find(patron, desde) >= 0):
+                ids.append(id)
+        return ids
+
+    def buscar(self, texto, modo='contiene', limite=None):
+        """Devuelve la lista de ids que coinciden con ``texto`` según ``modo``"""
+        _validar_modo(modo)
+        consulta = texto.lower()
+        if modo == 'prefijo':
+            ids = self._coincidencias(' ' + consulta, 0)
+        else:
+            # Desde la posición 1: el espacio inicial no forma parte del nombre
+            ids = self._coincidencias(consulta, 1)
+        return _ordenar(self._nombres, ids, consulta, modo, limite)
@@ -0,0 +1,180 @@
+import heapq
+import operator
+from array import array
+from bisect import bisect_right
+from itertools import compress
+
+try:
+    import numpy as np
+except ImportError:  # opcional: sin NumPy se usan las funciones nativas sobre array
+    np = None
+
+
+class ColumnasInventario:
+    """Vista columnar del inventario para cálculos agregados.
+
+    Guarda id, cantidad y precio en tres ``array`` contiguos (en lugar de
+    recorrer objetos Producto) y un diccionario id -> posición para
+    mantenerlos al día en O(1); al eliminar, el último elemento ocupa el
+    hueco. Los agregados usan bucles en C (sum/map sobre los arrays) y, si
+    NumPy está instalado, vistas sin copia de esos mismos arrays.
+    """
+
+    def __init__(self, productos=()):
+        self.ids = array('q')
+        self.cantidades = array('q')
+        self.precios = array('d')
+        self._posiciones = {}
+        for producto in productos:
+            self.agregar(producto.id, producto.cantidad, producto.precio)
+
+    def __len__(self):
+        return len(self.ids)
+
+    def agregar(self, id, cantidad, precio):
+        if id in self._posiciones:
+            self.actualizar(id, cantidad, precio)
+            return
+        self._posiciones[id] = len(self.ids)
+        self.ids.append(id)
+        self.cantidades.append(cantidad)
+        self.precios.append(precio)
+
+    def actualizar(self, id, cantidad, precio):
+        posicion = self._posiciones.get(id)
+        if posicion is None:
+            self.agregar(id, cantidad, precio)
+            return
+        self.cantidades[posicion] = cantidad
+        self.precios[posicion] = precio
+
+    def eliminar(self, id):
+        posicion = self._posiciones.pop(id, None)
+        if posicion is None:
+            return
+        ultima = len(self.ids) - 1
+        if posicion != ultima:
+            self.ids[posicion] = self.ids[ultima]
+            self.cantidades[posicion] = self.cantidades[ultima]
+            self.precios[posicion] = self.precios[ultima]
+            self._posiciones[self.ids[posicion]] = posicion
+        self.ids.pop()
+        self.cantidades.pop()
+        self.precios.pop()
+
+    # Las vistas NumPy se crean en cada llamada: un array con buffers
+    # exportados no puede crecer, así que no deben sobrevivir a la consulta
+    def _vistas(self):
+        return (np.frombuffer(self.ids, dtype=np.int64),
+                np.frombuffer(self.cantidades, dtype=np.int64),
+                np.frombuffer(self.precios, dtype=np.float64))
+
+    def valor_total(self):
+        """Suma de cantidad * precio de todo el inventario"""
+        if np is not None and self.ids:
+            _, cantidades, precios = self._vistas()
+            return float(np.dot(cantidades, precios))
+        return sum(map(operator.mul, self.cantidades, self.precios))
+
+    def _seleccion(self, cantidad_min=None, cantidad_max=None, precio_min=None, precio_max=None):
+        """Máscara de los productos dentro de los rangos indicados (None = sin límite)"""
+        if np is not None:
+            _, cantidades, precios = self._vistas()
+            mascara = np.ones(len(cantidades), dtype=bool)
+            if cantidad_min is not None:
+                mascara &= cantidades >= cantidad_min
+            if cantidad_max is not None:
+                mascara &= cantidades <= cantidad_max
+            if precio_min is not None:
+                mascara &= precios >= precio_min
+            if precio_max is not None:
+                mascara &= precios <= precio_max
+            return mascara
+        # Límites de precio a float: int.__le__(float) devolvería NotImplemented
+        condiciones = []
+        if cantidad_min is not None:
+            condiciones.append(map(cantidad_min.__le__, self.cantidades))
+        if cantidad_max is not None:
+            condiciones.append(map(cantidad_max.__ge__, self.cantidades))
+        if precio_min is not None:
+            condiciones.append(map(float(precio_min).__le__, self.precios))
+        if precio_max is not None:
+            condiciones.append(map(float(precio_max).__ge__, self.precios))
+        if not condiciones:
+            return None
+        mascara = condiciones[0]
+        for condicion in condiciones[1:]:
+            mascara = map(operator.and_, mascara, condicion)
+        return list(mascara)
+
+    def _columna(self, columna, mascara):
+        """Valores de 'cantidad', 'precio' o 'valor' de los productos seleccionados"""
+        if columna not in ('cantidad', 'precio', 'valor'):
+            raise ValueError(f"Columna no válida: {columna}")
+        if np is not None:
+            _, cantidades, precios = self._vistas()
+            valores = {'cantidad': cantidades, 'precio': precios}.get(columna)
+            if valores is None:
+                valores = cantidades * precios
+            return valores if mascara is None else valores[mascara]
+        if columna == 'valor':
+            valores = map(operator.mul, self.cantidades, self.precios)
+        else:
+            valores = self.cantidades if columna == 'cantidad' else self.precios
+        return list(valores if mascara is None else compress(valores, mascara))
+
+    def suma(self, columna='valor', **rangos):
+        """Suma de una columna para los productos que cumplen los rangos"""
+        valores = self._columna(columna, self._seleccion(**rangos))
+        return valores.sum().item() if np is not None else sum(valores)
+
+    def media(self, columna='valor', **rangos):
+        """Media de una columna para los productos que cumplen los rangos (None si no hay)"""
+        valores = self._columna(columna, self._seleccion(**rangos))
+        if not len(valores):
+            return None
+        return valores.mean().item() if np is not None else sum(valores) / len(valores)
+
+    def top_por_valor(self, n=10):
+        """Los n productos de mayor valor en stock, como [(id, valor)]"""
+        if np is not None and self.ids:
+            ids, cantidades, precios = self._vistas()
+            valores = cantidades * precios
+            n = min(n, len(valores))
+            # argpartition es O(N); solo se ordenan los n elegidos
+            elegidos = np.argpartition(-valores, n - 1)[:n]
+            elegidos = elegidos[np.argsort(-valores[elegidos], kind='stable')]
+            return [(int(ids[i]), float(valores[i])) for i in elegidos]
+        valores = array('d', map(operator.mul, self.cantidades, self.precios))
+        mayores = heapq.nlargest(n, valores)
+        if not mayores:
+            return []
+        # nlargest sobre floats sueltos es mucho más rápido que con key=;
+        # luego solo se localizan las posiciones que alcanzan el umbral
+        umbral = mayores[-1]
+        elegidos = list(compress(range(len(valores)), map(umbral.__le__, valores)))
+        elegidos.sort(key=valores.__getitem__, reverse=True)
+        return [(self.ids[i], valores[i]) for i in elegidos[:n]]
+
+    def stock_bajo(self, umbral):
+        """Ids de los productos con cantidad por debajo del umbral"""
+        if np is not None:
+            ids, cantidades, _ = self._vistas()
+            return ids[cantidades < umbral].tolist()
+        return list(compress(self.ids, map(umbral.__gt__, self.cantidades)))
+
+    def histograma_precios(self, bordes):
+        """Cuántos productos caen en cada franja [bordes[i], bordes[i+1]).
+
+        Los precios por debajo del primer borde o desde el último se
+        descartan.
+        """
+        bordes = sorted(bordes)
+        if np is not None:
+            _, _, precios = self._vistas()
+            conteos, _ = np.histogram(precios[(precios >= bordes[0]) & (precios < bordes[-1])], bins=bordes)
+            return conteos.tolist()
+        conteos = [0] * (len(bordes) + 1)
+        for precio in self.precios:
+            conteos[bisect_right(bordes, precio)] += 1
+        return conteos[1:-1]
@@ -1,10 +1,61 @@
 import sqlite3
 import os
+import atexit
+import threading
 
 DB_PATH = os.path.join(os.path.dirname(__file__), "inventario.db")
 
+# Ajustes por conexión: WAL permite leer mientras otro proceso escribe y,
+# con synchronous=NORMAL, cada commit ya no espera un fsync (solo los
+# checkpoints). cache_size negativo son KiB.
+PRAGMAS = {
+    "journal_mode": os.getenv("SQLITE_JOURNAL_MODE", "WAL"),
+    "synchronous": os.getenv("SQLITE_SYNCHRONOUS", "NORMAL"),
+    "cache_size": int(os.getenv("SQLITE_CACHE_KB", 65536)) * -1,
+    "mmap_size": int(os.getenv("SQLITE_MMAP_MB", 256)) * 1024 * 1024,
+    "temp_store": "MEMORY",
+    "busy_timeout": int(os.getenv("SQLITE_BUSY_TIMEOUT_MS", 5000)),
+}
+SENTENCIAS_EN_CACHE = 256
+
+_local = threading.local()
+
+
+def ajustar_conexion(conn):
+    """Aplica los PRAGMA de rendimiento a una conexión ya abierta"""
+    for pragma, valor in PRAGMAS.items():
+        conn.execute(f"PRAGMA {pragma}={valor}")
+    return conn
+
+
 def get_connection():
-    return sqlite3.connect(DB_PATH)
+    """Conexión persistente de este hilo (se abre y ajusta solo la primera vez).
+
+    No hay que cerrarla tras cada operación: reutilizarla evita abrir el
+    archivo y leer el esquema en cada llamada, y sqlite3 guarda las
+    sentencias ya preparadas. Se vuelve a abrir si cambia DB_PATH o tras
+    un fork.
+    """
+    clave = (os.getpid(), DB_PATH)
+    conn = getattr(_local, "conn", None)
+    if conn is None or _local.clave != clave:
+        conn = ajustar_conexion(sqlite3.connect(DB_PATH, cached_statements=SENTENCIAS_EN_CACHE))
+        _local.conn, _local.clave = conn, clave
+    return conn
+
+
+def cerrar_conexion():
+    """Cierra la conexión de este hilo, si la hay"""
+    conn = getattr(_local, "conn", None)
+    if conn is not None:
+        if _local.clave[0] == os.getpid():
+            conn.close()
+        _local.conn = None
+
+
+# Al cerrar la última conexión SQLite vuelca el WAL al archivo principal
+atexit.register(cerrar_conexion)
+
 
 def crear_tabla():
     conn = get_connection()
@@ -18,4 +69,42 @@ def crear_tabla():
         )
     """)
     conn.commit()
-    conn.close()
+    crear_registro_cambios(conn)
+
+
+# Registro de cambios: cada escritura en productos (venga del proceso que
+# venga) deja el id afectado, para que las cachés de otros procesos
+# apliquen solo esas filas en vez de recargar todo.
+CAMBIOS_A_CONSERVAR = int(os.getenv("INVENTARIO_CAMBIOS_A_CONSERVAR", 100000))
+
+
+def crear_registro_cambios(conn):
+    """Crea la tabla productos_cambios y sus triggers si no existen"""
+    conn.executescript("""
+        CREATE TABLE IF NOT EXISTS productos_cambios (
+            seq INTEGER PRIMARY KEY AUTOINCREMENT,
+            id INTEGER NOT NULL
+        );
+        CREATE TRIGGER IF NOT EXISTS productos_cambios_insert AFTER INSERT ON productos
+        BEGIN
+            INSERT INTO productos_cambios (id) VALUES (NEW.id);
+        END;
+        CREATE TRIGGER IF NOT EXISTS productos_cambios_update AFTER UPDATE ON productos
+        BEGIN
+            INSERT INTO productos_cambios (id) VALUES (NEW.id);
+            INSERT INTO productos_cambios (id) SELECT OLD.id WHERE OLD.id != NEW.id;
+        END;
+        CREATE TRIGGER IF NOT EXISTS productos_cambios_delete AFTER DELETE ON productos
+        BEGIN
+            INSERT INTO productos_cambios (id) VALUES (OLD.id);
+        END;
+    """)
+
+
+def podar_registro_cambios(conn):
+    """Borra las entradas antiguas; quien se quede atrás recargará entera su caché"""
+    with conn:
+        conn.execute(
+            "DELETE FROM productos_cambios WHERE seq <= (SELECT MAX(seq) FROM productos_cambios) - ?",
+            (CAMBIOS_A_CONSERVAR,)
+        )
@@ -0,0 +1,98 @@
+import hashlib
+import os
+import struct
+import zlib
+from array import array
+
+# Instantánea del catálogo para arrancar sin releer la tabla: una cabecera
+# y cuatro bloques binarios (ids, cantidades, precios y los nombres en
+# UTF-8 separados por '\0') que se leen con array.fromfile, sin una fila
+# Python por producto. Es una caché local: se usa el orden de bytes nativo.
+MAGICO = b'INVSNAP1'
+# mágico, secuencia del registro de cambios, filas, id máximo,
+# bytes de nombres, crc32 de los bloques, hash del esquema
+CABECERA = struct.Struct('=8sqqqqI20s')
+
+
+def estado_db(conn):
+    """(secuencia de cambios, filas, id máximo, hash del esquema) de la BD.
+
+    La secuencia sale de sqlite_sequence: no retrocede aunque se pode el
+    registro de cambios, así que cualquier escritura la hace avanzar.
+    """
+    fila = conn.execute("SELECT seq FROM sqlite_sequence WHERE name='productos_cambios'").fetchone()
+    secuencia = fila[0] if fila else 0
+    filas, id_maximo = conn.execute("SELECT COUNT(*), COALESCE(MAX(id), 0) FROM productos").fetchone()
+    esquema = conn.execute(
+        "SELECT group_concat(sql, ';') FROM (SELECT sql FROM sqlite_master "
+        "WHERE tbl_name IN ('productos', 'productos_cambios') ORDER BY name)"
+    ).fetchone()[0] or ''
+    return secuencia, filas, id_maximo, hashlib.sha1(esquema.encode()).digest()
+
+
+def guardar_instantanea(ruta, productos, estado):
+    """Escribe la instantánea de forma atómica (archivo temporal + rename).
+
+    Devuelve False sin escribir nada si algún nombre contiene '\\0'.
+    """
+    ids, cantidades, precios, nombres = array('q'), array('q'), array('d'), []
+    for p in productos:
+        ids.append(p.id)
+        cantidades.append(p.cantidad)
+        precios.append(p.precio)
+        nombres.append(p.nombre)
+    texto = '\0'.join(nombres)
+    if texto.count('\0') != max(len(nombres) - 1, 0):
+        return False
+    bloques = [ids.tobytes(), cantidades.tobytes(), precios.tobytes(), texto.encode()]
+    crc = 0
+    for bloque in bloques:
+        crc = zlib.crc32(bloque, crc)
+    secuencia, filas, id_maximo, esquema = estado
+    temporal = f"{ruta}.{os.getpid()}.tmp"
+    try:
+        with open(temporal, 'wb') as f:
+            f.write(CABECERA.pack(MAGICO, secuencia, filas, id_maximo, len(bloques[3]), crc, esquema))
+            for bloque in bloques:
+                f.write(bloque)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(temporal, ruta)
+    except OSError:
+        if os.path.exists(temporal):
+            os.remove(temporal)
+        raise
+    return True
+
+
+def cargar_instantanea(ruta, estado):
+    """Lee la instantánea si existe, está íntegra y corresponde a ``estado``.
+
+    Devuelve (ids, nombres, cantidades, precios) o None; en ese caso hay
+    que cargar desde la base de datos.
+    """
+    try:
+        with open(ruta, 'rb') as f:
+            cabecera = f.read(CABECERA.size)
+            if len(cabecera) != CABECERA.size:
+                return None
+            magico, secuencia, filas, id_maximo, bytes_nombres, crc, esquema = CABECERA.unpack(cabecera)
+            if magico != MAGICO or (secuencia, filas, id_maximo, esquema) != tuple(estado):
+                return None
+            ids, cantidades, precios = array('q'), array('q'), array('d')
+            for columna in (ids, cantidades, precios):
+                columna.fromfile(f, filas)
+            datos_nombres = f.read(bytes_nombres)
+    except (OSError, EOFError):
+        return None
+    if len(datos_nombres) != bytes_nombres:
+        return None
+    calculado = 0
+    for bloque in (ids, cantidades, precios, datos_nombres):
+        calculado = zlib.crc32(bloque, calculado)
+    if calculado != crc:
+        return None
+    nombres = datos_nombres.decode().split('\0') if filas else []
+    if len(nombres) != filas:
+        return None
+    return ids, nombres, cantidades, precios
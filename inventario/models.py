@@ -1,6 +1,25 @@
-from inventario.db import get_connection, crear_tabla
+import os
+import sqlite3
+from contextlib import contextmanager
+
+from inventario.db import get_connection, crear_tabla, podar_registro_cambios
+from inventario.busqueda import IndiceNombres, filtrar_nombres, MODOS_BUSQUEDA
+from inventario.columnas import ColumnasInventario
+from inventario.instantanea import estado_db, guardar_instantanea, cargar_instantanea
+
+# Modo perezoso: no se carga el catálogo al arrancar; se leen páginas por
+# id bajo demanda y las consultas por id van directas a la clave primaria
+INVENTARIO_PEREZOSO = os.getenv('INVENTARIO_PEREZOSO', '0') == '1'
+TAMANO_PAGINA = int(os.getenv('INVENTARIO_TAMANO_PAGINA', 50))
+# Ruta de la instantánea para arrancar sin releer la tabla ('' la desactiva)
+INVENTARIO_INSTANTANEA = os.getenv('INVENTARIO_INSTANTANEA', '')
+# Cada cuántos commits propios se poda el registro de cambios (además de al arrancar)
+PODAR_REGISTRO_CADA = int(os.getenv('INVENTARIO_PODAR_CADA', 1000))
 
 class Producto:
+    # Sin __dict__ por instancia: con millones de productos la diferencia es de cientos de MB
+    __slots__ = ('id', 'nombre', 'cantidad', 'precio')
+
     def __init__(self, id, nombre, cantidad, precio):
         self.id = id
         self.nombre = nombre
@@ -8,74 +27,483 @@ class Producto:
         self.precio = precio
 
 class Inventario:
-    def __init__(self):
+    def __init__(self, perezoso=None, instantanea=None):
         crear_tabla()
-        self._cache = []
-        self._cargar_cache()
+        self.perezoso = INVENTARIO_PEREZOSO if perezoso is None else perezoso
+        self.instantanea = INVENTARIO_INSTANTANEA if instantanea is None else instantanea
+        # id -> Producto, en orden de id (los ids nuevos siempre son mayores).
+        # En modo perezoso solo guarda los productos ya consultados, sin orden.
+        self._cache = {}
+        self._indice = None  # índice de nombres, se construye en la primera búsqueda
+        self._columnas = None  # vista columnar, se construye en el primer análisis
+        self._conn_lote = None  # conexión con un lote() abierto
+        self._ultimo_cambio = 0  # último seq de productos_cambios aplicado
+        self._data_version = None  # (conexión, PRAGMA data_version) de la última comprobación
+        self._commits_sin_podar = 0
+        podar_registro_cambios(get_connection())
+        if self.perezoso or not self.instantanea or not self._cargar_instantanea():
+            self._cargar_cache()
 
     def _cargar_cache(self):
         conn = get_connection()
         cur = conn.cursor()
-        cur.execute("SELECT id, nombre, cantidad, precio FROM productos ORDER BY id")
-        filas = cur.fetchall()
-        self._cache = [Producto(*fila) for fila in filas]
-        conn.close()
+        # Primero la posición en el registro: un cambio que entre mientras se
+        # leen las filas se volverá a aplicar después, lo que es inocuo
+        self._data_version = (conn, cur.execute("PRAGMA data_version").fetchone()[0])
+        self._ultimo_cambio = cur.execute("SELECT COALESCE(MAX(seq), 0) FROM productos_cambios").fetchone()[0]
+        if self.perezoso:
+            self._cache = {}
+        else:
+            cur.execute("SELECT id, nombre, cantidad, precio FROM productos ORDER BY id")
+            self._cache = {fila[0]: Producto(*fila) for fila in cur.fetchall()}
+        cur.close()
+        self._indice = None
+        self._columnas = None
+
+    def _cargar_instantanea(self):
+        """Llena la caché desde la instantánea si sigue al día con la BD"""
+        conn = get_connection()
+        # Como en _cargar_cache, la posición en el registro se lee antes
+        # que el estado con el que se valida la instantánea
+        data_version = conn.execute("PRAGMA data_version").fetchone()[0]
+        ultimo_cambio = conn.execute("SELECT COALESCE(MAX(seq), 0) FROM productos_cambios").fetchone()[0]
+        datos = cargar_instantanea(self.instantanea, estado_db(conn))
+        if datos is None:
+            return False
+        self._data_version = (conn, data_version)
+        self._ultimo_cambio = ultimo_cambio
+        ids, nombres, cantidades, precios = datos
+        self._cache = dict(zip(ids, map(Producto, ids, nombres, cantidades, precios)))
+        self._indice = None
+        self._columnas = None
+        return True
+
+    def guardar_instantanea(self):
+        """Escribe la instantánea de la caché; devuelve si se pudo.
+
+        Solo se escribe si la caché coincide con la BD: ninguna otra
+        conexión ha confirmado nada desde la última sincronización.
+        """
+        if self.perezoso or not self.instantanea:
+            return False
+        self._sincronizar()
+        conn = get_connection()
+        estado = estado_db(conn)
+        if (conn, conn.execute("PRAGMA data_version").fetchone()[0]) != self._data_version:
+            return False
+        _, filas, id_maximo, _ = estado
+        if filas != len(self._cache) or id_maximo != max(self._cache, default=0):
+            return False
+        try:
+            return guardar_instantanea(self.instantanea, self._cache.values(), estado)
+        except OSError as e:
+            print(f"Error al guardar la instantánea del inventario: {e}")
+            return False
+
+    def cerrar(self):
+        """Cierre ordenado: deja la instantánea escrita para el próximo arranque"""
+        self.guardar_instantanea()
+
+    def _sincronizar(self):
+        """Aplica a la caché lo que otras conexiones hayan confirmado en productos.
+
+        PRAGMA data_version solo cambia cuando otra conexión confirma una
+        escritura, así que en el caso habitual esto es una única consulta
+        sin leer ninguna tabla. Si cambió, se leen los ids del registro de
+        cambios y se recargan solo esas filas.
+        """
+        conn = get_connection()
+        if conn is self._conn_lote:
+            return  # dentro de un lote la caché ya refleja nuestra transacción
+        version = (conn, conn.execute("PRAGMA data_version").fetchone()[0])
+        if version == self._data_version:
+            return
+        self._data_version = version
+        cambios = conn.execute(
+            "SELECT seq, id FROM productos_cambios WHERE seq > ? ORDER BY seq", (self._ultimo_cambio,)
+        ).fetchall()
+        if not cambios:
+            return
+        ids = list(dict.fromkeys(id for _, id in cambios))
+        if cambios[0][0] > self._ultimo_cambio + 1 or len(ids) > max(1000, len(self._cache) // 4):
+            # El registro se podó por delante de nosotros, o hay tanto que
+            # recargar todo sale más barato
+            self._cargar_cache()
+            return
+        filas = self._leer_filas(conn, ids)
+        # La caché completa está en orden de id (listar_todos y paginas lo
+        # prometen); un alta ajena puede traer un id menor que los ya vistos
+        maximo = next(reversed(self._cache), 0)
+        desordenada = False
+        for id in ids:
+            fila = filas.get(id)
+            if fila is None:
+                self._quitar_de_cache(id)
+                continue
+            nuevo = id not in self._cache
+            self._poner_en_cache(*fila)
+            if nuevo and not self.perezoso:
+                desordenada = desordenada or id < maximo
+                maximo = max(maximo, id)
+        if desordenada:
+            self._cache = dict(sorted(self._cache.items()))
+        self._ultimo_cambio = cambios[-1][0]
+
+    @staticmethod
+    def _leer_filas(conn, ids):
+        """Filas de productos con esos ids, como {id: fila}, en bloques de 500"""
+        filas = {}
+        for i in range(0, len(ids), 500):
+            bloque = ids[i:i + 500]
+            marcadores = ', '.join('?' * len(bloque))
+            for fila in conn.execute(
+                f"SELECT id, nombre, cantidad, precio FROM productos WHERE id IN ({marcadores})", bloque
+            ):
+                filas[fila[0]] = fila
+        return filas
+
+    def _poner_en_cache(self, id, nombre, cantidad, precio):
+        """Inserta o actualiza en sitio un producto leído de la BD.
+
+        En modo perezoso un producto que no se había consultado no se
+        añade: la caché no pretende estar completa.
+        """
+        producto = self._cache.get(id)
+        if producto is not None:
+            producto.nombre, producto.cantidad, producto.precio = nombre, cantidad, precio
+        elif not self.perezoso:
+            self._cache[id] = Producto(id, nombre, cantidad, precio)
+        if self._indice is not None:
+            self._indice.agregar(id, nombre)
+        if self._columnas is not None:
+            self._columnas.agregar(id, cantidad, precio)
+
+    def _quitar_de_cache(self, id):
+        self._cache.pop(id, None)
+        if self._indice is not None:
+            self._indice.eliminar(id)
+        if self._columnas is not None:
+            self._columnas.eliminar(id)
+
+    def _indice_nombres(self):
+        self._sincronizar()
+        if self._indice is None:
+            self._indice = IndiceNombres((p.id, p.nombre) for p in self._cache.values())
+        return self._indice
+
+    def _vista_columnar(self):
+        self._sincronizar()
+        if self._columnas is None:
+            if self.perezoso:
+                # Sin objetos Producto: solo las tres columnas, leídas en streaming
+                self._columnas = columnas = ColumnasInventario()
+                for fila in get_connection().execute("SELECT id, cantidad, precio FROM productos ORDER BY id"):
+                    columnas.agregar(*fila)
+            else:
+                self._columnas = ColumnasInventario(self._cache.values())
+        return self._columnas
+
+    def _productos(self, ids):
+        """Productos con esos ids (los que existan), como {id: Producto}.
+
+        En modo perezoso los que no están en caché se leen de la BD sin
+        guardarlos, para que un listado grande no llene la memoria.
+        """
+        productos = {id: self._cache[id] for id in ids if id in self._cache}
+        if self.perezoso and len(productos) < len(ids):
+            faltan = [id for id in ids if id not in productos]
+            for id, fila in self._leer_filas(get_connection(), faltan).items():
+                productos[id] = Producto(*fila)
+        return productos
+
+    def paginas(self, tamano=TAMANO_PAGINA):
+        """Genera el inventario en listas de hasta ``tamano`` productos, por id.
+
+        En modo perezoso cada página es una consulta por rango de id
+        (id > último visto), así que cuesta lo mismo al principio que al
+        final del catálogo y solo hay una página en memoria.
+        """
+        if not self.perezoso:
+            self._sincronizar()
+            productos = list(self._cache.values())
+            for i in range(0, len(productos), tamano):
+                yield productos[i:i + tamano]
+            return
+        ultimo = 0
+        while True:
+            self._sincronizar()
+            filas = get_connection().execute(
+                "SELECT id, nombre, cantidad, precio FROM productos WHERE id > ? ORDER BY id LIMIT ?",
+                (ultimo, tamano)
+            ).fetchall()
+            if not filas:
+                return
+            yield [self._cache.get(fila[0]) or Producto(*fila) for fila in filas]
+            if len(filas) < tamano:
+                return
+            ultimo = filas[-1][0]
 
     def listar_todos(self):
-        return self._cache
+        return [producto for pagina in self.paginas(1000) for producto in pagina]
 
-    def agregar_producto(self, producto):
+    def obtener_producto(self, id):
+        """Devuelve el producto con ese id o None"""
+        self._sincronizar()
+        producto = self._cache.get(id)
+        if producto is None and self.perezoso:
+            fila = get_connection().execute(
+                "SELECT id, nombre, cantidad, precio FROM productos WHERE id=?", (id,)
+            ).fetchone()
+            if fila is not None:
+                producto = self._cache[id] = Producto(*fila)
+        return producto
+
+    @contextmanager
+    def _transaccion(self):
+        """Confirma al salir, salvo dentro de un lote(), que confirma al final"""
         conn = get_connection()
-        cur = conn.cursor()
-        cur.execute(
-            "INSERT INTO productos (nombre, cantidad, precio) VALUES (?, ?, ?)",
-            (producto.nombre, producto.cantidad, producto.precio)
-        )
-        conn.commit()
+        if conn is self._conn_lote:
+            yield conn
+        else:
+            # La conexión es persistente: 'with' confirma o deshace la transacción
+            with conn:
+                yield conn
+            self._saltar_cambios_propios(conn)
+
+    def _saltar_cambios_propios(self, conn):
+        """Tras confirmar, da por aplicadas nuestras propias entradas del registro.
+
+        Solo si data_version sigue igual, es decir, si ninguna otra conexión
+        confirmó nada desde la última sincronización (se lee después del
+        MAX para no saltarse un cambio ajeno que entre entre ambas lecturas).
+        """
+        ultimo = conn.execute("SELECT COALESCE(MAX(seq), 0) FROM productos_cambios").fetchone()[0]
+        if (conn, conn.execute("PRAGMA data_version").fetchone()[0]) == self._data_version:
+            self._ultimo_cambio = ultimo
+        # Un proceso que no se reinicia también debe podar: el registro
+        # crece con cada escritura y la poda solo borra un rango de seq
+        self._commits_sin_podar += 1
+        if self._commits_sin_podar >= PODAR_REGISTRO_CADA:
+            self._commits_sin_podar = 0
+            try:
+                podar_registro_cambios(conn)
+            except sqlite3.OperationalError as e:
+                # La escritura ya está confirmada; se podará en otra ocasión
+                print(f"Error podando el registro de cambios: {e}")
+
+    def agregar_producto(self, producto):
+        with self._transaccion() as conn:
+            cur = conn.execute(
+                "INSERT INTO productos (nombre, cantidad, precio) VALUES (?, ?, ?)",
+                (producto.nombre, producto.cantidad, producto.precio)
+            )
         producto.id = cur.lastrowid
-        conn.close()
-        self._cache.append(producto)
+        self._cache[producto.id] = producto
+        if self._indice is not None:
+            self._indice.agregar(producto.id, producto.nombre)
+        if self._columnas is not None:
+            self._columnas.agregar(producto.id, producto.cantidad, producto.precio)
 
-    def _sync_a_db(self, producto):
-        conn = get_connection()
-        cur = conn.cursor()
-        cur.execute(
-            "UPDATE productos SET nombre=?, cantidad=?, precio=? WHERE id=?",
-            (producto.nombre, producto.cantidad, producto.precio, producto.id)
-        )
-        conn.commit()
-        conn.close()
+    def _guardar_cambios(self, cambios):
+        """Escribe [(producto, cantidad, precio)] y después actualiza la caché.
+
+        Los Producto de la caché se modifican solo si el UPDATE no falla: si
+        falla, siguen reflejando la BD. Dentro de un lote() que acabe
+        deshaciéndose es lote() quien recarga la caché.
+        """
+        with self._transaccion() as conn:
+            conn.executemany(
+                "UPDATE productos SET cantidad=?, precio=? WHERE id=?",
+                [(cantidad, precio, producto.id) for producto, cantidad, precio in cambios]
+            )
+        for producto, cantidad, precio in cambios:
+            producto.cantidad, producto.precio = cantidad, precio
+            if self._columnas is not None:
+                self._columnas.actualizar(producto.id, cantidad, precio)
 
     def eliminar_producto(self, id):
-        conn = get_connection()
-        cur = conn.cursor()
-        cur.execute("DELETE FROM productos WHERE id=?", (id,))
-        conn.commit()
-        conn.close()
-        self._cache = [p for p in self._cache if p.id != id]
+        with self._transaccion() as conn:
+            conn.execute("DELETE FROM productos WHERE id=?", (id,))
+        self._quitar_de_cache(id)
  # ==========================
     # MÉTODOS NUEVOS
     # ==========================
-    def buscar_por_nombre(self, nombre):
-        """Busca productos que contengan el nombre"""
-        return [p for p in self._cache if nombre.lower() in p.nombre.lower()]
+    def buscar_por_nombre(self, nombre, modo='contiene', limite=None):
+        """Busca productos por nombre ('contiene', 'prefijo' o 'ranking')"""
+        if self.perezoso:
+            return self._buscar_en_db(nombre, modo, limite)
+        return [self._cache[id] for id in self._indice_nombres().buscar(nombre, modo, limite)]
+
+    def _buscar_en_db(self, nombre, modo, limite):
+        """Búsqueda del modo perezoso: acota con SQL y afina con filtrar_nombres.
+
+        LIKE solo ignora mayúsculas en ASCII; para consultas con otros
+        caracteres se compara con lower() de Python (más lento, pero exacto).
+        """
+        if modo not in MODOS_BUSQUEDA:
+            raise ValueError(f"Modo de búsqueda no válido: {modo}")
+        self._sincronizar()
+        conn = get_connection()
+        consulta = nombre.lower()
+        if consulta.isascii():
+            patron = consulta.replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_')
+            if modo == 'prefijo':
+                condicion = "(nombre LIKE ? ESCAPE '\\' OR nombre LIKE ? ESCAPE '\\')"
+                parametros = [patron + '%', '% ' + patron + '%']
+            else:
+                condicion = "nombre LIKE ? ESCAPE '\\'"
+                parametros = ['%' + patron + '%']
+        else:
+            conn.create_function("minusculas", 1, str.lower, deterministic=True)
+            condicion = "instr(' ' || minusculas(nombre), ?) > 0"
+            parametros = [' ' + consulta if modo == 'prefijo' else consulta]
+        sql = f"SELECT id, nombre, cantidad, precio FROM productos WHERE {condicion} ORDER BY id"
+        if limite is not None and modo != 'ranking':
+            sql += " LIMIT ?"
+            parametros.append(limite)
+        filas = {fila[0]: fila for fila in conn.execute(sql, parametros)}
+        ids = filtrar_nombres(((id, fila[1]) for id, fila in filas.items()), nombre, modo, limite)
+        return [self._cache.get(id) or Producto(*filas[id]) for id in ids]
 
     def actualizar_producto(self, id, cantidad=None, precio=None):
         """Actualiza un producto existente"""
-        for producto in self._cache:
-            if producto.id == id:
-                if cantidad is not None:
-                    producto.cantidad = cantidad
-                if precio is not None:
-                    producto.precio = precio
-                self._sync_a_db(producto)
-                return True
-        return False
-
-    def mostrar_todos(self):
-        """Imprime todos los productos en consola"""
-        if self._cache:
-            for p in self._cache:
+        producto = self.obtener_producto(id)
+        if producto is None:
+            return False
+        self._guardar_cambios([(
+            producto,
+            producto.cantidad if cantidad is None else cantidad,
+            producto.precio if precio is None else precio,
+        )])
+        return True
+
+    def mostrar_todos(self, tamano_pagina=TAMANO_PAGINA, pausar=False):
+        """Imprime todos los productos en consola, página a página.
+
+        Con ``pausar`` espera a Enter entre páginas ('q' para terminar).
+        """
+        paginas = self.paginas(tamano_pagina)
+        pagina = next(paginas, None)
+        if not pagina:
+            print("📦 Inventario vacío.")
+            return
+        while pagina:
+            for p in pagina:
                 print(f"[{p.id}] {p.nombre} - Cantidad: {p.cantidad} - Precio: {p.precio}")
-        else:
-            print("📦 Inventario vacío.")
\ No newline at end of file
+            pagina = next(paginas, None)
+            if pagina and pausar and input("-- Enter para ver más, 'q' para terminar -- ").strip().lower() == 'q':
+                break
+
+    # ==========================
+    # OPERACIONES EN LOTE
+    # ==========================
+    @contextmanager
+    def lote(self):
+        """Agrupa cualquier combinación de operaciones en una sola transacción.
+
+        Dentro del bloque ninguna operación confirma por su cuenta; al salir
+        se hace un único commit. Si hay una excepción se deshace todo y la
+        caché se recarga desde la base de datos.
+        """
+        conn = get_connection()
+        if conn is self._conn_lote:
+            yield self  # lote anidado: lo confirma el exterior
+            return
+        self._conn_lote = conn
+        try:
+            with conn:
+                yield self
+            self._conn_lote = None
+            self._saltar_cambios_propios(conn)
+        except BaseException:
+            self._cargar_cache()
+            raise
+        finally:
+            self._conn_lote = None
+
+    def agregar_productos(self, productos):
+        """Inserta varios productos con un solo executemany y les asigna su id"""
+        productos = list(productos)
+        if not productos:
+            return productos
+        with self._transaccion() as conn:
+            conn.executemany(
+                "INSERT INTO productos (nombre, cantidad, precio) VALUES (?, ?, ?)",
+                [(p.nombre, p.cantidad, p.precio) for p in productos]
+            )
+            # Con la transacción abierta nadie más inserta: los ids son consecutivos
+            ultimo = conn.execute("SELECT last_insert_rowid()").fetchone()[0]
+        for id, producto in enumerate(productos, ultimo - len(productos) + 1):
+            producto.id = id
+            if not self.perezoso:
+                self._cache[id] = producto
+            if self._indice is not None:
+                self._indice.agregar(id, producto.nombre)
+            if self._columnas is not None:
+                self._columnas.agregar(id, producto.cantidad, producto.precio)
+        return productos
+
+    def actualizar_productos(self, cambios):
+        """Aplica (id, cantidad, precio) a varios productos; None deja el valor.
+
+        Devuelve cuántos productos existían y se actualizaron.
+        """
+        self._sincronizar()
+        cambios = list(cambios)
+        productos = self._productos([id for id, _, _ in cambios])
+        # id -> (producto, cantidad, precio): si un id se repite, sus cambios se acumulan
+        nuevos = {}
+        for id, cantidad, precio in cambios:
+            if id not in productos:
+                continue
+            producto, cantidad_actual, precio_actual = nuevos.get(id) or (
+                productos[id], productos[id].cantidad, productos[id].precio)
+            nuevos[id] = (
+                producto,
+                cantidad_actual if cantidad is None else cantidad,
+                precio_actual if precio is None else precio,
+            )
+        if nuevos:
+            self._guardar_cambios(list(nuevos.values()))
+        return len(nuevos)
+
+    def eliminar_productos(self, ids):
+        """Elimina varios productos por id en una sola transacción"""
+        ids = list(ids)
+        if not ids:
+            return
+        with self._transaccion() as conn:
+            conn.executemany("DELETE FROM productos WHERE id=?", [(id,) for id in ids])
+        for id in ids:
+            self._quitar_de_cache(id)
+
+    # ==========================
+    # ANÁLISIS DEL INVENTARIO
+    # ==========================
+    def valor_total(self):
+        """Valor del stock completo (suma de cantidad * precio)"""
+        return self._vista_columnar().valor_total()
+
+    def suma_por_filtro(self, columna='valor', **rangos):
+        """Suma de 'cantidad', 'precio' o 'valor' con filtros cantidad_min/max y precio_min/max"""
+        return self._vista_columnar().suma(columna, **rangos)
+
+    def media_por_filtro(self, columna='valor', **rangos):
+        """Como suma_por_filtro pero la media (None si ningún producto cumple)"""
+        return self._vista_columnar().media(columna, **rangos)
+
+    def top_por_valor(self, n=10):
+        """Los n productos con más valor en stock, como [(Producto, valor)]"""
+        elegidos = self._vista_columnar().top_por_valor(n)
+        productos = self._productos([id for id, _ in elegidos])
+        return [(productos[id], valor) for id, valor in elegidos if id in productos]
+
+    def stock_bajo(self, umbral):
+        """Productos con cantidad por debajo del umbral, por id"""
+        ids = sorted(self._vista_columnar().stock_bajo(umbral))
+        productos = self._productos(ids)
+        return [productos[id] for id in ids if id in productos]
+
+    def histograma_precios(self, bordes):
+        """Número de productos en cada franja de precio [bordes[i], bordes[i+1])"""
+        return self._vista_columnar().histograma_precios(bordes)
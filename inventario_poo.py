@@ -1,4 +1,8 @@
 import sqlite3
+from contextlib import contextmanager
+
+from inventario.busqueda import IndiceNombres
+from inventario.db import ajustar_conexion, crear_registro_cambios
 
 # ==========================
 # Clase Producto
@@ -20,8 +24,10 @@ class Producto:
 class Inventario:
     def __init__(self):
         self.productos = {}  # Diccionario para acceso rápido por ID
-        self.conn = sqlite3.connect("inventario.db")
+        self.indice = IndiceNombres()  # Búsqueda por nombre sin recorrer todos los productos
+        self.conn = ajustar_conexion(sqlite3.connect("inventario.db"))
         self.cursor = self.conn.cursor()
+        self.en_lote = False  # dentro de lote() no se confirma operación a operación
         self.crear_tabla()
 
     def crear_tabla(self):
@@ -32,6 +38,13 @@ class Inventario:
                             cantidad INTEGER NOT NULL,
                             precio REAL NOT NULL)''')
         self.conn.commit()
+        # Deja constancia de cada cambio para las cachés de inventario.models
+        crear_registro_cambios(self.conn)
+
+    def confirmar(self):
+        """Hace commit salvo dentro de un lote(), que confirma al final"""
+        if not self.en_lote:
+            self.conn.commit()
 
     def cargar_desde_bd(self):
         """Carga los productos existentes desde la BD al diccionario"""
@@ -40,22 +53,25 @@ class Inventario:
         for fila in filas:
             id_producto, nombre, cantidad, precio = fila
             self.productos[id_producto] = Producto(id_producto, nombre, cantidad, precio)
+            self.indice.agregar(id_producto, nombre)
 
     def agregar_producto(self, nombre, cantidad, precio):
         """Agrega un producto nuevo"""
         self.cursor.execute("INSERT INTO productos (nombre, cantidad, precio) VALUES (?, ?, ?)",
                             (nombre, cantidad, precio))
-        self.conn.commit()
+        self.confirmar()
         id_producto = self.cursor.lastrowid
         self.productos[id_producto] = Producto(id_producto, nombre, cantidad, precio)
+        self.indice.agregar(id_producto, nombre)
         print("✅ Producto agregado correctamente.")
 
     def eliminar_producto(self, id_producto):
         """Elimina un producto por ID"""
         if id_producto in self.productos:
             self.cursor.execute("DELETE FROM productos WHERE id = ?", (id_producto,))
-            self.conn.commit()
+            self.confirmar()
             del self.productos[id_producto]
+            self.indice.eliminar(id_producto)
             print("🗑️ Producto eliminado correctamente.")
         else:
             print("⚠️ Producto no encontrado.")
@@ -71,14 +87,14 @@ class Inventario:
 
             self.cursor.execute("UPDATE productos SET cantidad = ?, precio = ? WHERE id = ?",
                                 (producto.cantidad, producto.precio, id_producto))
-            self.conn.commit()
+            self.confirmar()
             print("✏️ Producto actualizado correctamente.")
         else:
             print("⚠️ Producto no encontrado.")
 
-    def buscar_producto(self, nombre):
-        """Busca productos por nombre"""
-        encontrados = [p for p in self.productos.values() if nombre.lower() in p.nombre.lower()]
+    def buscar_producto(self, nombre, modo='contiene'):
+        """Busca productos por nombre ('contiene', 'prefijo' o 'ranking')"""
+        encontrados = [self.productos[id] for id in self.indice.buscar(nombre, modo)]
         if encontrados:
             for p in encontrados:
                 print(p)
@@ -93,6 +109,76 @@ class Inventario:
         else:
             print("📦 No hay productos en el inventario.")
 
+    # ==========================
+    # Operaciones en lote
+    # ==========================
+    @contextmanager
+    def lote(self):
+        """Agrupa varias operaciones en una sola transacción (un único commit)"""
+        if self.en_lote:
+            yield self
+            return
+        self.en_lote = True
+        try:
+            yield self
+            self.conn.commit()
+        except BaseException:
+            # Se deshace todo y el diccionario vuelve a reflejar la BD
+            self.conn.rollback()
+            self.productos = {}
+            self.indice = IndiceNombres()
+            self.cargar_desde_bd()
+            raise
+        finally:
+            self.en_lote = False
+
+    def agregar_productos(self, productos):
+        """Agrega varios productos (nombre, cantidad, precio) con un solo executemany"""
+        productos = list(productos)
+        if not productos:
+            return
+        # Fuera de un lote(), uno propio: si una fila falla a mitad no queda
+        # ninguna insertada en la conexión (que es persistente)
+        with self.lote():
+            self.cursor.executemany("INSERT INTO productos (nombre, cantidad, precio) VALUES (?, ?, ?)",
+                                    productos)
+            # Con la transacción abierta nadie más inserta: los ids son consecutivos
+            ultimo = self.cursor.execute("SELECT last_insert_rowid()").fetchone()[0]
+        for id_producto, (nombre, cantidad, precio) in enumerate(productos, ultimo - len(productos) + 1):
+            self.productos[id_producto] = Producto(id_producto, nombre, cantidad, precio)
+            self.indice.agregar(id_producto, nombre)
+        print(f"✅ {len(productos)} productos agregados correctamente.")
+
+    def actualizar_productos(self, cambios):
+        """Actualiza varios productos a partir de tuplas (id, cantidad, precio)"""
+        actualizados = []
+        for id_producto, cantidad, precio in cambios:
+            producto = self.productos.get(id_producto)
+            if producto is None:
+                continue
+            if cantidad is not None:
+                producto.cantidad = cantidad
+            if precio is not None:
+                producto.precio = precio
+            actualizados.append((producto.cantidad, producto.precio, id_producto))
+        if actualizados:
+            with self.lote():
+                self.cursor.executemany("UPDATE productos SET cantidad = ?, precio = ? WHERE id = ?",
+                                        actualizados)
+        print(f"✏️ {len(actualizados)} productos actualizados correctamente.")
+
+    def eliminar_productos(self, ids):
+        """Elimina varios productos por ID"""
+        existentes = [id_producto for id_producto in ids if id_producto in self.productos]
+        if existentes:
+            with self.lote():
+                self.cursor.executemany("DELETE FROM productos WHERE id = ?",
+                                        [(id_producto,) for id_producto in existentes])
+            for id_producto in existentes:
+                del self.productos[id_producto]
+                self.indice.eliminar(id_producto)
+        print(f"🗑️ {len(existentes)} productos eliminados correctamente.")
+
 
 # ==========================
 # Menú interactivo
@@ -134,7 +220,9 @@ def menu():
 
         elif opcion == "4":
             nombre = input("Ingrese el nombre a buscar: ")
-            inventario.buscar_producto(nombre)
+            modo = input("Modo (1=contiene, 2=empieza por, 3=por relevancia) [1]: ")
+            modo = {"2": "prefijo", "3": "ranking"}.get(modo, "contiene")
+            inventario.buscar_producto(nombre, modo)
 
         elif opcion == "5":
             inventario.mostrar_todos()
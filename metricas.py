@@ -0,0 +1,149 @@
+import functools
+import threading
+import time
+from bisect import bisect_left
+
+# Límites superiores de las cubetas (como los de los clientes de Prometheus)
+CUBETAS_LATENCIA = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+CUBETAS_CONSULTAS = (0, 1, 2, 3, 5, 10, 20, 50, 100)
+
+
+class Histograma:
+    __slots__ = ('cubetas', 'conteos', 'suma', 'total')
+
+    def __init__(self, cubetas):
+        self.cubetas = cubetas
+        self.conteos = [0] * (len(cubetas) + 1)  # la última es +Inf
+        self.suma = 0.0
+        self.total = 0
+
+    def observar(self, valor):
+        self.conteos[bisect_left(self.cubetas, valor)] += 1
+        self.suma += valor
+        self.total += 1
+
+
+def _escapar(valor):
+    return str(valor).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _formatear_etiquetas(etiquetas, extra=()):
+    pares = tuple(etiquetas) + tuple(extra)
+    if not pares:
+        return ''
+    return '{' + ','.join(f'{clave}="{_escapar(valor)}"' for clave, valor in pares) + '}'
+
+
+def _formatear_numero(valor):
+    if valor == float('inf'):
+        return '+Inf'
+    return repr(float(valor)) if isinstance(valor, float) else str(valor)
+
+
+class RegistroMetricas:
+    """Histogramas y contadores en memoria, exportables en formato Prometheus.
+
+    Registrar una observación es un bisect y unas sumas bajo un lock, así
+    que puede quedarse activo en producción. Las etiquetas son tuplas de
+    pares (clave, valor) con pocos valores posibles (endpoint, operación).
+    Cada worker de gunicorn tiene su propio registro: lo que se ve en
+    /metrics es el del worker que atiende la petición.
+
+    Los recolectores son funciones que devuelven un diccionario plano de
+    números; se evalúan al exportar y se publican como gauges, salvo las
+    claves indicadas en ``contadores`` (valores que solo crecen), que se
+    publican como counter con el sufijo ``_total`` para que rate() e
+    increase() funcionen. Las claves de ``excluir`` (identificadores como
+    el pid) no se publican. Con ``activo=False`` cronometrar() deja las
+    funciones sin envolver.
+    """
+
+    def __init__(self, activo=True):
+        self.activo = activo
+        self._lock = threading.Lock()
+        self._histogramas = {}  # nombre -> (ayuda, cubetas, {etiquetas: Histograma})
+        self._contadores = {}  # nombre -> (ayuda, {etiquetas: valor})
+        self._recolectores = []  # (prefijo, ayuda, función, claves contador, claves excluidas)
+
+    def histograma(self, nombre, ayuda, cubetas=CUBETAS_LATENCIA):
+        self._histogramas.setdefault(nombre, (ayuda, tuple(cubetas), {}))
+
+    def contador(self, nombre, ayuda):
+        self._contadores.setdefault(nombre, (ayuda, {}))
+
+    def recolector(self, prefijo, ayuda, funcion, contadores=(), excluir=()):
+        self._recolectores.append((prefijo, ayuda, funcion, frozenset(contadores), frozenset(excluir)))
+
+    def observar(self, nombre, valor, etiquetas=()):
+        _, cubetas, series = self._histogramas[nombre]
+        with self._lock:
+            histograma = series.get(etiquetas)
+            if histograma is None:
+                histograma = series[etiquetas] = Histograma(cubetas)
+            histograma.observar(valor)
+
+    def incrementar(self, nombre, valor=1, etiquetas=()):
+        series = self._contadores[nombre][1]
+        with self._lock:
+            series[etiquetas] = series.get(etiquetas, 0) + valor
+
+    def cronometrar(self, nombre, **etiquetas):
+        """Decorador: observa en el histograma ``nombre`` la duración de cada llamada"""
+        etiquetas = tuple(etiquetas.items())
+
+        def decorador(funcion):
+            if not self.activo:
+                return funcion
+
+            @functools.wraps(funcion)
+            def envoltura(*args, **kwargs):
+                inicio = time.perf_counter()
+                try:
+                    return funcion(*args, **kwargs)
+                finally:
+                    self.observar(nombre, time.perf_counter() - inicio, etiquetas)
+            return envoltura
+        return decorador
+
+    def exportar(self):
+        """Texto en el formato de exposición de Prometheus (versión 0.0.4)"""
+        lineas = []
+        with self._lock:
+            for nombre, (ayuda, series) in self._contadores.items():
+                lineas += [f"# HELP {nombre} {ayuda}", f"# TYPE {nombre} counter"]
+                for etiquetas, valor in series.items():
+                    lineas.append(f"{nombre}{_formatear_etiquetas(etiquetas)} {_formatear_numero(valor)}")
+            for nombre, (ayuda, cubetas, series) in self._histogramas.items():
+                lineas += [f"# HELP {nombre} {ayuda}", f"# TYPE {nombre} histogram"]
+                for etiquetas, h in series.items():
+                    acumulado = 0
+                    for limite, conteo in zip(cubetas + (float('inf'),), h.conteos):
+                        acumulado += conteo
+                        le = _formatear_etiquetas(etiquetas, [('le', _formatear_numero(limite))])
+                        lineas.append(f"{nombre}_bucket{le} {acumulado}")
+                    lineas.append(f"{nombre}_sum{_formatear_etiquetas(etiquetas)} {_formatear_numero(h.suma)}")
+                    lineas.append(f"{nombre}_count{_formatear_etiquetas(etiquetas)} {h.total}")
+        # Los recolectores consultan otros objetos: fuera del lock
+        for prefijo, ayuda, funcion, contadores, excluir in self._recolectores:
+            try:
+                valores = funcion()
+            except Exception as e:
+                print(f"Error recolectando métricas de {prefijo}: {e}")
+                continue
+            for clave, valor in valores.items():
+                if clave in excluir:
+                    continue
+                if isinstance(valor, bool):
+                    valor = int(valor)
+                if not isinstance(valor, (int, float)):
+                    continue
+                nombre = f"{prefijo}_{clave}"
+                if clave in contadores:
+                    tipo = 'counter'
+                    if not nombre.endswith('_total'):
+                        nombre += '_total'
+                else:
+                    tipo = 'gauge'
+                lineas += [f"# HELP {nombre} {ayuda}", f"# TYPE {nombre} {tipo}",
+                           f"{nombre} {_formatear_numero(valor)}"]
+        return '\n'.join(lineas) + '\n'
@@ -0,0 +1,47 @@
+import os
+import tempfile
+
+import pytest
+
+# app.py crea DATOS_DIR al importarse: que no toque datos/ del proyecto
+os.environ.setdefault('DATOS_DIR', tempfile.mkdtemp(prefix='datos_tests_'))
+os.environ.setdefault('PASSWORD_HASH_WORKERS', '0')
+
+
+@pytest.fixture
+def aplicacion(tmp_path):
+    """Módulo app con MySQL sustituido por la base SQLite de los benchmarks"""
+    from benchmarks import mysql_local
+    import app as aplicacion
+
+    ruta = str(tmp_path / 'app.db')
+    mysql_local.crear_base(ruta).close()
+    mysql_local.instalar(ruta)
+    aplicacion.db_manager.close_connection()
+    aplicacion.db_manager._pool = None
+    aplicacion._conexiones_sonda.clear()
+    aplicacion.invalidar_catalogo()
+    aplicacion.usuarios_cache.limpiar()
+    aplicacion.app.config.update(TESTING=True, LOGIN_DISABLED=True)
+    yield aplicacion
+    aplicacion.db_manager.close_connection()
+    aplicacion.db_manager._pool = None
+
+
+@pytest.fixture
+def cliente(aplicacion):
+    return aplicacion.app.test_client()
+
+
+@pytest.fixture
+def cliente_autenticado(aplicacion, cliente):
+    """Cliente con la sesión de un usuario real (id 1) para las rutas que usan current_user"""
+    with aplicacion.db_manager.conexion() as conn:
+        cursor = conn.cursor()
+        cursor.execute("INSERT INTO usuarios (nombre, mail, password) VALUES (%s, %s, %s)",
+                       ('Test', 'test@ejemplo.com', 'x'))
+        conn.commit()
+        cursor.close()
+    with cliente.session_transaction() as sesion:
+        sesion['_user_id'] = '1'
+    return cliente
@@ -0,0 +1,40 @@
+import sqlite3
+
+
+def sembrar_productos(aplicacion, n):
+    with aplicacion.db_manager.conexion() as conn:
+        cursor = conn.cursor()
+        cursor.executemany("INSERT INTO producto (nombre, costo, stock) VALUES (%s, %s, %s)",
+                           [(f'p{i}', 1.5, 1) for i in range(n)])
+        conn.commit()
+        cursor.close()
+
+
+def test_asociar_sin_carreras(aplicacion, cliente_autenticado):
+    sembrar_productos(aplicacion, 2)
+    assert aplicacion.asociar_productos(1, [1, 99]) == {'nuevos': [1], 'ya_asociados': [], 'inexistentes': [99]}
+    assert aplicacion.asociar_productos(1, [1, 2]) == {'nuevos': [2], 'ya_asociados': [1], 'inexistentes': []}
+
+
+def test_asociar_con_cambios_ajenos_entre_select_e_insert(aplicacion, cliente_autenticado, tmp_path, monkeypatch):
+    sembrar_productos(aplicacion, 3)
+    hecho = []
+
+    def otra_peticion(segundos, consultas):
+        # Tras leer el SELECT inicial, otra conexión asocia el 2 y borra el 3
+        if consultas == 0 and not hecho:
+            hecho.append(True)
+            otra = sqlite3.connect(str(tmp_path / 'app.db'))
+            with otra:
+                otra.execute("INSERT INTO usuario_producto (id_usuario, id_producto) VALUES (1, 2)")
+                otra.execute("DELETE FROM producto WHERE id_producto = 3")
+            otra.close()
+    monkeypatch.setattr(aplicacion.db_manager, 'observador_consultas', otra_peticion)
+
+    resultado = aplicacion.asociar_productos(1, [1, 2, 3])
+    assert resultado == {'nuevos': [1], 'ya_asociados': [2], 'inexistentes': [3]}
+    with aplicacion.db_manager.conexion() as conn:
+        cursor = conn.cursor()
+        cursor.execute("SELECT id_producto FROM usuario_producto WHERE id_usuario = 1 ORDER BY id_producto")
+        assert cursor.fetchall() == [(1,), (2,)]
+        cursor.close()
@@ -0,0 +1,58 @@
+import queue
+import threading
+import time
+
+from almacenamiento import escritura
+from almacenamiento.escritura import EscritorDiferido
+
+
+def test_tras_fork_ningun_hilo_encola_en_la_cola_heredada(monkeypatch):
+    escritos = []
+    escritor = EscritorDiferido(lambda lote, sincronizar: escritos.extend(lote), politica='ninguna')
+    # Estado que vería un proceso hijo: pid del padre y su cola, sin hilo que la lea
+    heredada = queue.Queue()
+    escritor._pid, escritor._cola, escritor._hilo = -1, heredada, object()
+
+    class ColaLenta(queue.Queue):
+        def __init__(self, *args, **kwargs):
+            time.sleep(0.05)  # ensancha la ventana entre publicar el pid y la cola
+            super().__init__(*args, **kwargs)
+    monkeypatch.setattr(escritura.queue, 'Queue', ColaLenta)
+
+    hilos = [threading.Thread(target=escritor.encolar, args=(i,)) for i in range(8)]
+    for hilo in hilos:
+        hilo.start()
+    for hilo in hilos:
+        hilo.join()
+    escritor.cerrar()
+    assert heredada.empty()
+    assert sorted(escritos) == list(range(8))
+
+
+def test_reintenta_y_respalda_el_lote_que_no_se_pudo_escribir():
+    intentos, respaldo = [], []
+
+    def escribir_lote(lote, sincronizar):
+        intentos.append(list(lote))
+        if len(intentos) <= 2 or lote == ['c', 'd']:
+            raise OSError('disco lleno')
+
+    escritor = EscritorDiferido(escribir_lote, politica='ninguna', reintentos=2,
+                                espera_reintento=0.001, respaldo=respaldo.extend)
+    escritor._escribir(['a', 'b'], False)
+    escritor._escribir(['c', 'd'], False)
+    stats = escritor.estadisticas()
+    assert intentos == [['a', 'b']] * 3 + [['c', 'd']] * 3
+    assert respaldo == ['c', 'd']
+    assert (stats['escritos'], stats['errores'], stats['respaldados'], stats['perdidos']) == (2, 2, 2, 0)
+    assert stats['reintentos'] == 4
+
+
+def test_sin_respaldo_los_registros_fallidos_cuentan_como_perdidos():
+    def escribir_lote(lote, sincronizar):
+        raise OSError('sin permisos')
+
+    escritor = EscritorDiferido(escribir_lote, politica='ninguna', reintentos=0)
+    escritor._escribir(['a', 'b', 'c'], False)
+    stats = escritor.estadisticas()
+    assert (stats['errores'], stats['perdidos'], stats['lotes']) == (3, 3, 0)
@@ -0,0 +1,86 @@
+import json
+
+
+def test_importar_productos_rechaza_stock_fuera_de_rango(cliente_autenticado):
+    cuerpo = (
+        'nombre,costo,descripcion,stock\r\n'
+        'Lápiz,1.50,,10\r\n'
+        'Goma,0.80,,3000000000\r\n'
+        'Regla,2.00,,2147483647\r\n'
+    )
+    respuesta = cliente_autenticado.post('/api/productos/import?formato=csv', data=cuerpo.encode(),
+                             content_type='text/csv')
+    assert respuesta.status_code == 201
+    datos = respuesta.get_json()
+    assert datos['insertados'] == 2
+    assert datos['invalidos'] == 1
+    assert datos['errores'] == [{'linea': 3, 'error': 'stock fuera de rango'}]
+
+
+def test_validar_producto_limites_de_stock(aplicacion):
+    fila = {'nombre': 'x', 'costo': '1'}
+    assert aplicacion.validar_producto(dict(fila, stock=aplicacion.STOCK_MAXIMO))[3] == 2**31 - 1
+    for stock in (2**31, '3000000000'):
+        try:
+            aplicacion.validar_producto(dict(fila, stock=stock))
+        except ValueError as e:
+            assert str(e) == 'stock fuera de rango'
+        else:
+            raise AssertionError(f'stock={stock} debería rechazarse')
+
+
+def importar(cliente, cuerpo, formato):
+    return cliente.post(f'/api/productos/import?formato={formato}', data=cuerpo,
+                        content_type='text/csv' if formato == 'csv' else 'application/x-ndjson')
+
+
+def test_importar_csv_con_campo_enorme_responde_400_con_la_linea(cliente_autenticado):
+    cuerpo = ('nombre,costo,descripcion,stock\r\nLápiz,1.50,,10\r\n'
+              'Goma,0.80,' + 'x' * 200000 + ',1\r\n').encode()
+    respuesta = importar(cliente_autenticado, cuerpo, 'csv')
+    assert respuesta.status_code == 400
+    datos = respuesta.get_json()
+    assert datos['linea'] == 3 and 'CSV mal formado' in datos['error']
+
+
+def test_importar_jsonl_muy_anidado_es_una_fila_invalida(cliente_autenticado):
+    cuerpo = ('{"nombre": "Lápiz", "costo": 1}\n' + '[' * 100000 + '\n').encode()
+    respuesta = importar(cliente_autenticado, cuerpo, 'jsonl')
+    assert respuesta.status_code == 201
+    datos = respuesta.get_json()
+    assert datos['insertados'] == 1 and datos['invalidos'] == 1
+
+
+def test_importar_utf8_roto_tras_lotes_guardados(aplicacion, cliente_autenticado, monkeypatch):
+    monkeypatch.setattr(aplicacion, 'TAMANO_LOTE_INSERT', 2)
+    # Más que el búfer de decodificación, para que el error llegue tras varios lotes
+    cuerpo = ''.join(f'{{"nombre": "p{i}", "costo": 1}}\n' for i in range(2000)).encode() + b'\xff\xfe\n'
+    respuesta = importar(cliente_autenticado, cuerpo, 'jsonl')
+    assert respuesta.status_code == 400
+    datos = respuesta.get_json()
+    assert datos['insertados'] > 0 and datos['insertados'] == 2 * datos['lotes']
+    assert 'UTF-8' in datos['error'] and 'linea' in datos
+
+
+def test_exportar_devuelve_la_conexion_entre_paginas(aplicacion, cliente_autenticado, monkeypatch):
+    monkeypatch.setattr(aplicacion, 'TAMANO_LOTE_EXPORT', 2)
+    cuerpo = 'nombre,costo,descripcion,stock\r\n' + ''.join(f'P{i},1.00,,{i}\r\n' for i in range(5))
+    assert importar(cliente_autenticado, cuerpo.encode(), 'csv').status_code == 201
+
+    respuesta = cliente_autenticado.get('/api/productos/export?formato=jsonl', buffered=False)
+    assert respuesta.status_code == 200
+    partes = []
+    for parte in respuesta.response:
+        # Mientras el cliente lee, ninguna conexión queda prestada
+        assert aplicacion.db_manager.estadisticas()['en_uso'] == 0
+        partes.append(parte.decode() if isinstance(parte, bytes) else parte)
+    respuesta.close()
+    nombres = [json.loads(l)['nombre'] for l in ''.join(partes).splitlines()]
+    assert nombres == [f'P{i}' for i in range(5)]
+
+
+def test_exportar_con_pool_agotado_responde_503(aplicacion, cliente_autenticado, monkeypatch):
+    def agotado(ultimo):
+        raise aplicacion.PoolAgotadoError(msg='Pool agotado')
+    monkeypatch.setattr(aplicacion, 'leer_pagina_exportacion', agotado)
+    assert cliente_autenticado.get('/api/productos/export?formato=csv').status_code == 503
@@ -0,0 +1,53 @@
+import time
+
+
+def test_importar_usuarios_rechaza_passwords_que_no_son_texto(cliente):
+    usuarios = [
+        {'nombre': 'Ana', 'mail': 'ana@ejemplo.com', 'password': 'secreto'},
+        {'nombre': 'Beto', 'mail': 'beto@ejemplo.com', 'password': 123},
+        {'nombre': 'Caro', 'mail': 'caro@ejemplo.com', 'password': True},
+        {'nombre': 'Dani', 'mail': 'dani@ejemplo.com', 'password': {'a': 1}},
+    ]
+    respuesta = cliente.post('/api/usuarios/import', json=usuarios)
+    assert respuesta.status_code == 201
+    datos = respuesta.get_json()
+    assert datos['creados'] == 1
+    assert [i['indice'] for i in datos['invalidos']] == [1, 2, 3]
+
+
+def test_importar_usuarios_limita_el_lote(aplicacion, cliente, monkeypatch):
+    monkeypatch.setattr(aplicacion, 'MAX_USUARIOS_IMPORT_FONDO', 10)
+    usuarios = [{'nombre': 'x', 'mail': f'u{i}@ejemplo.com', 'password': 'p'} for i in range(11)]
+    assert cliente.post('/api/usuarios/import', json=usuarios).status_code == 413
+
+
+def esperar_trabajo(cliente, url):
+    for _ in range(200):
+        estado = cliente.get(url).get_json()
+        if estado['estado'] in ('terminado', 'error'):
+            return estado
+        time.sleep(0.02)
+    raise AssertionError('el trabajo no terminó')
+
+
+def test_importacion_grande_va_en_segundo_plano(aplicacion, cliente, tmp_path, monkeypatch):
+    monkeypatch.setattr(aplicacion, 'MAX_USUARIOS_IMPORT', 2)
+    monkeypatch.setattr(aplicacion.trabajos, 'directorio', str(tmp_path / 'trabajos'))
+    usuarios = [{'nombre': 'x', 'mail': f'u{i}@ejemplo.com', 'password': 'p'} for i in range(5)]
+    usuarios[3]['password'] = 123
+
+    respuesta = cliente.post('/api/usuarios/import', json=usuarios)
+    assert respuesta.status_code == 202
+    url = respuesta.get_json()['url']
+    assert respuesta.headers['Location'].endswith(url)
+
+    estado = esperar_trabajo(cliente, url)
+    assert estado['estado'] == 'terminado'
+    resultado = estado['resultado']
+    assert (resultado['procesados'], resultado['creados']) == (5, 4)
+    assert [i['indice'] for i in resultado['invalidos']] == [3]
+
+
+def test_estado_de_importacion_desconocida(cliente):
+    assert cliente.get('/api/usuarios/import/' + '0' * 32).status_code == 404
+    assert cliente.get('/api/usuarios/import/..%2F..%2Fapp').status_code == 404
@@ -0,0 +1,63 @@
+import sqlite3
+
+import pytest
+
+import inventario.db
+import inventario.models
+from inventario.models import Inventario, Producto
+
+
+@pytest.fixture
+def ruta_db(tmp_path, monkeypatch):
+    ruta = str(tmp_path / 'inventario.db')
+    monkeypatch.setattr(inventario.db, 'DB_PATH', ruta)
+    inventario.db.crear_tabla()
+    yield ruta
+    inventario.db.cerrar_conexion()
+
+
+def test_altas_ajenas_con_id_menor_mantienen_el_orden(ruta_db):
+    inv = Inventario(perezoso=False, instantanea='')
+    inv.agregar_productos([Producto(None, f'p{i}', 1, 1.0) for i in range(3)])
+    # Otra conexión (otro proceso) da de alta ids fuera de orden
+    otra = sqlite3.connect(ruta_db)
+    with otra:
+        otra.execute("INSERT INTO productos (id, nombre, cantidad, precio) VALUES (100, 'c', 1, 1)")
+        otra.execute("INSERT INTO productos (id, nombre, cantidad, precio) VALUES (50, 'b', 1, 1)")
+        otra.execute("INSERT INTO productos (id, nombre, cantidad, precio) VALUES (10, 'a', 1, 1)")
+    otra.close()
+    assert [p.id for p in inv.listar_todos()] == [1, 2, 3, 10, 50, 100]
+    assert [p.id for p in next(inv.paginas(4))] == [1, 2, 3, 10]
+
+
+def test_actualizar_fallido_no_toca_la_cache(ruta_db):
+    inv = Inventario(perezoso=False, instantanea='')
+    a, b = inv.agregar_productos([Producto(None, 'a', 1, 1.0), Producto(None, 'b', 2, 2.0)])
+    # Un valor que sqlite3 no sabe guardar hace fallar el UPDATE
+    with pytest.raises(sqlite3.Error):
+        inv.actualizar_producto(a.id, cantidad=5, precio=object())
+    with pytest.raises(sqlite3.Error):
+        inv.actualizar_productos([(a.id, 7, None), (b.id, None, object())])
+    assert [(p.cantidad, p.precio) for p in inv.listar_todos()] == [(1, 1.0), (2, 2.0)]
+    assert inv.valor_total() == 5.0
+
+
+def test_actualizar_productos_acumula_cambios_del_mismo_id(ruta_db):
+    inv = Inventario(perezoso=False, instantanea='')
+    (a,) = inv.agregar_productos([Producto(None, 'a', 1, 1.0)])
+    assert inv.actualizar_productos([(a.id, None, 3.0), (a.id, 4, None)]) == 1
+    assert (a.cantidad, a.precio) == (4, 3.0)
+    fila = sqlite3.connect(ruta_db).execute("SELECT cantidad, precio FROM productos").fetchone()
+    assert fila == (4, 3.0)
+
+
+def test_el_registro_de_cambios_se_poda_sin_reiniciar(ruta_db, monkeypatch):
+    monkeypatch.setattr(inventario.models, 'PODAR_REGISTRO_CADA', 5)
+    monkeypatch.setattr(inventario.db, 'CAMBIOS_A_CONSERVAR', 3)
+    inv = Inventario(perezoso=False, instantanea='')
+    for i in range(20):
+        inv.agregar_producto(Producto(None, f'p{i}', 1, 1.0))
+    conn = sqlite3.connect(ruta_db)
+    assert conn.execute("SELECT COUNT(*) FROM productos_cambios").fetchone()[0] <= 3 + 5
+    conn.close()
+    assert [p.nombre for p in inv.listar_todos()] == [f'p{i}' for i in range(20)]
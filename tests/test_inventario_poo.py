@@ -0,0 +1,37 @@
+import sqlite3
+
+import pytest
+
+import inventario_poo
+
+
+@pytest.fixture
+def inv(tmp_path, monkeypatch):
+    # Inventario abre "inventario.db" relativo al directorio de trabajo
+    monkeypatch.chdir(tmp_path)
+    inv = inventario_poo.Inventario()
+    yield inv
+    inv.conn.close()
+
+
+def filas_en_bd(inv):
+    return sqlite3.connect(inv.conn.execute("PRAGMA database_list").fetchone()[2]).execute(
+        "SELECT nombre FROM productos ORDER BY id").fetchall()
+
+
+def test_agregar_productos_fallido_no_deja_filas_a_medias(inv):
+    inv.agregar_productos([('a', 1, 1.0)])
+    with pytest.raises(sqlite3.IntegrityError):
+        inv.agregar_productos([('b', 1, 1.0), (None, 1, 1.0), ('c', 1, 1.0)])
+    assert not inv.conn.in_transaction
+    assert filas_en_bd(inv) == [('a',)]
+    assert [p.nombre for p in inv.productos.values()] == ['a']
+    inv.agregar_productos([('d', 1, 1.0)])
+    assert filas_en_bd(inv) == [('a',), ('d',)]
+
+
+def test_agregar_productos_dentro_de_un_lote_confirma_al_final(inv):
+    with inv.lote():
+        inv.agregar_productos([('a', 1, 1.0), ('b', 2, 2.0)])
+        assert filas_en_bd(inv) == []
+    assert filas_en_bd(inv) == [('a',), ('b',)]
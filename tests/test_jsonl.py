@@ -0,0 +1,25 @@
+import json
+
+from almacenamiento import jsonl
+
+
+def test_migrar_ordena_registros_sin_fecha_o_que_no_son_objetos(tmp_path):
+    origen, destino = tmp_path / 'datos.json', tmp_path / 'datos.jsonl'
+    registros = [{'fecha_registro': '2024-02-01', 'n': 1}, {'fecha_registro': None, 'n': 2},
+                 'suelto', {'n': 3}, {'fecha_registro': '2024-01-01', 'n': 4}]
+    origen.write_text(json.dumps(registros), encoding='utf-8')
+
+    assert jsonl.migrar_desde_array(str(origen), str(destino)) == 5
+    lineas = [json.loads(l) for l in destino.read_text(encoding='utf-8').splitlines()]
+    assert lineas[-2:] == [registros[4], registros[0]]
+    assert (tmp_path / 'datos.json.migrado').exists()
+
+
+def test_migrar_deja_en_su_sitio_un_array_ilegible(tmp_path):
+    origen, destino = tmp_path / 'datos.json', tmp_path / 'datos.jsonl'
+    for contenido in (b'[{"nombre": "a"', '[{"nombre": "ñ"}]'.encode('latin-1')):
+        origen.write_bytes(contenido)
+        assert jsonl.migrar_desde_array(str(origen), str(destino)) == 0
+        assert origen.read_bytes() == contenido
+        assert not destino.exists()
+        assert not (tmp_path / 'datos.json.migrado').exists()
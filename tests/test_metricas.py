@@ -0,0 +1,21 @@
+from metricas import RegistroMetricas
+
+
+def test_recolector_separa_contadores_gauges_y_excluidos():
+    registro = RegistroMetricas()
+    registro.recolector('pool', 'Pool', lambda: {'prestamos': 7, 'tiempo_espera_total': 1.5, 'en_uso': 2,
+                                                 'pid': 1234, 'listo': True, 'politica': 'lote'},
+                        contadores=('prestamos', 'tiempo_espera_total'), excluir=('pid',))
+    lineas = registro.exportar().splitlines()
+    assert '# TYPE pool_prestamos_total counter' in lineas and 'pool_prestamos_total 7' in lineas
+    assert '# TYPE pool_tiempo_espera_total counter' in lineas and 'pool_tiempo_espera_total 1.5' in lineas
+    assert '# TYPE pool_en_uso gauge' in lineas and 'pool_listo 1' in lineas
+    assert not any('pid' in linea or 'politica' in linea for linea in lineas)
+
+
+def test_metrics_de_la_app_publica_contadores(aplicacion, cliente):
+    texto = cliente.get('/metrics').get_data(as_text=True)
+    assert '# TYPE mysql_pool_prestamos_total counter' in texto
+    assert '# TYPE hash_contrasenas_calculados_total counter' in texto
+    assert '# TYPE mysql_pool_en_uso gauge' in texto
+    assert 'mysql_pool_pid' not in texto
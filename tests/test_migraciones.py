@@ -0,0 +1,32 @@
+from conexion.migraciones import problemas_de_plan
+
+
+class CursorExplain:
+    """Cursor falso que responde a EXPLAIN con las filas dadas"""
+
+    def __init__(self, *filas):
+        self.description = [(c,) for c in ('table', 'type', 'rows', 'Extra')]
+        self._filas = filas
+
+    def execute(self, consulta, params=()):
+        assert consulta.startswith('EXPLAIN ')
+
+    def fetchall(self):
+        return list(self._filas)
+
+
+def test_recorrido_del_indice_entero_cuenta_como_problema():
+    plan = CursorExplain(('usuarios', 'index', 250000, 'Using where; Backward index scan'))
+    assert problemas_de_plan(plan, 'SELECT 1') == ['usuarios: recorre el índice completo (~250000 filas)']
+
+
+def test_rango_y_recorrido_corto_del_indice_no_son_problema():
+    plan = CursorExplain(('usuarios', 'range', 250000, 'Using where'),
+                         ('producto', 'index', 26, 'Using index'))
+    assert problemas_de_plan(plan, 'SELECT 1') == []
+
+
+def test_tabla_completa_y_filesort():
+    plan = CursorExplain(('producto', 'ALL', 10, 'Using filesort'))
+    assert problemas_de_plan(plan, 'SELECT 1') == ['producto: recorre la tabla completa',
+                                                   'producto: ordena con filesort']
@@ -0,0 +1,97 @@
+import base64
+import json
+
+import pytest
+
+
+def token(valor):
+    return base64.urlsafe_b64encode(json.dumps(valor).encode()).decode()
+
+
+# JSON bien formado en base64 pero que no es un cursor [clave, id]
+CURSORES_MALFORMADOS = [
+    token(5),
+    token({'a': 1}),
+    token([1, 2]),
+    token([[1], 2]),
+    token(['x']),
+    token(['x', 1, 2]),
+    token(['x', [1]]),
+    token(['x', True]),
+    token(['2024-01-01T00:00:00', None]),
+    'no-es-base64!',
+    # Anidamiento que agota la recursión de json.loads, dentro del límite de longitud
+    pytest.param(base64.urlsafe_b64encode(b'[' * 3000).decode(), id='anidado'),
+    pytest.param(token(['x' * 5000, 1]), id='demasiado-largo'),
+]
+
+
+def sembrar(aplicacion, usuarios=5, productos=5):
+    with aplicacion.db_manager.conexion() as conn:
+        cursor = conn.cursor()
+        cursor.executemany(
+            "INSERT INTO usuarios (nombre, mail, password, fecha_registro) VALUES (%s, %s, %s, %s)",
+            [(f'u{i}', f'u{i}@ejemplo.com', 'x', f'2024-01-0{i + 1} 10:00:00') for i in range(usuarios)]
+        )
+        cursor.executemany(
+            "INSERT INTO producto (nombre, costo, stock) VALUES (%s, %s, %s)",
+            [(f'p{i}', 1.5, 1) for i in range(productos)]
+        )
+        conn.commit()
+        cursor.close()
+
+
+@pytest.mark.parametrize('cursor', CURSORES_MALFORMADOS)
+def test_decodificar_cursor_rechaza_tokens_malformados(aplicacion, cursor):
+    assert aplicacion.decodificar_cursor(cursor) is None
+
+
+def test_decodificar_cursor_acepta_los_propios(aplicacion):
+    assert aplicacion.decodificar_cursor(aplicacion.codificar_cursor('nombre', 7)) == ['nombre', '7']
+
+
+@pytest.mark.parametrize('cursor', CURSORES_MALFORMADOS)
+def test_listados_ignoran_cursores_malformados(aplicacion, cliente, cursor):
+    sembrar(aplicacion)
+    for ruta in ('/api/usuarios', '/api/productos'):
+        respuesta = cliente.get(ruta, query_string={'cursor': cursor, 'limite': 10})
+        assert respuesta.status_code == 200
+        assert len(respuesta.get_json()['datos']) == 5
+    respuesta = cliente.get('/dashboard', query_string={'usuarios_cursor': cursor, 'productos_cursor': cursor})
+    assert respuesta.status_code == 200
+
+
+def test_paginas_encadenadas_con_cursor(aplicacion, cliente):
+    sembrar(aplicacion)
+    for ruta, campo in (('/api/usuarios', 'id_usuario'), ('/api/productos', 'id_producto')):
+        vistos, cursor = [], None
+        while True:
+            datos = cliente.get(ruta, query_string={'cursor': cursor or '', 'limite': 2}).get_json()
+            vistos += [fila[campo] for fila in datos['datos']]
+            cursor = datos['siguiente']
+            if not cursor:
+                break
+        assert sorted(vistos) == [1, 2, 3, 4, 5]
+
+
+def test_paginas_con_claves_repetidas_no_pierden_ni_repiten_filas(aplicacion, cliente):
+    with aplicacion.db_manager.conexion() as conn:
+        cursor = conn.cursor()
+        cursor.executemany(
+            "INSERT INTO usuarios (nombre, mail, password, fecha_registro) VALUES (%s, %s, %s, %s)",
+            [(f'u{i}', f'u{i}@ejemplo.com', 'x', '2024-01-01 10:00:00') for i in range(5)]
+        )
+        cursor.executemany("INSERT INTO producto (nombre, costo, stock) VALUES (%s, %s, %s)",
+                           [('igual', 1.5, 1)] * 5)
+        conn.commit()
+        cursor.close()
+    for ruta, campo, orden in (('/api/usuarios', 'id_usuario', [5, 4, 3, 2, 1]),
+                               ('/api/productos', 'id_producto', [1, 2, 3, 4, 5])):
+        vistos, cursor = [], None
+        while True:
+            datos = cliente.get(ruta, query_string={'cursor': cursor or '', 'limite': 2}).get_json()
+            vistos += [fila[campo] for fila in datos['datos']]
+            cursor = datos['siguiente']
+            if not cursor:
+                break
+        assert vistos == orden
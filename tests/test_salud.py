@@ -0,0 +1,87 @@
+import threading
+import time
+
+from conexion.salud import SondaSalud
+
+
+def test_primer_estado_ya_tiene_resultado():
+    sonda = SondaSalud(lambda: None, intervalo=60)
+    try:
+        estado = sonda.estado()
+        assert estado['estado'] == 'ok' and estado['listo']
+        assert sonda.stats['comprobaciones'] == 1
+    finally:
+        sonda.cerrar()
+
+
+def test_primer_estado_con_fallo():
+    def probar():
+        raise ConnectionError('sin servidor')
+
+    sonda = SondaSalud(probar, intervalo=60)
+    try:
+        estado = sonda.estado()
+        assert estado['estado'] == 'caido' and estado['error'] == 'sin servidor'
+    finally:
+        sonda.cerrar()
+
+
+def test_health_tras_arrancar(cliente):
+    respuesta = cliente.get('/health')
+    assert respuesta.status_code == 200
+    assert respuesta.get_json()['mysql']['estado'] == 'ok'
+    assert cliente.get('/health/listo').status_code == 200
+
+
+def test_primera_comprobacion_lenta_no_bloquea_mas_de_espera_inicial():
+    liberar = threading.Event()
+    sonda = SondaSalud(lambda: None if liberar.wait(5) else None, intervalo=60, espera_inicial=0.05)
+    try:
+        inicio = time.monotonic()
+        estados = []
+        hilos = [threading.Thread(target=lambda: estados.append(sonda.estado()['estado'])) for _ in range(4)]
+        for hilo in hilos:
+            hilo.start()
+        for hilo in hilos:
+            hilo.join()
+        assert estados == ['iniciando'] * 4
+        assert time.monotonic() - inicio < 1
+        liberar.set()
+        sonda._primera.wait(1)
+        assert sonda.estado()['listo']
+    finally:
+        liberar.set()
+        sonda.cerrar()
+
+
+def test_aviso_deja_la_sonda_degradada_pero_lista():
+    sonda = SondaSalud(lambda: 'pool agotado', intervalo=60)
+    try:
+        estado = sonda.estado()
+        assert estado['estado'] == 'degradado' and estado['listo']
+        assert estado['error'] == 'pool agotado'
+    finally:
+        sonda.cerrar()
+
+
+def test_pool_agotado_es_degradado_y_la_sonda_no_usa_el_pool(aplicacion, cliente, monkeypatch):
+    pool = aplicacion.db_manager.pool
+    monkeypatch.setattr(pool, 'timeout', 5)
+    prestadas = [pool.obtener() for _ in range(pool.tamano)]
+    esperando = threading.Thread(target=lambda: pool.devolver(pool.obtener()))
+    esperando.start()
+    try:
+        while aplicacion.db_manager.estadisticas()['esperando'] == 0:
+            time.sleep(0.01)
+        prestamos = aplicacion.db_manager.estadisticas()['prestamos']
+        aplicacion.sonda_mysql.comprobar()
+        respuesta = cliente.get('/health')
+        assert respuesta.status_code == 200
+        assert respuesta.get_json()['mysql']['estado'] == 'degradado'
+        assert aplicacion.db_manager.estadisticas()['prestamos'] == prestamos
+    finally:
+        for conn in prestadas:
+            pool.devolver(conn)
+        esperando.join()
+    aplicacion.sonda_mysql.comprobar()
+    assert cliente.get('/health').get_json()['mysql']['estado'] == 'ok'
@@ -0,0 +1,29 @@
+import threading
+
+import pytest
+
+from trabajos import TrabajosEnSegundoPlano, TrabajosLlenosError
+
+
+def test_rechaza_por_encima_de_max_pendientes_y_guarda_el_error(tmp_path):
+    trabajos = TrabajosEnSegundoPlano(str(tmp_path), max_pendientes=1)
+    liberar = threading.Event()
+
+    def largo(progreso):
+        progreso({'paso': 1})
+        liberar.wait(5)
+        raise ValueError('fallo al final')
+
+    try:
+        id_trabajo = trabajos.lanzar(largo)
+        with pytest.raises(TrabajosLlenosError):
+            trabajos.lanzar(largo)
+        liberar.set()
+    finally:
+        liberar.set()
+        trabajos.cerrar()
+    estado = trabajos.estado(id_trabajo)
+    assert estado['estado'] == 'error' and estado['error'] == 'fallo al final'
+    assert estado['resultado'] == {'paso': 1}
+    stats = trabajos.estadisticas()
+    assert (stats['lanzados'], stats['fallidos'], stats['rechazados']) == (1, 1, 1)
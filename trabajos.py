@@ -0,0 +1,150 @@
+import json
+import os
+import re
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+
+_ID_VALIDO = re.compile(r'^[0-9a-f]{32}$')
+
+
+class TrabajosLlenosError(Exception):
+    """Hay demasiados trabajos pendientes en este proceso; se rechaza sin encolar"""
+
+
+class TrabajosEnSegundoPlano:
+    """Ejecuta trabajos largos en hilos del worker y guarda su estado en disco.
+
+    ``lanzar(funcion, *args)`` devuelve un id y ejecuta después
+    ``funcion(progreso, *args)``; la función puede llamar a
+    ``progreso(resultado_parcial)`` y lo que devuelva queda como resultado
+    final. El estado de cada trabajo es un JSON en ``directorio`` que se
+    reescribe de forma atómica (temporal + ``os.replace``), así que
+    cualquier worker del mismo host puede responder a la consulta de
+    estado, no solo el que lo ejecuta.
+
+    ``max_pendientes`` limita los trabajos en cola o en curso de cada
+    proceso: al superarlo se lanza TrabajosLlenosError. Los estados se
+    borran ``conservar`` segundos después de su última actualización.
+    Como ServicioHash, el ejecutor se crea en el primer uso de cada proceso.
+    """
+
+    def __init__(self, directorio, hilos=1, max_pendientes=4, conservar=3600):
+        self.directorio = directorio
+        self.hilos = hilos
+        self.max_pendientes = max_pendientes
+        self.conservar = conservar
+        self._lock = threading.Lock()
+        self._pool = None
+        self._pid = None
+        self._pendientes = 0
+        self.stats = {'lanzados': 0, 'terminados': 0, 'fallidos': 0, 'rechazados': 0}
+
+    def _ejecutor(self):
+        if self._pid != os.getpid():
+            self._pool = ThreadPoolExecutor(max_workers=self.hilos, thread_name_prefix='trabajo')
+            self._pendientes = 0
+            self._pid = os.getpid()
+        return self._pool
+
+    def _ruta(self, id_trabajo):
+        return os.path.join(self.directorio, f"{id_trabajo}.json")
+
+    def _guardar(self, estado):
+        estado['actualizado_en'] = datetime.now().isoformat()
+        ruta = self._ruta(estado['id'])
+        temporal = f"{ruta}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(temporal, 'w', encoding='utf-8') as f:
+            json.dump(estado, f, ensure_ascii=False)
+        os.replace(temporal, ruta)
+
+    def _podar(self):
+        limite = time.time() - self.conservar
+        try:
+            nombres = os.listdir(self.directorio)
+        except OSError:
+            return
+        for nombre in nombres:
+            ruta = os.path.join(self.directorio, nombre)
+            try:
+                if os.path.getmtime(ruta) < limite:
+                    os.unlink(ruta)
+            except OSError:
+                pass
+
+    def lanzar(self, funcion, *args):
+        """Encola el trabajo y devuelve su id (lanza TrabajosLlenosError si no cabe)"""
+        with self._lock:
+            ejecutor = self._ejecutor()
+            if self._pendientes >= self.max_pendientes:
+                self.stats['rechazados'] += 1
+                raise TrabajosLlenosError(f"Más de {self.max_pendientes} trabajos pendientes")
+            self._pendientes += 1
+            self.stats['lanzados'] += 1
+        os.makedirs(self.directorio, exist_ok=True)
+        self._podar()
+        estado = {
+            'id': uuid.uuid4().hex,
+            'estado': 'pendiente',
+            'creado_en': datetime.now().isoformat(),
+            'resultado': None,
+            'error': None,
+        }
+        try:
+            self._guardar(estado)
+            ejecutor.submit(self._ejecutar, estado, funcion, args)
+        except BaseException:
+            with self._lock:
+                self._pendientes -= 1
+            raise
+        return estado['id']
+
+    def _ejecutar(self, estado, funcion, args):
+        def progreso(resultado):
+            estado['resultado'] = resultado
+            self._guardar(estado)
+
+        try:
+            estado['estado'] = 'en_curso'
+            self._guardar(estado)
+            estado['resultado'] = funcion(progreso, *args)
+            estado['estado'] = 'terminado'
+            clave = 'terminados'
+        except Exception as e:
+            print(f"Error en trabajo en segundo plano {estado['id']}: {e}")
+            estado['estado'] = 'error'
+            estado['error'] = str(e) or e.__class__.__name__
+            clave = 'fallidos'
+        try:
+            self._guardar(estado)
+        except OSError as e:
+            print(f"Error guardando el estado del trabajo {estado['id']}: {e}")
+        finally:
+            with self._lock:
+                self._pendientes -= 1
+                self.stats[clave] += 1
+
+    def estado(self, id_trabajo):
+        """Último estado guardado del trabajo, o None si no existe (o ya se borró)"""
+        if not _ID_VALIDO.match(id_trabajo or ''):
+            return None
+        try:
+            with open(self._ruta(id_trabajo), 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def cerrar(self):
+        if self._pool is not None and self._pid == os.getpid():
+            self._pool.shutdown(wait=True)
+            self._pool = None
+            self._pid = None
+
+    def estadisticas(self):
+        with self._lock:
+            stats = dict(self.stats)
+            stats['pendientes'] = self._pendientes if self._pid == os.getpid() else 0
+        stats['max_pendientes'] = self.max_pendientes
+        return stats